@@ -630,6 +630,12 @@ class AzurLaneAutoScript:
     def loop(self):
         logger.set_file_logger(self.config_name)
         logger.info(f'Start scheduler loop: {self.config_name}')
+        # Deliver drop records left by the last run
+        try:
+            from module.statistics.azurstats import AzurStats
+            AzurStats(self.config).resume()
+        except Exception as e:
+            logger.exception(e)
 
         # --- 初始化计数器 ---
         consecutive_global_failures = 0
@@ -766,5 +772,8 @@ class AzurLaneAutoScript:
                 time.sleep(wait_seconds)
 
 if __name__ == '__main__':
+    from module.webui.setting import State
+    if State.deploy_config.AsyncLogger:
+        logger.set_async_logger()
     alas = AzurLaneAutoScript()
     alas.loop()
@@ -136,6 +136,7 @@ class GitManager(DeployConfig):
             source='origin',
             branch='master',
             git=self.git,
+            cache=self.filepath(self.GitOverCdnCache) if self.GitOverCdnCache else None,
         )
         client.logger = logger
         return client
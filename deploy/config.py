@@ -18,6 +18,7 @@ class ConfigModel:
     SSLVerify: bool = False
     AutoUpdate: bool = True
     KeepLocalChanges: bool = False
+    GitOverCdnCache: Optional[str] = None
 
     # Python
     PythonExecutable: str = "./toolkit/python.exe"
@@ -36,14 +37,19 @@ class ConfigModel:
     StartOcrServer: bool = False
     OcrServerPort: int = 22268
     OcrClientAddress: str = "127.0.0.1:22268"
+    OcrSharedParams: bool = False
 
     # Update
     EnableReload: bool = True
     CheckUpdateInterval: int = 5
     AutoRestartTime: str = "03:50"
+    UpdateMode: str = "full"
 
     # Misc
     DiscordRichPresence: bool = False
+    AsyncLogger: bool = False
+    AdbBroker: bool = False
+    AdbBrokerPort: int = 22270
 
     # Remote Access
     EnableRemoteAccess: bool = True
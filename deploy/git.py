@@ -90,6 +90,7 @@ class GitManager(DeployConfig):
             source='origin',
             branch='master',
             git=self.git,
+            cache=self.filepath('GitOverCdnCache') if self.GitOverCdnCache else None,
         )
         client.logger = logger
         return client
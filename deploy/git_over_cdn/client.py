@@ -1,9 +1,11 @@
+import hashlib
 import io
 import json
 import os
 import re
 import shutil
 import subprocess
+import time
 import zipfile
 from typing import Callable, Generic, TypeVar
 
@@ -46,20 +48,199 @@ class PrintLogger:
         print(f'[{name}] {text}')
 
 
+def file_sha1(file, end=0):
+    """
+    Args:
+        file: Filepath
+        end: Bytes at the end to exclude
+
+    Returns:
+        bytes: SHA-1 digest of file content, excluding the last `end` bytes
+    """
+    sha1 = hashlib.sha1()
+    remain = os.path.getsize(file) - end
+    with open(file, 'rb') as f:
+        while remain > 0:
+            chunk = f.read(min(remain, 1048576))
+            if not chunk:
+                break
+            sha1.update(chunk)
+            remain -= len(chunk)
+    return sha1.digest()
+
+
+def file_tail(file, size):
+    with open(file, 'rb') as f:
+        f.seek(-size, os.SEEK_END)
+        return f.read(size)
+
+
+def idx_contains(idx, commit):
+    """
+    Args:
+        idx: Filepath to .idx, version 2
+        commit: SHA-1 in hex
+
+    Returns:
+        bool: If object is in the pack
+    """
+    name = bytes.fromhex(commit)
+    with open(idx, 'rb') as f:
+        if f.read(8) != b'\377tOc\x00\x00\x00\x02':
+            return False
+        fanout = f.read(1024)
+        # fanout[i] is the number of objects whose first byte <= i
+        start = int.from_bytes(fanout[(name[0] - 1) * 4:name[0] * 4], 'big') if name[0] else 0
+        end = int.from_bytes(fanout[name[0] * 4:name[0] * 4 + 4], 'big')
+        f.seek(8 + 1024 + start * 20)
+        names = f.read((end - start) * 20)
+    return any(names[i:i + 20] == name for i in range(0, len(names), 20))
+
+
+def verify_pack(pack, idx, commit=''):
+    """
+    Verify pack file and its index, without git.
+    Pack file ends with SHA-1 of its content,
+    index file ends with SHA-1 of the pack and SHA-1 of the index itself.
+
+    Args:
+        pack: Filepath to .pack
+        idx: Filepath to .idx
+        commit: If given, the commit should be in pack
+
+    Returns:
+        bool: If valid
+    """
+    try:
+        if os.path.getsize(pack) < 32 or os.path.getsize(idx) < 1072:
+            return False
+        with open(pack, 'rb') as f:
+            if f.read(4) != b'PACK':
+                return False
+        if commit and not idx_contains(idx, commit):
+            return False
+        pack_checksum = file_tail(pack, 20)
+        idx_tail = file_tail(idx, 40)
+        if idx_tail[:20] != pack_checksum:
+            return False
+        if file_sha1(idx, end=20) != idx_tail[20:]:
+            return False
+        if file_sha1(pack, end=20) != pack_checksum:
+            return False
+    except OSError:
+        return False
+    return True
+
+
+def link_or_copy(src, dst):
+    """
+    Hard link src to dst if possible, otherwise copy. dst is replaced atomically.
+    """
+    tmp = f'{dst}.{os.getpid()}.tmp'
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+class PackCache:
+    """
+    Content-addressed cache of packs, can be shared by checkouts on a host, or by hosts on a network drive.
+
+    A pack from <base> to <latest> contains all objects reachable from <latest> but not from <base>.
+        <folder>/<latest>/<base>.pack
+        <folder>/<latest>/<base>.idx
+    Files are written to temp files and renamed, so concurrent writers only do duplicate work.
+    """
+
+    def __init__(self, folder, keep=5):
+        """
+        Args:
+            folder: Cache folder
+            keep: Number of latest commits to keep when pruning
+        """
+        self.folder = folder.replace('\\', '/')
+        self.keep = keep
+
+    def path(self, latest, base, ext):
+        return os.path.join(self.folder, latest, f'{base}.{ext}').replace('\\', '/')
+
+    def bases(self, latest):
+        """
+        Returns:
+            list[str]: Commits that have a cached pack to <latest>
+        """
+        try:
+            files = os.listdir(os.path.join(self.folder, latest))
+        except FileNotFoundError:
+            return []
+        out = []
+        for file in files:
+            base, ext = os.path.splitext(file)
+            if ext == '.idx' and os.path.exists(self.path(latest, base, 'pack')):
+                out.append(base)
+        return out
+
+    def put(self, latest, base, pack, idx):
+        """
+        Copy a verified pack into cache.
+
+        Args:
+            latest:
+            base:
+            pack: Filepath to .pack
+            idx: Filepath to .idx
+        """
+        os.makedirs(os.path.join(self.folder, latest), exist_ok=True)
+        # Pack first, a pack is visible once its idx exists
+        link_or_copy(pack, self.path(latest, base, 'pack'))
+        link_or_copy(idx, self.path(latest, base, 'idx'))
+
+    def remove(self, latest, base):
+        for ext in ['idx', 'pack']:
+            try:
+                os.remove(self.path(latest, base, ext))
+            except FileNotFoundError:
+                pass
+
+    def prune(self):
+        """
+        Remove packs to old commits, keep the newest `keep` ones.
+
+        Returns:
+            list[str]: Removed commits
+        """
+        try:
+            folders = [os.path.join(self.folder, name) for name in os.listdir(self.folder)]
+        except FileNotFoundError:
+            return []
+        folders = [f for f in folders if os.path.isdir(f) and re.fullmatch(r'[0-9a-f]{40}', os.path.basename(f))]
+        folders = sorted(folders, key=os.path.getmtime, reverse=True)
+        removed = []
+        for folder in folders[self.keep:]:
+            shutil.rmtree(folder, ignore_errors=True)
+            removed.append(os.path.basename(folder))
+        return removed
+
+
 class GitOverCdnClient:
     logger = PrintLogger()
 
-    def __init__(self, url, folder, source='origin', branch='master', git='git'):
+    def __init__(self, url, folder, source='origin', branch='master', git='git', cache=None):
         """
         Args:
             url: http://127.0.0.1:22251/pack/LmeSzinc_AzurLaneAutoScript_master/
             folder: D:/AzurLaneAutoScript
+            cache: Folder of shared pack cache, or None to disable
         """
         self.url = url.strip('/')
         self.folder = folder.replace('\\', '/')
         self.source = source
         self.branch = branch
         self.git = git
+        self.git_returncode = 0
+        self.cache = PackCache(cache) if cache else None
 
     def filepath(self, path):
         path = os.path.join(self.folder, '.git', path)
@@ -124,7 +305,78 @@ class GitOverCdnClient:
             self.logger.error(f'Failed to get remote commit, status={resp.status_code}, text={resp.text}')
             return ''
 
+    def pack_filepath(self, ext):
+        return self.filepath(f'./objects/pack/pack-{self.latest_commit}.{ext}')
+
+    def install_pack(self, pack, idx):
+        """
+        Verify a pack and put it into local repo.
+
+        Args:
+            pack: Filepath to .pack
+            idx: Filepath to .idx
+
+        Returns:
+            bool: If success
+        """
+        if not verify_pack(pack, idx, commit=self.latest_commit):
+            self.logger.error(f'Pack verification failed: {pack}')
+            return False
+        try:
+            link_or_copy(pack, self.pack_filepath('pack'))
+            link_or_copy(idx, self.pack_filepath('idx'))
+        except Exception as e:
+            self.logger.error(f'Failed to install pack: {e}')
+            return False
+        return True
+
+    def is_ancestor(self, commit):
+        """
+        Returns:
+            bool: If commit exists in local repo and is an ancestor of current commit.
+        """
+        self.git_command('merge-base', '--is-ancestor', commit, self.current_commit)
+        return self.git_returncode == 0
+
+    def cache_lookup(self):
+        """
+        Returns:
+            str: Base commit of a usable pack in cache, or '' if not found.
+                A pack from an older commit contains more objects than needed, but still works.
+        """
+        bases = self.cache.bases(self.latest_commit)
+        if self.current_commit in bases:
+            return self.current_commit
+        for base in bases:
+            if self.is_ancestor(base):
+                return base
+        return ''
+
+    def load_cached_pack(self):
+        """
+        Returns:
+            bool: If pack is installed from cache.
+        """
+        base = self.cache_lookup()
+        if not base:
+            self.logger.info('Pack not found in cache')
+            return False
+        self.logger.info(f'Use cached pack {self.latest_commit}/{base}')
+        pack = self.cache.path(self.latest_commit, base, 'pack')
+        idx = self.cache.path(self.latest_commit, base, 'idx')
+        if self.install_pack(pack, idx):
+            # Touch to mark as recently used
+            now = time.time()
+            os.utime(os.path.dirname(pack), (now, now))
+            return True
+        self.logger.warning('Cached pack is broken, remove it')
+        self.cache.remove(self.latest_commit, base)
+        return False
+
     def download_pack(self):
+        if self.cache is not None and self.load_cached_pack():
+            return True
+
         try:
             url = self.urlpath(f'/{self.latest_commit}/{self.current_commit}.zip')
             self.logger.info(f'Fetch url: {url}')
@@ -134,16 +386,27 @@ class GitOverCdnClient:
             return False
 
         if resp.status_code == 200:
+            tmp = {}
             try:
                 zipped = zipfile.ZipFile(io.BytesIO(resp.content))
-                for file in [f'pack-{self.latest_commit}.pack', f'pack-{self.latest_commit}.idx']:
+                for ext in ['pack', 'idx']:
+                    file = f'pack-{self.latest_commit}.{ext}'
                     self.logger.info(f'Unzip {file}')
                     member = zipped.getinfo(file)
-                    tmp = self.filepath(f'./objects/pack/{file}.tmp')
-                    out = self.filepath(f'./objects/pack/{file}')
-                    with zipped.open(member) as source, open(tmp, "wb") as target:
+                    tmp[ext] = self.filepath(f'./objects/pack/{file}.download')
+                    with zipped.open(member) as source, open(tmp[ext], "wb") as target:
                         shutil.copyfileobj(source, target)
-                    os.replace(tmp, out)
+                if not self.install_pack(tmp['pack'], tmp['idx']):
+                    return False
+                if self.cache is not None:
+                    try:
+                        self.cache.put(self.latest_commit, self.current_commit, tmp['pack'], tmp['idx'])
+                        self.logger.info(f'Pack cached: {self.latest_commit}/{self.current_commit}')
+                        for commit in self.cache.prune():
+                            self.logger.info(f'Pruned cached packs to {commit}')
+                    except Exception as e:
+                        # Cache is optional
+                        self.logger.warning(f'Failed to cache pack: {e}')
                 return True
             except zipfile.BadZipFile as e:
                 # File is not a zip file
@@ -156,6 +419,12 @@ class GitOverCdnClient:
             except Exception as e:
                 self.logger.error(e)
                 return False
+            finally:
+                for file in tmp.values():
+                    try:
+                        os.remove(file)
+                    except FileNotFoundError:
+                        pass
         elif resp.status_code == 404:
             self.logger.error(f'Failed to download pack, status={resp.status_code}, no such pack files provided')
             return False
@@ -202,6 +471,7 @@ class GitOverCdnClient:
             process.kill()
             stdout, stderr = process.communicate()
             self.logger.warning(f'TimeoutExpired when calling {cmd}, stdout={stdout}, stderr={stderr}')
+        self.git_returncode = process.returncode
         return stdout.decode()
 
     def git_reset(self, keep_changes=False):
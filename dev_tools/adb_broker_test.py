@@ -0,0 +1,161 @@
+"""
+Test module/device/adb_broker.py without a real device.
+
+A fake adb server answers a subset of the smart socket protocol:
+    host:version, host:devices, host:connect:<serial>, host:disconnect:<serial>,
+    host:transport:<serial> followed by shell:<command>, which echoes the command back.
+Broker is started in front of it, then many clients hit the broker concurrently.
+
+Usage:
+    python dev_tools/adb_broker_test.py
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+from module.device.adb_broker import AdbBroker, broker_available, encode_request, read_exactly, read_request
+
+
+class FakeAdbServer:
+    def __init__(self, port):
+        self.port = port
+        self.devices = {'emulator-5554': 'device'}
+        self.lock = threading.Lock()
+        # Number of requests received. Key: request name. Value: int
+        self.received = {}
+        # Max number of connect requests running at the same time, per serial
+        self.connecting = {}
+        self.max_connecting = {}
+
+    def count(self, name):
+        with self.lock:
+            self.received[name] = self.received.get(name, 0) + 1
+
+    @staticmethod
+    def okay(conn, data=None):
+        conn.sendall(b'OKAY')
+        if data is not None:
+            data = data.encode('utf-8')
+            conn.sendall(b'%04x' % len(data) + data)
+
+    def handle(self, conn):
+        with conn:
+            request = read_request(conn)
+            if request == 'host:version':
+                self.count('version')
+                self.okay(conn, '0029')
+            elif request == 'host:devices':
+                self.count('devices')
+                # Listing devices takes time on a real adb server
+                time.sleep(0.05)
+                with self.lock:
+                    text = ''.join(f'{serial}\t{status}\n' for serial, status in self.devices.items())
+                self.okay(conn, text)
+            elif request.startswith('host:connect:'):
+                self.count('connect')
+                serial = request[len('host:connect:'):]
+                with self.lock:
+                    self.connecting[serial] = self.connecting.get(serial, 0) + 1
+                    self.max_connecting[serial] = max(self.max_connecting.get(serial, 0), self.connecting[serial])
+                time.sleep(0.05)
+                with self.lock:
+                    self.connecting[serial] -= 1
+                    self.devices[serial] = 'device'
+                self.okay(conn, f'connected to {serial}')
+            elif request.startswith('host:disconnect:'):
+                self.count('disconnect')
+                serial = request[len('host:disconnect:'):]
+                with self.lock:
+                    self.devices.pop(serial, None)
+                self.okay(conn, f'disconnected {serial}')
+            elif request.startswith('host:transport:'):
+                self.count('transport')
+                self.okay(conn)
+                command = read_request(conn)
+                if command.startswith('shell:'):
+                    self.okay(conn)
+                    conn.sendall(command[len('shell:'):].encode('utf-8'))
+            else:
+                data = f'unknown host service: {request}'.encode('utf-8')
+                conn.sendall(b'FAIL' + b'%04x' % len(data) + data)
+
+    def serve_forever(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(('127.0.0.1', self.port))
+        server.listen(64)
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+
+def request(port, *requests):
+    """
+    Returns:
+        bytes: Everything received after sending requests.
+    """
+    with socket.create_connection(('127.0.0.1', port), timeout=5) as conn:
+        out = b''
+        for req in requests:
+            conn.sendall(encode_request(req))
+            status = read_exactly(conn, 4)
+            assert status == b'OKAY', f'{req}: {status}'
+        while True:
+            data = conn.recv(4096)
+            if not data:
+                break
+            out += data
+        return out
+
+
+def run_concurrently(func, n):
+    threads = [threading.Thread(target=func) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def test(adb_port=25037, broker_port=25038):
+    fake = FakeAdbServer(adb_port)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    broker = AdbBroker(port=broker_port, adb_port=adb_port)
+    threading.Thread(target=broker.serve_forever, daemon=True).start()
+    time.sleep(0.2)
+
+    # Device listing is cached
+    run_concurrently(lambda: request(broker_port, 'host:devices'), 20)
+    print(f'20 host:devices -> {fake.received.get("devices")} upstream')
+    assert fake.received['devices'] == 1
+
+    # Connects to the same serial don't overlap
+    run_concurrently(lambda: request(broker_port, 'host:connect:127.0.0.1:16384'), 10)
+    print(f'Max concurrent connect: {fake.max_connecting}')
+    assert fake.max_connecting['127.0.0.1:16384'] == 1
+
+    # Cache is invalidated after connect
+    out = request(broker_port, 'host:devices')
+    assert b'127.0.0.1:16384\tdevice' in out, out
+
+    # Transport and shell are relayed
+    out = request(broker_port, 'host:transport:127.0.0.1:16384', 'shell:echo hello')
+    assert out == b'echo hello', out
+
+    # Probes are not counted as requests
+    requests = broker.stats['requests']
+    assert broker_available(broker_port)
+    time.sleep(0.1)
+    assert broker.stats['requests'] == requests
+
+    print(f'Broker stats: {broker.stats}')
+    print('All tests passed')
+
+
+if __name__ == '__main__':
+    test()
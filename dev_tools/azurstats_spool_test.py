@@ -0,0 +1,214 @@
+"""
+Test `DropSpool` and `DropSpoolWorker` with a local HTTP server standing in for Azur Stats.
+
+1. Add records to spool, deliver them in a batch, check saved files and uploads.
+2. Check deduplication, retry with backoff, and records left by a killed process.
+3. Check attempt and spool size limits, and records in memory written at exit.
+4. Measure time spent on the committing thread, against the threaded save before spool.
+
+Usage:
+    python dev_tools/azurstats_spool_test.py
+"""
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.base.utils import save_image
+from module.statistics.azurstats import DropSpool, DropSpoolWorker
+from module.statistics.utils import pack
+
+# Add a record and get killed before delivery
+KILLED_SCRIPT = """
+import os, sys
+import numpy as np
+sys.path.insert(0, os.getcwd())
+from module.statistics.azurstats import DropSpool
+DropSpool(sys.argv[1]).put(np.full((4, 4, 3), 7, dtype=np.uint8), {
+    'genre': 'killed', 'filename': 'killed.png', 'save': True, 'save_folder': sys.argv[2], 'upload': False})
+os._exit(1)
+"""
+
+
+class StatsHandler(http.server.BaseHTTPRequestHandler):
+    uploads = []
+    connections = set()
+    fail = False
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        self.connections.add(self.client_address)
+        if self.fail:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.uploads.append((self.headers.get('user-agent'), body))
+        data = json.dumps({'status': True, 'data': {'md5': str(len(self.uploads))}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    StatsHandler.protocol_version = 'HTTP/1.1'
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StatsHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def image(value):
+    return np.full((8, 8, 3), value, dtype=np.uint8)
+
+
+def run(folder):
+    httpd = start_server()
+    api = f'http://127.0.0.1:{httpd.server_address[1]}/api/upload/'
+    saved = os.path.join(folder, 'screenshots')
+    spool = DropSpool(os.path.join(folder, 'spool'))
+    # Large interval, batches are triggered by test
+    worker = DropSpoolWorker(spool, batch=3, interval=3600, backoff=10, backoff_max=40)
+    results = []
+
+    def check(name, result):
+        print(f'{name}: {"PASS" if result else "FAIL"}')
+        results.append(bool(result))
+
+    def put(value, genre='combat', save=True, upload=True):
+        return spool.put(image(value), {
+            'genre': genre, 'filename': f'{genre}_{value}.png', 'save': save, 'save_folder': saved,
+            'upload': upload, 'api': api, 'user_agent': 'Alas (test)'})
+
+    for value in range(4):
+        put(value)
+    check('Records spooled', spool.count() == 4)
+    check('Batch size', worker.deliver() == 3 and spool.count() == 1)
+    check('Images uploaded', len(StatsHandler.uploads) == 3
+          and all(agent == 'Alas (test)' and b'\x89PNG' in body for agent, body in StatsHandler.uploads))
+    check('Session reused', len(StatsHandler.connections) == 1)
+    worker.deliver()
+    check('Images saved', sorted(os.listdir(os.path.join(saved, 'combat')))
+          == [f'combat_{value}.png' for value in range(4)] and spool.count() == 0)
+
+    put(1)
+    check('Duplicate skipped', worker.deliver() == 1 and len(StatsHandler.uploads) == 4 and spool.count() == 0)
+
+    StatsHandler.fail = True
+    put(10)
+    put(11)
+    worker.deliver()
+    records = spool.records()
+    check('Failed record kept', len(records) == 2 and records[0]['attempt'] == 1 and records[0]['save'] is False)
+    check('Batch stops on upload failure', records[1]['attempt'] == 0)
+    check('Backoff', worker.deliver() == 1 and spool.records()[0]['attempt'] == 1
+          and worker.retry_delay(1) == 10 and worker.retry_delay(2) == 20 and worker.retry_delay(5) == 40)
+    StatsHandler.fail = False
+    now = max(record['next_try'] for record in spool.records()) + 1
+    check('Retry success', worker.deliver(now=now) == 2 and spool.count() == 0 and len(StatsHandler.uploads) == 6)
+
+    subprocess.run([sys.executable, '-c', KILLED_SCRIPT, spool.folder, saved], cwd=os.getcwd())
+    with open(spool.file('orphan', '.npy'), 'wb') as f:
+        f.write(b'unfinished commit')
+    spool.cleanup()
+    check('Orphan image removed', not os.path.exists(spool.file('orphan', '.npy')))
+    check('Record survives process exit', spool.count() == 1 and worker.deliver() == 1
+          and os.path.exists(os.path.join(saved, 'killed', 'killed.png')))
+
+    # Saving to a folder that can't be created
+    blocked = os.path.join(folder, 'blocked')
+    with open(blocked, 'w') as f:
+        f.write('not a folder')
+    limited = DropSpool(os.path.join(folder, 'limited'), limit=3)
+    failing = DropSpoolWorker(limited, batch=10, interval=3600, backoff=0, attempt_max=2)
+    for value in range(5):
+        limited.put(image(value), {'genre': 'blocked', 'filename': f'{value}.png', 'save': True,
+                                   'save_folder': blocked, 'upload': False})
+    check('Spool size limit', limited.count() == 3
+          and [record['filename'] for record in limited.records()] == ['2.png', '3.png', '4.png']
+          and len([file for file in os.listdir(limited.folder) if file.endswith('.npy')]) == 3)
+    failing.deliver()
+    check('Attempt kept', limited.count() == 3 and limited.records()[0]['attempt'] == 1)
+    failing.deliver()
+    check('Attempt limit', limited.count() == 0 and not os.listdir(limited.folder))
+
+    # Records in memory, worker thread is sleeping
+    memory = DropSpool(os.path.join(folder, 'memory'))
+    sleeping = DropSpoolWorker(memory, batch=10, interval=3600)
+    with sleeping.pending_lock:
+        sleeping.put(image(20), {'genre': 'memory', 'filename': 'memory.png', 'save': True,
+                                 'save_folder': saved, 'upload': False})
+        check('Put in memory', memory.count() == 0 and len(sleeping.pending) == 1)
+    sleeping.flush()
+    check('Flushed to spool', memory.count() == 1 and not sleeping.pending)
+
+    httpd.shutdown()
+    print(f'{sum(results)}/{len(results)} passed')
+
+
+def benchmark(folder, repeat=20):
+    """
+    Time spent on the committing thread with a drop record of 3 screenshots.
+    """
+    rng = np.random.default_rng(0)
+    images = [rng.integers(0, 256, (720, 1280, 3), dtype=np.uint8) for _ in range(3)]
+    saved = os.path.join(folder, 'benchmark')
+    os.makedirs(saved, exist_ok=True)
+
+    def baseline(index):
+        # Before spool, saving runs on a new thread
+        image = pack(images)
+        thread = threading.Thread(target=save_image, args=(image, os.path.join(saved, f'{index}.png')))
+        thread.start()
+        return thread
+
+    spool = DropSpool(os.path.join(folder, 'benchmark_spool'))
+
+    def spool_put(index):
+        # Spool written on the committing thread
+        spool.put(pack(images), {'genre': 'benchmark', 'filename': f'{index}.png', 'save': False})
+
+    worker = DropSpoolWorker(DropSpool(os.path.join(folder, 'benchmark_worker')), batch=1000, interval=3600)
+
+    def worker_put(index):
+        worker.put(pack(images), {'genre': 'benchmark', 'filename': f'{index}.png', 'save': False})
+
+    for name, func in [('threaded save', baseline), ('spool put', spool_put), ('worker put', worker_put)]:
+        cost = []
+        for index in range(repeat):
+            start = time.perf_counter()
+            thread = func(index)
+            cost.append(time.perf_counter() - start)
+            # Let background work finish, so it doesn't slow down the next commit
+            if thread is not None:
+                thread.join()
+            while worker.pending:
+                time.sleep(0.01)
+            with worker.pending_lock, worker.lock:
+                pass
+        cost = np.array(cost) * 1000
+        print(f'Commit {name}: median {np.median(cost):.2f}ms, max {np.max(cost):.2f}ms')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        run(folder)
+        benchmark(folder)
@@ -0,0 +1,163 @@
+"""
+Micro-benchmark color primitives in `module.base.utils` against their previous implementations,
+on crops in typical sizes, and check if the results are the same.
+
+Usage:
+    python dev_tools/color_kernel_benchmark.py <screenshot>
+    Screenshot should be 1280x720, a noise image is used if not given.
+"""
+import os
+import sys
+import timeit
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import cv2
+import numpy as np
+
+from module.base.utils import *
+
+CROPS = {
+    'screenshot': (0, 0, 1280, 720),
+    'ocr': (480, 320, 800, 360),
+    'button': (1080, 600, 1200, 645),
+    'hp_bar': (35, 206, 101, 210),
+}
+# Buttons in a 5x4 grid
+GRID = [(400 + x * 90, 200 + y * 80, 480 + x * 90, 270 + y * 80) for x in range(5) for y in range(4)]
+COLOR = (239, 32, 33)
+
+
+def color_similarity_2d_ref(image, color):
+    diff = cv2.subtract(image, (*color, 0))
+    r, g, b = cv2.split(diff)
+    cv2.max(r, g, dst=r)
+    cv2.max(r, b, dst=r)
+    positive = r
+    cv2.subtract((*color, 0), image, dst=diff)
+    r, g, b = cv2.split(diff)
+    cv2.max(r, g, dst=r)
+    cv2.max(r, b, dst=r)
+    negative = r
+    cv2.add(positive, negative, dst=positive)
+    cv2.subtract(255, positive, dst=positive)
+    return positive
+
+
+def image_color_count_ref(image, color, threshold=221, count=50):
+    mask = color_similarity_2d_ref(image, color=color)
+    cv2.inRange(mask, threshold, 255, dst=mask)
+    return cv2.countNonZero(mask) > count
+
+
+def extract_letters_ref(image, letter=(255, 255, 255), threshold=128):
+    diff = cv2.subtract(image, (*letter, 0))
+    r, g, b = cv2.split(diff)
+    cv2.max(r, g, dst=r)
+    cv2.max(r, b, dst=r)
+    positive = r
+    cv2.subtract((*letter, 0), image, dst=diff)
+    r, g, b = cv2.split(diff)
+    cv2.max(r, g, dst=r)
+    cv2.max(r, b, dst=r)
+    cv2.add(positive, r, dst=positive)
+    if threshold != 255:
+        cv2.convertScaleAbs(positive, alpha=255.0 / threshold, dst=positive)
+    return positive
+
+
+def get_bbox_ref(image, threshold=0):
+    mask = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY, dst=mask)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return None
+    rects = [cv2.boundingRect(contour) for contour in contours]
+    return (min(x for x, _, _, _ in rects), min(y for _, y, _, _ in rects),
+            max(x + w for x, _, w, _ in rects), max(y + h for _, y, _, h in rects))
+
+
+def get_bbox_new(image, threshold=0):
+    try:
+        return get_bbox(image, threshold=threshold)
+    except ImageNotSupported:
+        return None
+
+
+def color_bar_percentage_ref(image, area, prev_color, reverse=False, starter=0, threshold=30):
+    image = crop(image, area, copy=False)
+    image = image[:, ::-1, :] if reverse else image
+    length = image.shape[1]
+    prev_index = starter
+    for _ in range(1280):
+        bar = color_similarity_2d_ref(image, color=prev_color)
+        index = np.where(np.any(bar > 255 - threshold, axis=0))[0]
+        if not index.size:
+            return prev_index / length
+        index = index[-1]
+        if index <= prev_index:
+            return index / length
+        prev_index = index
+        left = max(prev_index - 5, 0)
+        mask = np.where(bar[:, left:prev_index + 1] > 255 - threshold)
+        prev_color = np.mean(image[:, left:prev_index + 1][mask], axis=0)
+    return 0.
+
+
+def cases(image):
+    """
+    Yields:
+        str: Name
+        callable: Previous implementation
+        callable: Current implementation
+    """
+    for name, area in CROPS.items():
+        region = crop(image, area, copy=False)
+        yield (f'color_similarity_2d {name}',
+               lambda: color_similarity_2d_ref(region, COLOR),
+               lambda: color_similarity_2d(region, COLOR))
+        yield (f'image_color_count {name}',
+               lambda: image_color_count_ref(region, COLOR),
+               lambda: image_color_count(region, COLOR))
+        yield (f'extract_letters {name}',
+               lambda: extract_letters_ref(region),
+               lambda: extract_letters(region))
+        yield (f'get_bbox {name}',
+               lambda: get_bbox_ref(region, threshold=128),
+               lambda: get_bbox_new(region, threshold=128))
+        yield (f'color_bar_percentage {name}',
+               lambda: color_bar_percentage_ref(image, area, prev_color=COLOR, starter=2),
+               lambda: color_bar_percentage(image, area, prev_color=COLOR, starter=2))
+    yield ('get_color grid',
+           lambda: [get_color(image, area) for area in GRID],
+           lambda: get_color_batch(image, GRID))
+    yield ('image_color_count grid',
+           lambda: [image_color_count_ref(crop(image, area, copy=False), COLOR) for area in GRID],
+           lambda: image_color_count_batch(image, GRID, COLOR))
+
+
+def same(a, b):
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+
+def benchmark(image):
+    print(f'{"Case":<40} {"Previous":>10} {"Current":>10} {"Speedup":>8}  Same')
+    for name, ref, new in cases(image):
+        number = 20 if 'screenshot' in name else 2000
+        t_ref = timeit.timeit(ref, number=number) / number
+        t_new = timeit.timeit(new, number=number) / number
+        print(f'{name:<40} {t_ref * 1e6:>8.1f}us {t_new * 1e6:>8.1f}us {t_ref / t_new:>7.2f}x  {same(ref(), new())}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        image = load_image(sys.argv[1])
+    else:
+        print('No screenshot given, use noise image')
+        image = np.random.default_rng(0).integers(0, 256, (720, 1280, 3), dtype=np.uint8)
+        image[200:520, 400:840] = COLOR
+    benchmark(image)
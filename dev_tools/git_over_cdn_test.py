@@ -0,0 +1,165 @@
+"""
+Test pack cache of `GitOverCdnClient` with a local HTTP server standing in for CDN.
+
+1. Create an upstream repo with 3 commits, and delta packs in the CDN layout:
+    /latest.json
+    /<latest>/<base>.zip, containing pack-<latest>.pack and pack-<latest>.idx
+2. Create checkouts at older commits, update them with a shared cache folder.
+3. Count pack downloads, and check if broken packs are rejected.
+
+Usage:
+    python dev_tools/git_over_cdn_test.py
+"""
+import http.server
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import zipfile
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+from deploy.git_over_cdn.client import GitOverCdnClient
+
+
+def git(*args, cwd, stdin=None):
+    return subprocess.run(['git', *args], cwd=cwd, input=stdin, check=True, capture_output=True).stdout
+
+
+def create_upstream(folder):
+    """
+    Returns:
+        list[str]: Commits, oldest first
+    """
+    os.makedirs(folder)
+    git('init', '-q', cwd=folder)
+    commits = []
+    for index in range(3):
+        with open(os.path.join(folder, f'file{index}.txt'), 'w') as f:
+            f.write(f'content {index}\n' * 100)
+        git('add', '-A', cwd=folder)
+        git('-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', f'Commit {index}', cwd=folder)
+        commits.append(git('rev-parse', 'HEAD', cwd=folder).decode().strip())
+    for index, commit in enumerate(commits):
+        git('branch', '-f', f'c{index}', commit, cwd=folder)
+    return commits
+
+
+def create_pack(upstream, cdn, latest, base, corrupt=False):
+    objects = git('rev-list', '--objects', latest, f'^{base}', cwd=upstream)
+    pack = git('pack-objects', '--stdout', cwd=upstream, stdin=objects)
+    tmp = os.path.join(cdn, 'tmp.pack')
+    with open(tmp, 'wb') as f:
+        f.write(pack)
+    git('index-pack', '-o', os.path.join(cdn, 'tmp.idx'), tmp, cwd=cdn)
+    if corrupt:
+        pack = bytearray(pack)
+        pack[len(pack) // 2] ^= 0xFF
+        pack = bytes(pack)
+    os.makedirs(os.path.join(cdn, latest), exist_ok=True)
+    with zipfile.ZipFile(os.path.join(cdn, latest, f'{base}.zip'), 'w') as zipped:
+        zipped.writestr(f'pack-{latest}.pack', pack)
+        with open(os.path.join(cdn, 'tmp.idx'), 'rb') as f:
+            zipped.writestr(f'pack-{latest}.idx', f.read())
+    os.remove(tmp)
+    os.remove(os.path.join(cdn, 'tmp.idx'))
+
+
+class CdnHandler(http.server.SimpleHTTPRequestHandler):
+    downloads = []
+
+    def do_GET(self):
+        if self.path.endswith('.zip'):
+            self.downloads.append(self.path)
+        return super().do_GET()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_cdn(cdn):
+    handler = lambda *args, **kwargs: CdnHandler(*args, directory=cdn, **kwargs)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_checkout(folder, upstream, branch):
+    os.makedirs(folder)
+    git('init', '-q', cwd=folder)
+    # Fetch from path transfers needed objects only, unlike clone which links all objects
+    git('fetch', '-q', upstream, f'{branch}:refs/remotes/origin/master', cwd=folder)
+    git('reset', '-q', '--hard', 'origin/master', cwd=folder)
+
+
+def update(folder, url, cache):
+    client = GitOverCdnClient(url=url, folder=folder, cache=cache)
+    cwd = os.getcwd()
+    try:
+        return client.update()
+    finally:
+        # git_command() changes working directory
+        os.chdir(cwd)
+
+
+def head(folder):
+    return git('rev-parse', 'HEAD', cwd=folder).decode().strip()
+
+
+def run(folder):
+    upstream = os.path.join(folder, 'upstream')
+    cdn = os.path.join(folder, 'cdn')
+    cache = os.path.join(folder, 'cache')
+    commits = create_upstream(upstream)
+    latest = commits[-1]
+    os.makedirs(cdn)
+    with open(os.path.join(cdn, 'latest.json'), 'w') as f:
+        json.dump({'commit': latest}, f)
+    create_pack(upstream, cdn, latest, commits[0])
+    create_pack(upstream, cdn, latest, commits[1], corrupt=True)
+    server = start_cdn(cdn)
+    url = f'http://127.0.0.1:{server.server_address[1]}'
+    results = []
+
+    def check(name, result):
+        print(f'{name}: {"PASS" if result else "FAIL"}')
+        results.append(bool(result))
+
+    create_checkout(os.path.join(folder, 'a'), upstream, 'c0')
+    check('Download pack', update(os.path.join(folder, 'a'), url, cache)
+          and head(os.path.join(folder, 'a')) == latest and len(CdnHandler.downloads) == 1)
+
+    create_checkout(os.path.join(folder, 'b'), upstream, 'c0')
+    check('Same commit uses cache', update(os.path.join(folder, 'b'), url, cache)
+          and head(os.path.join(folder, 'b')) == latest and len(CdnHandler.downloads) == 1)
+
+    # Pack to c1 on CDN is broken, but the cached pack from c0 contains everything c1 needs
+    create_checkout(os.path.join(folder, 'c'), upstream, 'c1')
+    check('Descendant commit uses cache', update(os.path.join(folder, 'c'), url, cache)
+          and head(os.path.join(folder, 'c')) == latest and len(CdnHandler.downloads) == 1)
+
+    create_checkout(os.path.join(folder, 'd'), upstream, 'c1')
+    check('Broken download is rejected', not update(os.path.join(folder, 'd'), url, cache=None)
+          and head(os.path.join(folder, 'd')) == commits[1] and len(CdnHandler.downloads) == 2)
+
+    file = os.path.join(cache, latest, f'{commits[0]}.pack')
+    with open(file, 'r+b') as f:
+        f.seek(os.path.getsize(file) // 2)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    create_checkout(os.path.join(folder, 'e'), upstream, 'c0')
+    check('Broken cache is replaced', update(os.path.join(folder, 'e'), url, cache)
+          and head(os.path.join(folder, 'e')) == latest and len(CdnHandler.downloads) == 3)
+
+    server.shutdown()
+    print(f'{sum(results)}/{len(results)} passed')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        run(folder)
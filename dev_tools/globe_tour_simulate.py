@@ -0,0 +1,114 @@
+"""
+Simulate siren stronghold searching on OpSi globe map, without device.
+Compare the swipes of searching nearest zone one by one, with the swipes of a planned tour from `GlobeTour`.
+Camera is assumed to stop exactly where it's swiped to.
+
+Usage:
+    python dev_tools/globe_tour_simulate.py
+"""
+import os
+import sys
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.base.utils import point_in_area, point_limit
+from module.config.config import AzurLaneConfig
+from module.os.globe_detection import GLOBE_CAMERA_AREA, GlobeDetection
+from module.os.globe_tour import GlobeTour
+from module.os.globe_zone import ZoneManager
+
+SIGHT = (20, 220, 980, 620)
+SWIPE_LIMIT = (620, 340)
+
+
+class Simulator:
+    def __init__(self):
+        self.config = AzurLaneConfig('template')
+        self.globe = GlobeDetection(self.config)
+        self.globe.load_globe_map()
+        self.zones = ZoneManager().zones
+        corners = [(SIGHT[0], SIGHT[1]), (SIGHT[2], SIGHT[1]), (SIGHT[2], SIGHT[3]), (SIGHT[0], SIGHT[3])]
+        self.tour = GlobeTour(self.globe.screen2globe(corners) - self.globe.homo_center,
+                              camera_area=GLOBE_CAMERA_AREA, swipe_multiply=self.config.OS_GLOBE_SWIPE_MULTIPLY)
+        self.camera = np.zeros(2)
+        self.swipes = 0
+        self.distance = 0.
+
+    def in_sight(self, zone):
+        point = self.globe.globe2screen([np.array(zone.location) - self.camera + self.globe.homo_center])[0]
+        return point_in_area(point, area=SIGHT)
+
+    def swipe_to(self, target):
+        vector = (np.array(target) - self.camera) / self.config.OS_GLOBE_SWIPE_MULTIPLY
+        swipe = np.min([np.abs(vector), SWIPE_LIMIT], axis=0) * np.sign(vector)
+        self.camera = self.camera + swipe * self.config.OS_GLOBE_SWIPE_MULTIPLY
+        self.swipes += 1
+        self.distance += np.linalg.norm(swipe)
+
+    def reset(self, camera):
+        self.camera = np.array(camera, dtype=float)
+        self.swipes = 0
+        self.distance = 0.
+
+    def nearest_first(self, zones):
+        """
+        Same as the old `GlobeCamera._find_siren_stronghold()`
+        """
+        while zones:
+            prev = self.zones.sort_by_camera_distance(self.camera)[0]
+            zone = zones.sort_by_camera_distance(prev.location)[0]
+            for _ in range(20):
+                if self.in_sight(zone):
+                    break
+                self.swipe_to(point_limit(zone.location, area=GLOBE_CAMERA_AREA))
+            zones = zones.delete(zones.filter(self.in_sight)).delete(zones.filter(lambda z: z == zone))
+
+    def planned(self, zones):
+        """
+        Same as `GlobeCamera.globe_scan()`
+        """
+        tour = self.tour.plan(zones.location, start=self.camera)
+        for camera, index in tour:
+            planned = [zones[i] for i in index]
+            for _ in range(5):
+                if all(self.in_sight(z) for z in planned):
+                    break
+                if np.linalg.norm((camera - self.camera) / self.config.OS_GLOBE_SWIPE_MULTIPLY) <= 25:
+                    break
+                self.swipe_to(camera)
+            zones = zones.delete(zones.filter(self.in_sight))
+        self.nearest_first(zones)
+        return len(tour)
+
+    def run(self):
+        print(f'{"region":<8}{"start":<8}{"zones":>6}{"nearest swipes":>16}{"tour swipes":>13}{"stops":>7}'
+              f'{"nearest dist":>14}{"tour dist":>11}')
+        total = [0, 0]
+        for region in [1, 2, 3, 4]:
+            zones = self.zones.select(region=region, is_port=False)
+            for start in self.zones.select(is_azur_port=True):
+                self.reset(point_limit(start.location, area=GLOBE_CAMERA_AREA))
+                self.nearest_first(zones)
+                nearest = (self.swipes, self.distance)
+
+                self.reset(point_limit(start.location, area=GLOBE_CAMERA_AREA))
+                stops = self.planned(zones)
+                planned = (self.swipes, self.distance)
+
+                total[0] += nearest[0]
+                total[1] += planned[0]
+                print(f'{region:<8}{start.zone_id:<8}{zones.count:>6}{nearest[0]:>16}{planned[0]:>13}{stops:>7}'
+                      f'{nearest[1]:>14.0f}{planned[1]:>11.0f}')
+        print(f'Total swipes, nearest first: {total[0]}, planned tour: {total[1]}')
+
+
+if __name__ == '__main__':
+    Simulator().run()
@@ -0,0 +1,72 @@
+"""
+Check if the fast tile search in `Homography` gives the same result as full image matching.
+
+Usage:
+    python dev_tools/homography_check.py <folder of map screenshots>
+"""
+import os
+import sys
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.config.config import AzurLaneConfig
+from module.exception import MapDetectionError
+from module.map_detection.homography import Homography
+
+
+def detect(homo, image, fast):
+    """
+    Returns:
+        np.ndarray: homo_loca, or None if failed
+        float: Time cost
+    """
+    homo.config.HOMO_FAST_SEARCH = fast
+    start = time.perf_counter()
+    try:
+        homo.load(image)
+    except MapDetectionError:
+        return None, time.perf_counter() - start
+    return np.array(homo.homo_loca, dtype=float), time.perf_counter() - start
+
+
+def check(folder):
+    config = AzurLaneConfig('template')
+    baseline = Homography(config)
+    fast = Homography(config)
+    files = sorted(os.path.join(folder, file) for file in os.listdir(folder) if file.endswith('.png'))
+    cost_base, cost_fast, max_diff, failed = 0., 0., 0., 0
+    for file in files:
+        image = load_image(file)
+        loca_base, t_base = detect(baseline, image, fast=False)
+        loca_fast, t_fast = detect(fast, image, fast=True)
+        cost_base += t_base
+        cost_fast += t_fast
+        if (loca_base is None) != (loca_fast is None):
+            failed += 1
+            print(f'{file}: baseline={loca_base}, fast={loca_fast}')
+            continue
+        if loca_base is None:
+            continue
+        tile = np.array(config.HOMO_TILE)
+        diff = np.abs((loca_fast - loca_base + tile / 2) % tile - tile / 2)
+        max_diff = max(max_diff, float(np.max(diff)))
+        if np.max(diff) > 1:
+            print(f'{file}: baseline={loca_base}, fast={loca_fast}')
+
+    n = max(len(files), 1)
+    print(f'{len(files)} images, {failed} disagreements on success, max homo_loca difference: {max_diff:.2f}px')
+    print(f'Full matching: {cost_base / n * 1000:.1f}ms, fast search: {cost_fast / n * 1000:.1f}ms per image')
+
+
+if __name__ == '__main__':
+    check(sys.argv[1] if len(sys.argv) > 1 else './screenshots/map')
@@ -0,0 +1,147 @@
+"""
+Check if `color_bar_percentage_batch()` gives the same HP as `color_bar_percentage()`, and compare the time cost.
+
+Bars measured on each frame:
+    6 HP bars in campaign, with red and green color, as `HPBalancer.hp_get()` does.
+    Attacker and defender HP bars in exercise, both layouts, as `HpDaemon._at_low_hp()` does.
+
+Exercise HP bars in ./assets/<server>/exercise are cropped from recorded screenshots,
+they are used if no screenshot folder is given, attacker and defender bars of the same layout are put on one frame.
+Campaign bars are not in assets, measure them on your own combat screenshots.
+
+Usage:
+    python dev_tools/hp_bar_benchmark.py <folder of combat screenshots>
+    python dev_tools/hp_bar_benchmark.py
+"""
+import os
+import sys
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.base.button import ButtonGrid
+from module.base.utils import color_bar_percentage, color_bar_percentage_batch, load_image
+from module.combat.hp_balancer import HPBalancer
+from module.exercise.assets import *
+
+# Same as `HPBalancer._hp_grid()` on CN
+HP_GRID = ButtonGrid(origin=(35, 206), delta=(0, 100), button_shape=(66, 4), grid_shape=(1, 6))
+EXERCISE_COLOR = (239, 32, 33)
+
+
+def campaign_loop(image):
+    areas = [button.area for button in HP_GRID.buttons]
+    return [max(
+        color_bar_percentage(image, area=area, prev_color=HPBalancer.COLOR_HP_RED),
+        color_bar_percentage(image, area=area, prev_color=HPBalancer.COLOR_HP_GREEN)
+    ) for area in areas]
+
+
+def campaign_batch(image):
+    areas = [button.area for button in HP_GRID.buttons]
+    data = color_bar_percentage_batch(
+        image, areas=areas * 2, prev_color=[HPBalancer.COLOR_HP_RED] * 6 + [HPBalancer.COLOR_HP_GREEN] * 6)
+    return np.maximum(data[:6], data[6:]).tolist()
+
+
+def exercise_loop(image):
+    return [
+        color_bar_percentage(image, ATTACKER_HP_AREA.area, prev_color=EXERCISE_COLOR, reverse=True, starter=2),
+        color_bar_percentage(image, DEFENDER_HP_AREA.area, prev_color=EXERCISE_COLOR, reverse=False, starter=2),
+        color_bar_percentage(image, ATTACKER_HP_AREA_New.area, prev_color=EXERCISE_COLOR, reverse=True, starter=2),
+        color_bar_percentage(image, DEFENDER_HP_AREA_New.area, prev_color=EXERCISE_COLOR, reverse=True, starter=2),
+    ]
+
+
+def exercise_batch(image):
+    return np.concatenate([
+        color_bar_percentage_batch(image, [ATTACKER_HP_AREA.area, DEFENDER_HP_AREA.area],
+                                   prev_color=EXERCISE_COLOR, reverse=[True, False], starter=2),
+        color_bar_percentage_batch(image, [ATTACKER_HP_AREA_New.area, DEFENDER_HP_AREA_New.area],
+                                   prev_color=EXERCISE_COLOR, reverse=True, starter=2),
+    ]).tolist()
+
+
+def measure(func, image, repeat):
+    """
+    Returns:
+        list[float]: HP
+        float: Time cost of one call
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(image)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def folder_frames(folder):
+    """
+    Yields:
+        str: Name
+        np.ndarray: Screenshot
+    """
+    for file in sorted(os.listdir(folder)):
+        if file.endswith('.png'):
+            yield file, load_image(os.path.join(folder, file))
+
+
+def asset_frames():
+    """
+    Yields:
+        str: Name
+        np.ndarray: Exercise HP bars of recorded screenshots, others are black
+    """
+    for lang in ['cn', 'en', 'jp', 'tw']:
+        folder = f'./assets/{lang}/exercise'
+        for suffix in ['', '_New']:
+            attacker = load_image(os.path.join(folder, f'ATTACKER_HP_AREA{suffix}.png'))
+            defender = load_image(os.path.join(folder, f'DEFENDER_HP_AREA{suffix}.png'))
+            yield f'{lang}{suffix}', np.maximum(attacker, defender)
+
+
+def benchmark(frames, campaign=True, repeat=20):
+    """
+    Args:
+        frames: Output of `folder_frames()` or `asset_frames()`
+        campaign (bool): If measure campaign bars.
+        repeat (int):
+    """
+    cases = [('exercise', exercise_loop, exercise_batch)]
+    if campaign:
+        cases.insert(0, ('campaign', campaign_loop, campaign_batch))
+    cost = {f'{name}_{method}': 0. for name, _, _ in cases for method in ['loop', 'batch']}
+    mismatch = 0
+    count = 0
+    for file, image in frames:
+        count += 1
+        for name, loop, batch in cases:
+            hp_loop, t_loop = measure(loop, image, repeat)
+            hp_batch, t_batch = measure(batch, image, repeat)
+            cost[f'{name}_loop'] += t_loop
+            cost[f'{name}_batch'] += t_batch
+            if hp_loop != hp_batch:
+                mismatch += 1
+                print(f'{file} {name}: loop={hp_loop}, batch={hp_batch}')
+
+    n = max(count, 1)
+    print(f'{count} images, {mismatch} mismatches')
+    for name, _, _ in cases:
+        t_loop, t_batch = cost[f'{name}_loop'] / n, cost[f'{name}_batch'] / n
+        print(f'{name}: loop {t_loop * 1000:.3f}ms, batch {t_batch * 1000:.3f}ms, '
+              f'{t_loop / max(t_batch, 1e-9):.1f}x per image')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        benchmark(folder_frames(sys.argv[1]))
+    else:
+        print('No screenshot folder given, use exercise HP bars in assets')
+        benchmark(asset_frames(), campaign=False)
@@ -0,0 +1,104 @@
+"""
+Report where startup time goes.
+
+Runs `python -X importtime` on the given statements in a fresh interpreter,
+then aggregates self time by top-level package and lists the slowest modules by cumulative time.
+
+Usage:
+    python dev_tools/import_time.py
+    python dev_tools/import_time.py "from alas import AzurLaneAutoScript" "from module.device.device import Device"
+"""
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+
+# Such as: "import time:       335 |       1544 |   module.base.utils"
+REGEX_IMPORT_TIME = re.compile(r'import time:\s*(\d+)\s*\|\s*(\d+)\s*\|\s*(\S+)')
+
+DEFAULT_STATEMENTS = [
+    'from alas import AzurLaneAutoScript',
+    'from module.device.device import Device',
+    'from module.ui.ui import UI',
+]
+
+
+def import_time(statement):
+    """
+    Args:
+        statement (str): Python code to run, such as 'from alas import AzurLaneAutoScript'
+
+    Returns:
+        list[tuple[str, int, int]]: (module, self_us, cumulative_us)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, encoding='utf-8', errors='replace'
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        res = REGEX_IMPORT_TIME.match(line)
+        if res:
+            rows.append((res.group(3), int(res.group(1)), int(res.group(2))))
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else f'Exit code {result.returncode}')
+    return rows
+
+
+def lazy_import_time(statement):
+    """
+    Args:
+        statement (str): Python code to run, such as 'from alas import AzurLaneAutoScript'
+
+    Returns:
+        dict: Key: module name deferred by `lazy_import()`. Value: seconds used to import it on first use.
+    """
+    code = f'{statement}\n' \
+           f'import json\n' \
+           f'from module.base.lazy import load_lazy_modules\n' \
+           f'print(json.dumps(load_lazy_modules()))'
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, encoding='utf-8', errors='replace'
+    )
+    if result.returncode != 0:
+        print(result.stderr.splitlines()[-1] if result.stderr else f'Exit code {result.returncode}')
+        return {}
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def report(statement, top=25):
+    rows = import_time(statement)
+    if not rows:
+        return
+    total = sum(row[1] for row in rows)
+    print(f'\n{statement}')
+    print(f'Total: {total / 1000:.0f}ms, {len(rows)} modules')
+
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    print('\nSelf time by package:')
+    for name, self_us in sorted(packages.items(), key=lambda x: -x[1])[:top]:
+        print(f'{self_us / 1000:>8.1f}ms {self_us / total:>6.1%}  {name}')
+
+    print('\nSlowest alas modules, cumulative:')
+    rows = [row for row in rows if row[0].split('.')[0] in ['module', 'alas', 'deploy', 'campaign']]
+    for name, _, cumulative in sorted(rows, key=lambda x: -x[2])[:top]:
+        print(f'{cumulative / 1000:>8.1f}ms  {name}')
+
+    lazy = lazy_import_time(statement)
+    if lazy:
+        print('\nDeferred by lazy_import(), paid on first use:')
+        for name, cost in sorted(lazy.items(), key=lambda x: -x[1]):
+            print(f'{cost * 1000:>8.1f}ms  {name}')
+
+
+if __name__ == '__main__':
+    for s in sys.argv[1:] or DEFAULT_STATEMENTS:
+        report(s)
@@ -0,0 +1,139 @@
+"""
+Check if batched `ItemTemplateMatcher` gives the same result as calling `cv2.matchTemplate()` on each template,
+and compare the time cost.
+
+Item images are taken from get_items screenshots if a screenshot folder is given,
+otherwise the template images themselves are used as item images.
+
+Usage:
+    python dev_tools/item_matcher_check.py <template folder> <folder of get_items screenshots>
+    python dev_tools/item_matcher_check.py ./assets/stats_basic
+"""
+import os
+import sys
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import cv2
+import numpy as np
+
+from module.base.utils import color_similar, crop, load_image
+from module.statistics.item import ItemGrid
+
+
+def candidates(grid, image):
+    """
+    Templates to try, in the order of `ItemGrid.match_template()`, after color prefilter.
+
+    Returns:
+        list[str]:
+    """
+    color = cv2.mean(crop(image, grid.template_area))[:3]
+    names = np.array(list(grid.templates.keys()))[np.argsort(list(grid.templates_hit.values()))][::-1]
+    names = [name for name in names if not name.isdigit()] + [name for name in names if name.isdigit()]
+    return [name for name in names if color_similar(color1=color, color2=grid.colors[name], threshold=30)]
+
+
+def match_loop(grid, image, names):
+    """
+    The old `ItemGrid.match_template()`, runs `cv2.matchTemplate()` on each template.
+
+    Returns:
+        str: Template name, or None
+    """
+    for name in names:
+        res = cv2.matchTemplate(image, grid.templates[name], cv2.TM_CCOEFF_NORMED)
+        _, sim, _, _ = cv2.minMaxLoc(res)
+        if sim > grid.similarity:
+            return name
+    return None
+
+
+def match_batch(grid, image, names):
+    return grid.matcher.match(image, {name: grid.templates[name] for name in names}, similarity=grid.similarity)
+
+
+def similarity_error(grid, image, names):
+    """
+    Returns:
+        float: Max difference between `ItemTemplateMatcher.similarity()` and `cv2.matchTemplate()`
+    """
+    if not names:
+        return 0.
+    batch = grid.matcher.similarity(image, {name: grid.templates[name] for name in names})
+    loop = [cv2.minMaxLoc(cv2.matchTemplate(image, grid.templates[name], cv2.TM_CCOEFF_NORMED))[1]
+            for name in names]
+    return float(np.max(np.abs(batch - np.array(loop))))
+
+
+def item_images(grid, template_folder, screenshot_folder=None):
+    """
+    Yields:
+        str: Source of the item image
+        np.ndarray: Item image
+    """
+    if screenshot_folder is None:
+        for file in sorted(os.listdir(template_folder)):
+            if file.endswith('.png'):
+                yield file, load_image(os.path.join(template_folder, file))
+        return
+
+    from module.statistics.get_items import GetItemsStatistics, ITEM_GROUP
+    stats = GetItemsStatistics()
+    for file in sorted(os.listdir(screenshot_folder)):
+        if not file.endswith('.png'):
+            continue
+        image = load_image(os.path.join(screenshot_folder, file))
+        try:
+            stats._stats_get_items_load(image)
+        except Exception as e:
+            print(f'{file}: {e}')
+            continue
+        grid.grids = ITEM_GROUP.grids
+        grid._load_image(image)
+        for index, item in enumerate(grid.items):
+            yield f'{file}:{index}', item.image
+
+
+def check(template_folder, screenshot_folder=None):
+    grid = ItemGrid(None, {})
+    grid.load_template_folder(template_folder)
+    images = list(item_images(grid, template_folder, screenshot_folder))
+    # Template ffts are prepared once in a run, don't count them
+    for _, image in images:
+        grid.matcher.similarity(image, grid.templates)
+    cost_loop, cost_batch, diff, count, error = 0., 0., 0, 0, 0.
+    for source, image in images:
+        names = candidates(grid, image)
+
+        start = time.perf_counter()
+        expected = match_loop(grid, image, names)
+        cost_loop += time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = match_batch(grid, image, names)
+        cost_batch += time.perf_counter() - start
+
+        count += 1
+        error = max(error, similarity_error(grid, image, names))
+        if result != expected:
+            diff += 1
+            print(f'{source}: batch={result}, loop={expected}')
+
+    n = max(count, 1)
+    print(f'{count} items, {len(grid.templates)} templates, {diff} differences, max similarity error {error:.2e}')
+    print(f'Batch: {cost_batch / n * 1000:.2f}ms per item, loop: {cost_loop / n * 1000:.2f}ms per item')
+
+
+if __name__ == '__main__':
+    check(
+        sys.argv[1] if len(sys.argv) > 1 else './assets/stats_basic',
+        sys.argv[2] if len(sys.argv) > 2 else None,
+    )
@@ -0,0 +1,85 @@
+"""
+Check if batched radar prediction `Radar.predict()` gives the same result as predicting grids one by one.
+
+Usage:
+    python dev_tools/radar_check.py <folder of OpSi screenshots>
+"""
+import os
+import sys
+import time
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.base.utils import load_image
+from module.os.radar import MASK_RADAR, Radar
+
+
+class Config:
+    MAP_HAS_SIREN = False
+
+
+ATTRS = ['is_enemy', 'is_resource', 'is_meowfficer', 'is_exclamation', 'is_port', 'is_question', 'is_archive',
+         'enemy_genre']
+
+
+def predict_per_grid(radar, image):
+    """
+    The old `Radar.predict()`, runs `RadarGrid.predict()` on each grid.
+
+    Returns:
+        dict: Key: grid location. Value: tuple of ATTRS
+    """
+    image = MASK_RADAR.apply(image)
+    for grid in radar:
+        grid.image = image
+        grid.reset()
+        grid.predict()
+    for port in [grid for grid in radar if grid.is_port]:
+        for grid in [grid for grid in radar if grid.is_question]:
+            if np.sum(np.abs(np.subtract(port.location, grid.location))) == 1:
+                grid.is_question = False
+    return {grid.location: tuple(grid.__getattribute__(attr) for attr in ATTRS) for grid in radar}
+
+
+def check(folder):
+    radar = Radar(config=Config())
+    files = [os.path.join(folder, file) for file in os.listdir(folder) if file.endswith('.png')]
+    cost_batch, cost_grid, diff = 0., 0., 0
+    for file in files:
+        image = load_image(file)
+
+        start = time.perf_counter()
+        radar.predict(image)
+        cost_batch += time.perf_counter() - start
+        batch = {grid.location: tuple(grid.__getattribute__(attr) for attr in ATTRS) for grid in radar}
+        selected = {attr: [grid.location for grid in radar.select(**{attr: True})] for attr in ATTRS[:-1]}
+
+        start = time.perf_counter()
+        expected = predict_per_grid(radar, image)
+        cost_grid += time.perf_counter() - start
+
+        for location, value in expected.items():
+            if batch[location] != value:
+                diff += 1
+                print(f'{file} {location}: batch={batch[location]}, per_grid={value}')
+        for attr, locations in selected.items():
+            truth = [location for location, value in expected.items() if value[ATTRS.index(attr)]]
+            if locations != truth:
+                diff += 1
+                print(f'{file} select({attr}=True): batch={locations}, per_grid={truth}')
+
+    n = max(len(files), 1)
+    print(f'{len(files)} images, {diff} differences')
+    print(f'Batch: {cost_batch / n * 1000:.2f}ms per image, per grid: {cost_grid / n * 1000:.2f}ms per image')
+
+
+if __name__ == '__main__':
+    check(sys.argv[1] if len(sys.argv) > 1 else './screenshots/os')
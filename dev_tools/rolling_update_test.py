@@ -0,0 +1,98 @@
+"""
+Test `RollingUpdate` with a local bare repo as update source, without GUI and alas instances.
+
+1. Clone current repo into a bare repo (upstream) and an install (alas).
+2. Push commits to upstream, fetch them in install.
+3. Check changed files, affected mods, staging, validation and applying.
+
+Usage:
+    python dev_tools/rolling_update_test.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+from module.logger import logger
+from module.webui.rolling_update import RollingUpdate, update_affect
+
+
+def git(*args, cwd):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True, text=True).stdout
+
+
+def commit(dev, file, text):
+    """
+    Append text to a file, commit and push to upstream.
+    """
+    with open(os.path.join(dev, file), 'a', encoding='utf-8') as f:
+        f.write(text)
+    git('add', file, cwd=dev)
+    git('-c', 'user.name=test', '-c', 'user.email=test@test', 'commit', '-q', '-m', f'Update {file}', cwd=dev)
+    git('push', '-q', 'origin', 'HEAD:master', cwd=dev)
+
+
+def check(name, result):
+    logger.info(f'{name}: {"PASS" if result else "FAIL"}')
+    return bool(result)
+
+
+def run(folder):
+    upstream = os.path.join(folder, 'upstream.git')
+    alas = os.path.join(folder, 'alas')
+    dev = os.path.join(folder, 'dev')
+    git('clone', '-q', '--bare', os.getcwd(), upstream, cwd=folder)
+    git('symbolic-ref', 'HEAD', 'refs/heads/master', cwd=upstream)
+    branch = git('rev-parse', '--abbrev-ref', 'HEAD', cwd=os.getcwd()).strip()
+    if branch != 'master':
+        git('branch', '-f', 'master', branch, cwd=upstream)
+    git('clone', '-q', '-b', 'master', upstream, alas, cwd=folder)
+    git('clone', '-q', '-b', 'master', upstream, dev, cwd=folder)
+    rolling = RollingUpdate(git='git', python=sys.executable, root=alas, source='origin', branch='master')
+    passed = []
+
+    logger.hr('Document only', 1)
+    commit(dev, 'README.md', '\n')
+    git('fetch', '-q', 'origin', 'master', cwd=alas)
+    new = rolling.revision(rolling.upstream)
+    files = rolling.changed_files(new)
+    affect = update_affect(files)
+    passed.append(check('Changed files', files == ['README.md']))
+    passed.append(check('No restart', not affect.full and not affect.mods))
+
+    logger.hr('Module change', 1)
+    commit(dev, 'module/base/utils.py', '\n# Rolling update test\n')
+    git('fetch', '-q', 'origin', 'master', cwd=alas)
+    new = rolling.revision(rolling.upstream)
+    files = rolling.changed_files(new)
+    affect = update_affect(files)
+    passed.append(check('Restart all', 'alas' in affect.mods and not affect.full))
+    rolling.stage(new)
+    passed.append(check('Staged', rolling.revision('HEAD') != new
+                        and git('rev-parse', 'HEAD', cwd=rolling.stage_folder).strip() == new))
+    # Smoke check needs all dependencies, it fails if the current python is not the one to run alas
+    logger.info(f'Validate: {rolling.validate()}')
+    rolling.apply(new, files)
+    rolling.cleanup()
+    passed.append(check('Applied', rolling.revision('HEAD') == new))
+    passed.append(check('Bytecode copied', any(
+        file.startswith('utils.') for file in os.listdir(os.path.join(alas, 'module/base/__pycache__')))))
+    passed.append(check('Stage removed', not os.path.exists(rolling.stage_folder)))
+
+    logger.hr('GUI change', 1)
+    commit(dev, 'module/webui/app.py', '\n')
+    git('fetch', '-q', 'origin', 'master', cwd=alas)
+    new, files, affect = rolling.prepare()
+    passed.append(check('Full update', affect.full and rolling.revision('HEAD') != new))
+
+    logger.hr('Result', 1)
+    logger.info(f'{sum(passed)}/{len(passed)} passed')
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        run(folder)
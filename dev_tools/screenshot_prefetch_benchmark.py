@@ -0,0 +1,99 @@
+"""
+Benchmark screenshot prefetch on simulated capture, analysis and click time, no device needed.
+
+Loops:
+    wait: screenshot and analyze, like waiting for a page to load
+    click: screenshot, analyze and click every iteration
+    mixed: click every 3 iterations
+
+Usage:
+    python dev_tools/screenshot_prefetch_benchmark.py
+"""
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+# Ensure running in Alas root folder
+os.chdir(os.path.join(os.path.dirname(__file__), '../'))
+sys.path.insert(0, os.getcwd())
+
+import module.config.server as server
+
+server.server = 'cn'  # Don't need to edit, it's used to avoid error.
+
+import numpy as np
+
+from module.device.screenshot import Screenshot
+
+INTERVAL = 0.1
+ANALYZE = 0.03
+CLICK = 0.02
+# Capture time of slow and fast screenshot methods, such as ADB and DroidCast_raw
+CAPTURE = [0.15, 0.04]
+ITERATION = 60
+
+
+class SimulatedScreenshot(Screenshot):
+    screenshot_method_override = ''
+    screenshot_queue = None
+
+    def __init__(self, prefetch, capture):
+        # Skip device connection
+        self.config = SimpleNamespace(
+            Emulator_ScreenshotMethod='ADB',
+            Emulator_ScreenshotDedithering=False,
+            Error_SaveError=False,
+            SCREENSHOT_PREFETCH=prefetch,
+            SCREENSHOT_ADAPTIVE_INTERVAL=False,
+        )
+        self.capture = capture
+        self.captured = 0
+        self.frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        self._screen_size_checked = True
+        self._screen_black_checked = True
+        self._screenshot_interval.limit = INTERVAL
+        self._screenshot_interval.clear()
+
+    @property
+    def screenshot_methods(self):
+        return {'ADB': self.simulated_capture}
+
+    def simulated_capture(self):
+        time.sleep(self.capture)
+        self.captured += 1
+        return self.frame
+
+    def check_screen_size(self):
+        return True
+
+    def check_screen_black(self):
+        return True
+
+    def click(self):
+        time.sleep(CLICK)
+        self.screenshot_after_control()
+
+
+def run(prefetch, capture, click_every):
+    device = SimulatedScreenshot(prefetch=prefetch, capture=capture)
+    start = time.perf_counter()
+    for index in range(ITERATION):
+        device.screenshot()
+        time.sleep(ANALYZE)
+        if click_every and index % click_every == 0:
+            device.click()
+    cost = (time.perf_counter() - start) / ITERATION * 1000
+    # Collect the last prefetch, so it doesn't run into the next loop
+    device.screenshot_prefetch_get()
+    return cost, device.captured
+
+
+if __name__ == '__main__':
+    for capture in CAPTURE:
+        for name, click_every in [('wait', 0), ('click', 1), ('mixed', 3)]:
+            off, off_captured = run(prefetch=False, capture=capture, click_every=click_every)
+            on, on_captured = run(prefetch=True, capture=capture, click_every=click_every)
+            print(f'capture={int(capture * 1000)}ms, loop={name}: '
+                  f'prefetch off {off:.1f}ms/iter ({off_captured} captures), '
+                  f'on {on:.1f}ms/iter ({on_captured} captures), {off / on:.2f}x')
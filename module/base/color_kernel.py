@@ -0,0 +1,133 @@
+"""
+Fused color kernels with reusable scratch buffers.
+
+Color primitives in `module.base.utils` are called thousands of times per task,
+most of the time on small crops, where allocating intermediate arrays costs as much as the calculation,
+and on full screenshots, where each new buffer of several MB costs page faults.
+Kernels here write intermediate results into thread local scratch buffers, which grow and never shrink.
+Buffers kept by each thread are limited to `SCRATCH_LIMIT` in total, they are released when the thread ends.
+Arrays returned to callers are new arrays, unless `dst` is given, so they are safe to keep.
+"""
+import threading
+
+import cv2
+import numpy as np
+
+_local = threading.local()
+# Max bytes of scratch buffers kept by each thread.
+# All kernels on a full 1280x720 screenshot keep about 14MB, kernels on crops keep much less.
+# Buffers beyond the limit are allocated on every call, which is 2x slower on full screenshots.
+SCRATCH_LIMIT = 16 * 1024 * 1024
+
+
+def scratch(name, shape, dtype=np.uint8):
+    """
+    Get a reusable buffer of current thread.
+    Buffer is not kept if buffers of current thread would exceed `SCRATCH_LIMIT`.
+
+    Args:
+        name (str): Buffers with different names don't overlap.
+        shape (tuple[int]):
+        dtype:
+
+    Returns:
+        np.ndarray: C-contiguous array, content is undefined.
+            It will be overwritten by the next call with the same name, so don't return it to callers.
+    """
+    buffers = getattr(_local, 'buffers', None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    size = 1
+    for length in shape:
+        size *= length
+    buffer = buffers.get(name)
+    if buffer is None or buffer.size < size or buffer.dtype != dtype:
+        buffer = np.empty(size, dtype=dtype)
+        kept = sum(b.nbytes for n, b in buffers.items() if n != name)
+        if kept + buffer.nbytes <= SCRATCH_LIMIT:
+            buffers[name] = buffer
+    return buffer[:size].reshape(shape)
+
+
+def scratch_clear():
+    """
+    Release scratch buffers of current thread.
+    """
+    _local.buffers = {}
+
+
+def color_distance(image, color, dst=None):
+    """
+    Max positive channel difference plus max negative channel difference, saturated to 255.
+    `color_similarity_2d()` is `255 - color_distance()`.
+
+    Positive difference goes to the top half of one buffer and negative difference goes to the bottom half,
+    so channel split and channel max are done once for both.
+
+    Args:
+        image (np.ndarray): Shape (height, width, 3).
+        color: (r, g, b)
+        dst (np.ndarray): Shape (height, width), uint8. A new array if None.
+
+    Returns:
+        np.ndarray: Shape (height, width), uint8.
+    """
+    height, width = image.shape[:2]
+    color = (*color, 0)
+    diff = scratch('diff', (height * 2, width, 3))
+    cv2.subtract(image, color, dst=diff[:height])
+    cv2.subtract(color, image, dst=diff[height:])
+    r, g, b = cv2.split(diff, list(scratch('channel', (3, height * 2, width))))
+    cv2.max(r, g, dst=r)
+    cv2.max(r, b, dst=r)
+    if dst is None:
+        dst = np.empty((height, width), dtype=np.uint8)
+    cv2.add(r[:height], r[height:], dst=dst)
+    return dst
+
+
+def color_count(image, color, distance):
+    """
+    Args:
+        image (np.ndarray): Shape (height, width, 3).
+        color: (r, g, b)
+        distance (int): Pixels with `color_distance() <= distance` are counted.
+
+    Returns:
+        int: Number of pixels.
+    """
+    mask = color_distance(image, color, dst=scratch('mask', image.shape[:2]))
+    cv2.threshold(mask, distance, 255, cv2.THRESH_BINARY_INV, dst=mask)
+    return cv2.countNonZero(mask)
+
+
+def content_bbox(image, threshold=0):
+    """
+    Get outbound box of pixels brighter than threshold.
+
+    Args:
+        image (np.ndarray): Shape (height, width) for grayscale, (height, width, 3) for RGB,
+            (height, width, 4) for RGBA.
+        threshold (int):
+
+    Returns:
+        tuple[int, int, int, int]: (x1, y1, x2, y2), or None if no content or image is not supported.
+    """
+    shape = image.shape
+    mask = scratch('bbox', shape[:2])
+    if len(shape) == 2:
+        _, mask = cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY, dst=mask)
+    elif shape[2] == 3:
+        mask = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY, dst=mask)
+        cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY, dst=mask)
+    elif shape[2] == 4:
+        mask = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY, dst=mask)
+        cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY, dst=mask)
+    else:
+        return None
+    # Bounding rect of a mask is the bounding rect of non-zero pixels,
+    # same as the union of bounding rects of all external contours
+    x, y, w, h = cv2.boundingRect(mask)
+    if not w or not h:
+        return None
+    return x, y, x + w, y + h
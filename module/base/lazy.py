@@ -0,0 +1,81 @@
+"""
+Lazy import of heavy dependencies.
+
+`scipy` takes hundreds of milliseconds to import, but most tasks never reach the code that uses it.
+Modules that need it do:
+    signal = lazy_import('scipy.signal')
+and the real import happens on first attribute access, such as `signal.find_peaks(...)`.
+
+Import time of every lazy module is recorded in `LAZY_IMPORT_TIME`,
+dev_tools/import_time.py reports it along with the import time of the whole startup.
+"""
+import importlib
+import threading
+import time
+import types
+
+# Key: module name. Value: seconds used to import it, or None if not imported yet
+LAZY_IMPORT_TIME = {}
+# Key: module name. Value: LazyModule, one proxy per module
+_lazy_modules = {}
+_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_lazy_module']
+        if module is not None:
+            return module
+        with _lock:
+            module = self.__dict__['_lazy_module']
+            if module is None:
+                start = time.perf_counter()
+                module = importlib.import_module(self.__name__)
+                LAZY_IMPORT_TIME[self.__name__] = time.perf_counter() - start
+                self.__dict__['_lazy_module'] = module
+        return module
+
+    def __getattr__(self, item):
+        # Only called if `item` not found in __dict__
+        return getattr(self._load(), item)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self.__dict__['_lazy_module'] is None:
+            return f"<lazy module '{self.__name__}' (not loaded)>"
+        return repr(self.__dict__['_lazy_module'])
+
+
+def lazy_import(name):
+    """
+    Args:
+        name (str): Absolute module name, such as 'scipy.signal'
+
+    Returns:
+        LazyModule: A module proxy that imports `name` on first attribute access.
+    """
+    with _lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = LazyModule(name)
+            _lazy_modules[name] = module
+            LAZY_IMPORT_TIME[name] = None
+    return module
+
+
+def load_lazy_modules():
+    """
+    Import all lazy modules that are not imported yet.
+
+    Returns:
+        dict: `LAZY_IMPORT_TIME`
+    """
+    for module in list(_lazy_modules.values()):
+        module._load()
+    return LAZY_IMPORT_TIME
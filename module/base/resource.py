@@ -99,6 +99,10 @@ def release_resources(next_task=''):
                 OCR_MODEL.close()
             except AttributeError:
                 pass
+    elif State.deploy_config.OcrSharedParams:
+        # Params are memory-mapped and shared among instances,
+        # keep models loaded to avoid another gen_network() and bind()
+        pass
     else:
         # Release only when using per-instance OCR
         from module.ocr.ocr import OCR_MODEL
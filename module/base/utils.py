@@ -5,6 +5,8 @@ import cv2
 import numpy as np
 from PIL import Image
 
+from module.base.color_kernel import color_count, color_distance, content_bbox, scratch
+
 REGEX_NODE = re.compile(r'(-?[A-Za-z]+)(-?\d+)')
 
 
@@ -791,6 +793,88 @@ def get_color(image, area):
     return color[:3]
 
 
+def _areas_union(image, areas):
+    """
+    Args:
+        image (np.ndarray):
+        areas (list[tuple]): Areas rounded to int.
+
+    Returns:
+        tuple[int, int, int, int]: Union of areas, or None if it's not worth calculating on the union,
+            because the union is much larger than the areas, or it's out of image, or some areas are empty.
+    """
+    if any(area[2] <= area[0] or area[3] <= area[1] for area in areas):
+        return None
+    x1 = min(area[0] for area in areas)
+    y1 = min(area[1] for area in areas)
+    x2 = max(area[2] for area in areas)
+    y2 = max(area[3] for area in areas)
+    height, width = image.shape[:2]
+    if x1 < 0 or y1 < 0 or x2 > width or y2 > height:
+        return None
+    total = sum((area[2] - area[0]) * (area[3] - area[1]) for area in areas)
+    if (x2 - x1) * (y2 - y1) > total * 2:
+        return None
+    return x1, y1, x2, y2
+
+
+def get_color_batch(image, areas):
+    """
+    Same as `get_color()` on multiple areas.
+
+    Args:
+        image (np.ndarray): Screenshot.
+        areas (list[tuple]):
+
+    Returns:
+        list[tuple]: (r, g, b) of each area.
+    """
+    if image_channel(image) != 3:
+        return [get_color(image, area) for area in areas]
+    # Areas inside image are sliced directly, others go through crop() for the black background
+    height, width = image.shape[:2]
+    colors = []
+    for area in areas:
+        x1, y1, x2, y2 = area
+        x1, y1, x2, y2 = round(x1), round(y1), round(x2), round(y2)
+        if 0 <= x1 < x2 <= width and 0 <= y1 < y2 <= height:
+            colors.append(cv2.mean(image[y1:y2, x1:x2])[:3])
+        else:
+            colors.append(get_color(image, area))
+    return colors
+
+
+def image_color_count_batch(image, areas, color, threshold=221, count=50):
+    """
+    Same as `image_color_count()` on multiple areas.
+    If areas are close to each other, like buttons in a grid, color distance is calculated once on their union.
+
+    Args:
+        image (np.ndarray): Screenshot.
+        areas (list[tuple]):
+        color (tuple): RGB.
+        threshold: 255 means colors are the same, the lower the worse.
+        count (int): Pixels count.
+
+    Returns:
+        list[bool]:
+    """
+    areas = [tuple(round(v) for v in area) for area in areas]
+    if not areas:
+        return []
+    union = _areas_union(image, areas)
+    if union is None:
+        return [image_color_count(crop(image, area, copy=False), color=color, threshold=threshold, count=count)
+                for area in areas]
+
+    x, y = union[:2]
+    region = crop(image, union, copy=False)
+    mask = color_distance(region, color, dst=scratch('count_batch', region.shape[:2]))
+    # similarity >= threshold is distance <= 255 - threshold
+    cv2.threshold(mask, 255 - threshold, 255, cv2.THRESH_BINARY_INV, dst=mask)
+    return [cv2.countNonZero(mask[y1 - y:y2 - y, x1 - x:x2 - x]) > count for x1, y1, x2, y2 in areas]
+
+
 class ImageNotSupported(Exception):
     """
     Raised if we can't perform image calculation on this image
@@ -816,47 +900,13 @@ def get_bbox(image, threshold=0):
         ImageNotSupported: if failed to get bbox
     """
     channel = image_channel(image)
-    # convert to grayscale
-    if channel == 3:
-        # RGB
-        mask = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
-        cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY, dst=mask)
-    elif channel == 0:
-        # grayscale
-        _, mask = cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY)
-    elif channel == 4:
-        # RGBA
-        mask = cv2.cvtColor(image, cv2.COLOR_RGBA2GRAY)
-        cv2.threshold(mask, threshold, 255, cv2.THRESH_BINARY, dst=mask)
-    else:
+    if channel not in [0, 3, 4]:
         raise ImageNotSupported(f'shape={image.shape}')
-
-    # find bbox
-    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-    min_y, min_x = mask.shape
-    max_x = 0
-    max_y = 0
+    bbox = content_bbox(image, threshold=threshold)
     # all black
-    if not contours:
+    if bbox is None:
         raise ImageNotSupported(f'Cannot get bbox from a pure black image')
-    for contour in contours:
-        # x, y, w, h
-        x1, y1, x2, y2 = cv2.boundingRect(contour)
-        x2 += x1
-        y2 += y1
-        if x1 < min_x:
-            min_x = x1
-        if y1 < min_y:
-            min_y = y1
-        if x2 > max_x:
-            max_x = x2
-        if y2 > max_y:
-            max_y = y2
-    if min_x < max_x and min_y < max_y:
-        return min_x, min_y, max_x, max_y
-    else:
-        # This shouldn't happen
-        raise ImageNotSupported(f'Empty bbox {(min_x, min_y, max_x, max_y)}')
+    return bbox
 
 
 def get_bbox_reversed(image, threshold=255):
@@ -1024,19 +1074,9 @@ def color_similarity_2d(image, color):
     # r, g, b = cv2.split(cv2.subtract((*color, 0), image))
     # negative = cv2.max(cv2.max(r, g), b)
     # return cv2.subtract(255, cv2.add(positive, negative))
-    diff = cv2.subtract(image, (*color, 0))
-    r, g, b = cv2.split(diff)
-    cv2.max(r, g, dst=r)
-    cv2.max(r, b, dst=r)
-    positive = r
-    cv2.subtract((*color, 0), image, dst=diff)
-    r, g, b = cv2.split(diff)
-    cv2.max(r, g, dst=r)
-    cv2.max(r, b, dst=r)
-    negative = r
-    cv2.add(positive, negative, dst=positive)
-    cv2.subtract(255, positive, dst=positive)
-    return positive
+    similarity = color_distance(image, color)
+    cv2.subtract(255, similarity, dst=similarity)
+    return similarity
 
 
 def image_color_count(image, color, threshold=221, count=50):
@@ -1050,10 +1090,8 @@ def image_color_count(image, color, threshold=221, count=50):
     Returns:
         bool:
     """
-    mask = color_similarity_2d(image, color=color)
-    cv2.inRange(mask, threshold, 255, dst=mask)
-    sum_ = cv2.countNonZero(mask)
-    return sum_ > count
+    # similarity >= threshold is distance <= 255 - threshold
+    return color_count(image, color, distance=255 - threshold) > count
 
 
 def extract_letters(image, letter=(255, 255, 255), threshold=128):
@@ -1072,20 +1110,10 @@ def extract_letters(image, letter=(255, 255, 255), threshold=128):
     # r, g, b = cv2.split(cv2.subtract((*letter, 0), image))
     # negative = cv2.max(cv2.max(r, g), b)
     # return cv2.multiply(cv2.add(positive, negative), 255.0 / threshold)
-    diff = cv2.subtract(image, (*letter, 0))
-    r, g, b = cv2.split(diff)
-    cv2.max(r, g, dst=r)
-    cv2.max(r, b, dst=r)
-    positive = r
-    cv2.subtract((*letter, 0), image, dst=diff)
-    r, g, b = cv2.split(diff)
-    cv2.max(r, g, dst=r)
-    cv2.max(r, b, dst=r)
-    negative = r
-    cv2.add(positive, negative, dst=positive)
+    distance = color_distance(image, letter)
     if threshold != 255:
-        cv2.convertScaleAbs(positive, alpha=255.0 / threshold, dst=positive)
-    return positive
+        cv2.convertScaleAbs(distance, alpha=255.0 / threshold, dst=distance)
+    return distance
 
 
 def extract_white_letters(image, threshold=128):
@@ -1202,9 +1230,11 @@ def color_bar_percentage(image, area, prev_color, reverse=False, starter=0, thre
     length = image.shape[1]
     prev_index = starter
 
+    # similarity > 255 - threshold is distance < threshold
+    distance = scratch('bar', image.shape[:2])
     for _ in range(1280):
-        bar = color_similarity_2d(image, color=prev_color)
-        index = np.where(np.any(bar > 255 - threshold, axis=0))[0]
+        bar = color_distance(image, color=prev_color, dst=distance) < threshold
+        index = np.where(np.any(bar, axis=0))[0]
         if not index.size:
             return prev_index / length
         else:
@@ -1213,12 +1243,109 @@ def color_bar_percentage(image, area, prev_color, reverse=False, starter=0, thre
             return index / length
         prev_index = index
 
-        prev_row = bar[:, prev_index] > 255 - threshold
+        prev_row = bar[:, prev_index]
         if not prev_row.size:
             return prev_index / length
         # Look back 5px to get average color
         left = max(prev_index - 5, 0)
-        mask = np.where(bar[:, left:prev_index + 1] > 255 - threshold)
+        mask = np.where(bar[:, left:prev_index + 1])
         prev_color = np.mean(image[:, left:prev_index + 1][mask], axis=0)
 
     return 0.
+
+
+def color_bar_percentage_batch(image, areas, prev_color, reverse=False, starter=0, threshold=30):
+    """
+    Same as `color_bar_percentage()` but measures multiple bars in one pass.
+    Bars are padded to the same shape and walked together, most operations are done once instead of N times.
+
+    Args:
+        image:
+        areas (list[tuple]):
+        prev_color: (r, g, b) for all bars, or a list of (r, g, b) for each bar.
+        reverse (bool, list[bool]): True if bar goes from right to left.
+        starter (int, list[int]):
+        threshold:
+
+    Returns:
+        np.ndarray: Shape (n,), float, 0 to 1 of each bar.
+    """
+    count = len(areas)
+    # Broadcast arguments to each bar
+    prev_color = np.array(prev_color, dtype=float) + np.zeros((count, 1))
+    reverse = np.array(reverse, dtype=bool) | np.zeros(count, dtype=bool)
+    prev_index = np.array(starter, dtype=int) + np.zeros(count, dtype=int)
+
+    crops = []
+    for area, rev in zip(areas, reverse):
+        bar = crop(image, area, copy=False)
+        bar = cv2.flip(bar, 1) if rev else bar
+        # Pixels are RGBA, so the color image below can be filled as uint32
+        crops.append(cv2.cvtColor(bar, cv2.COLOR_RGB2RGBA))
+    lengths = np.array([bar.shape[1] for bar in crops])
+    height = max(bar.shape[0] for bar in crops)
+    width = lengths.max()
+    bars = np.zeros((count, height, width, 4), dtype=np.uint8)
+    inside = None
+    if any(bar.shape[:2] != (height, width) for bar in crops):
+        # Pad bars on the end, padding is excluded from similar pixels
+        inside = np.zeros((count, height, width), dtype=bool)
+    for index, bar in enumerate(crops):
+        h, w = bar.shape[:2]
+        bars.view(np.uint32)[index, :h, :w] = bar.view(np.uint32)
+        if inside is not None:
+            inside[index, :h, :w] = True
+
+    result = np.zeros(count, dtype=float)
+    active = np.arange(count)
+    look_back = np.arange(-5, 1)
+    for _ in range(1280):
+        if not active.size:
+            return result
+        # Same as `color_similarity_2d()`, but bars are stacked vertically as one image,
+        # and subtracted by an image of their own colors, so each operation is done once for all bars.
+        # cv2.subtract() rounds float scalar half to even, np.rint() does the same.
+        color = np.full((active.size, 4), 255, dtype=np.uint8)
+        color[:, :3] = np.rint(prev_color[active])
+        color = np.repeat(color.view(np.uint32)[:, 0], height * width).view(np.uint8).reshape(-1, width, 4)
+        # Positive and negative difference in one buffer, like `color_distance()` does
+        stacked = bars.reshape(-1, width, 4)
+        size = stacked.shape[0]
+        diff = scratch('bar_diff', (size * 2, width, 4))
+        cv2.subtract(stacked, color, dst=diff[:size])
+        cv2.subtract(color, stacked, dst=diff[size:])
+        r, g, b, _ = cv2.split(diff, list(scratch('bar_channel', (4, size * 2, width))))
+        cv2.max(r, g, dst=r)
+        cv2.max(r, b, dst=r)
+        distance = cv2.add(r[:size], r[size:], dst=scratch('bar_distance', (size, width)))
+        mask = (distance < threshold).reshape(-1, height, width)
+        if inside is not None:
+            mask &= inside
+
+        column = mask.any(axis=1)
+        found = column.any(axis=1)
+        index = width - 1 - np.argmax(column[:, ::-1], axis=1)
+        prev = prev_index[active]
+        length = lengths[active]
+        result[active[~found]] = prev[~found] / length[~found]
+        stop = found & (index <= prev)
+        result[active[stop]] = index[stop] / length[stop]
+        forward = found & (index > prev)
+        if not forward.all():
+            active, index, mask = active[forward], index[forward], mask[forward]
+            bars = bars[forward]
+            inside = inside[forward] if inside is not None else None
+        prev_index[active] = index
+
+        # Look back 5px to get average color
+        window = index[:, None] + look_back
+        valid = window >= 0
+        window = np.maximum(window, 0)
+        rows = np.arange(active.size)[:, None]
+        pixel = bars[rows, :, window, :3]
+        similar = mask[rows, :, window] & valid[:, :, None]
+        total = (pixel * similar[:, :, :, None]).sum(axis=(1, 2), dtype=np.int64)
+        prev_color[active] = total / similar.sum(axis=(1, 2))[:, None]
+
+    result[active] = 0.
+    return result
@@ -1,5 +1,4 @@
 import copy
-import importlib
 import os
 import random
 
@@ -11,6 +10,7 @@ from module.config.config import AzurLaneConfig
 from module.exception import CampaignEnd, RequestHumanTakeover, ScriptEnd
 from module.handler.fast_forward import map_files, to_map_file_name
 from module.logger import logger
+from module.map.map_cache import load_map_module
 from module.notify import handle_notify
 from module.ui.page import page_campaign
 
@@ -47,7 +47,7 @@ class CampaignRun(CampaignEvent, ShopStatus):
             self.stage = name
 
         try:
-            self.module = importlib.import_module('.' + name, f'campaign.{folder}')
+            self.module = load_map_module(name, folder=folder)
         except ModuleNotFoundError:
             logger.warning(f'Map file not found: campaign.{folder}.{name}')
             if not os.path.exists(f'./campaign/{folder}'):
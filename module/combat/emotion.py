@@ -5,6 +5,7 @@ import numpy as np
 
 from module.base.decorator import cached_property
 from module.base.utils import random_normal_distribution_int
+from module.combat.emotion_planner import battle_record
 from module.config.config import AzurLaneConfig
 from module.exception import ScriptEnd, ScriptError, RequestHumanTakeover
 from module.logger import logger
@@ -125,10 +126,38 @@ class FleetEmotion:
         """
         return DIC_RECOVER_MAX[self.recover]
 
-    def update(self):
-        recover_count = int(int(datetime.now().timestamp()) // 360 - int(self.record.timestamp()) // 360)
+    def current_at(self, now):
+        """
+        Args:
+            now (datetime.datetime):
+
+        Returns:
+            int: Emotion value at `now`.
+        """
+        recover_count = int(int(now.timestamp()) // 360 - int(self.record.timestamp()) // 360)
         recover_count = max(recover_count, 0)
-        self.current = min(max(self.value, 0) + self.speed * recover_count, self.max)
+        return min(max(self.value, 0) + self.speed * recover_count, self.max)
+
+    def update(self):
+        self.current = self.current_at(datetime.now())
+
+    def recovered_at(self, current, expected_reduce, now):
+        """
+        Same as `get_recovered()` but doesn't check settings or log.
+
+        Args:
+            current (int): Emotion value at `now`.
+            expected_reduce (int):
+            now (datetime.datetime):
+
+        Returns:
+            datetime.datetime: When will emotion >= control limit.
+        """
+        if self.control == 'keep_exp_bonus':
+            expected_reduce = min(expected_reduce, 29)
+        recover_count = (self.limit + expected_reduce - current) // self.speed
+        recovered = (int(now.timestamp()) // 360 + recover_count + 1) * 360
+        return datetime.fromtimestamp(recovered)
 
     def get_recovered(self, expected_reduce=0):
         """
@@ -147,13 +176,10 @@ class FleetEmotion:
         # In 14-4 with 2X book, expected emotion reduce is 32, can't keep happy bonus (>120),
         # otherwise will infinite task delay
         if self.control == 'keep_exp_bonus' and expected_reduce >= 29:
-            expected_reduce = 29
             logger.info(f'Fleet {self.fleet} expected_reduce is limited to 29 '
                         f'when Emotion Control=\"Keep Happy Bonus\"')
 
-        recover_count = (self.limit + expected_reduce - self.current) // self.speed
-        recovered = (int(datetime.now().timestamp()) // 360 + recover_count + 1) * 360
-        return datetime.fromtimestamp(recovered)
+        return self.recovered_at(self.current, expected_reduce, datetime.now())
 
 
 class Emotion:
@@ -221,6 +247,8 @@ class Emotion:
             recovered (datetime): expected recover time
             delay (bool): if should delay or not
         """
+        if self.config.is_actual_task:
+            battle_record(self.config.config_name, self.config.task.command, battle)
         method = self.config.Fleet_FleetOrder
 
         if method == 'fleet1_mob_fleet2_boss':
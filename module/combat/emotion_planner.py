@@ -0,0 +1,216 @@
+"""
+Predict when campaign tasks can run without emotion control.
+
+`Emotion.check_reduce()` only knows a task has low emotion after the task starts,
+game client is started, UI is switched to campaign, and then the task is delayed.
+Here the same calculation runs on the config file, for all tasks with an `Emotion` group,
+so scheduler can skip tasks that will stall on emotion, and GUI can show when they will be ready.
+
+Battles of each run are known after entering the map, they are recorded by `Emotion._check_reduce()`.
+Tasks never run before use `EMOTION_PLANNER_BATTLE`, and they are not skipped by scheduler.
+Scheduler only skips tasks if `EMOTION_PLANNER` is enabled.
+"""
+import json
+import os
+from datetime import datetime, timedelta
+
+from deploy.atomic import atomic_read_text, atomic_write
+from module.config.deep import deep_get
+from module.logger import logger
+
+# Tasks that don't delay on low emotion
+NOT_DELAYED = ['GemsFarming']
+FLEET_ORDER = {
+    'fleet1_mob_fleet2_boss': lambda battle: (battle - 1, 1),
+    'fleet1_boss_fleet2_mob': lambda battle: (1, battle - 1),
+    'fleet1_all_fleet2_standby': lambda battle: (battle, 0),
+    'fleet1_standby_fleet2_all': lambda battle: (0, battle),
+}
+
+
+def battle_file(config_name):
+    return f'./log/emotion/{config_name}.json'
+
+
+def battle_load(config_name):
+    """
+    Returns:
+        dict: Key: task name. Value: battles on last run.
+    """
+    try:
+        content = atomic_read_text(battle_file(config_name))
+    except FileNotFoundError:
+        return {}
+    if not content:
+        return {}
+    try:
+        return json.loads(content)
+    except Exception as e:
+        logger.warning(f'Failed to load emotion planner data: {e}')
+        return {}
+
+
+def battle_record(config_name, command, battle):
+    """
+    Args:
+        config_name (str):
+        command (str): Task name.
+        battle (int): Battles in this campaign.
+    """
+    data = battle_load(config_name)
+    if data.get(command) == battle:
+        return
+    data[command] = battle
+    os.makedirs(os.path.dirname(battle_file(config_name)), exist_ok=True)
+    atomic_write(battle_file(config_name), json.dumps(data, indent=2))
+
+
+class TaskEmotionConfig:
+    """
+    Attributes that `FleetEmotion` needs, read from the Emotion group of any task.
+    """
+
+    def __init__(self, data, command):
+        self._data = data
+        self._command = command
+
+    def __getattr__(self, item):
+        if not item.startswith('Emotion_'):
+            raise AttributeError(item)
+        return deep_get(self._data, keys=f'{self._command}.Emotion.{item[8:]}')
+
+
+class EmotionPlan:
+    def __init__(self, command, next_run, recovered, battle, reduce, interval, observed):
+        """
+        Args:
+            command (str): Task name.
+            next_run (datetime): NextRun of task.
+            recovered (datetime): When will emotion of all fleets be enough for one run.
+            battle (int): Battles per run.
+            reduce (tuple[int]): Emotion reduce of each fleet per run.
+            interval (timedelta): Time to recover emotion of one run, if emotion is under control limit.
+            observed (bool): If battle is recorded from the last run, instead of estimated.
+        """
+        self.command = command
+        self.next_run = next_run
+        self.recovered = recovered
+        self.battle = battle
+        self.reduce = reduce
+        self.interval = interval
+        self.observed = observed
+
+    @property
+    def ready(self):
+        """
+        Returns:
+            datetime: When can task run at full efficiency.
+        """
+        return max(self.next_run, self.recovered)
+
+    @property
+    def stall(self):
+        """
+        Returns:
+            bool: If task will be delayed by emotion control once it's started.
+        """
+        return self.recovered > self.next_run
+
+    def __str__(self):
+        return f'{self.command} (ready: {self.ready}, emotion: {self.recovered}, battle: {self.battle})'
+
+    __repr__ = __str__
+
+
+class EmotionPlanner:
+    def __init__(self, config):
+        """
+        Args:
+            config (AzurLaneConfig):
+        """
+        self.config = config
+        self.battle = battle_load(config.config_name)
+
+    def plan(self, command, now=None):
+        """
+        Args:
+            command (str): Task name.
+            now (datetime):
+
+        Returns:
+            EmotionPlan: None if task doesn't calculate emotion.
+        """
+        from module.combat.emotion import FleetEmotion
+        data = self.config.data
+        if 'calculate' not in str(deep_get(data, keys=f'{command}.Emotion.Mode', default='')):
+            return None
+        if now is None:
+            now = datetime.now()
+
+        observed = command in self.battle
+        battle = self.battle.get(command, self.config.EMOTION_PLANNER_BATTLE)
+        order = deep_get(data, keys=f'{command}.Fleet.FleetOrder', default='fleet1_mob_fleet2_boss')
+        if order not in FLEET_ORDER:
+            return None
+        per_battle = 4 if deep_get(data, keys=f'{command}.Campaign.Use2xBook', default=False) else 2
+        reduce = tuple(b * per_battle for b in FLEET_ORDER[order](battle))
+
+        emotion = TaskEmotionConfig(data, command)
+        recovered = []
+        interval = timedelta(0)
+        try:
+            for index, expected in enumerate(reduce, start=1):
+                fleet = FleetEmotion(emotion, fleet=index)
+                if not isinstance(fleet.record, datetime):
+                    return None
+                if fleet.control == 'keep_exp_bonus' and fleet.recover == 'not_in_dormitory':
+                    # Invalid settings, task will request human takeover
+                    return None
+                recovered.append(fleet.recovered_at(fleet.current_at(now), expected, now))
+                if expected:
+                    interval = max(interval, timedelta(minutes=6 * -(-expected // fleet.speed)))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
+
+        next_run = deep_get(data, keys=f'{command}.Scheduler.NextRun')
+        if not isinstance(next_run, datetime):
+            next_run = now
+        return EmotionPlan(command=command, next_run=next_run, recovered=max(recovered), battle=battle,
+                           reduce=reduce, interval=interval, observed=observed)
+
+    def timeline(self, now=None):
+        """
+        Args:
+            now (datetime):
+
+        Returns:
+            list[EmotionPlan]: Plans of enabled tasks, sorted by ready time.
+        """
+        plans = []
+        for command, task in self.config.data.items():
+            if not deep_get(task, keys='Scheduler.Enable', default=False):
+                continue
+            if 'Emotion' not in task:
+                continue
+            plan = self.plan(command, now=now)
+            if plan is not None:
+                plans.append(plan)
+        return sorted(plans, key=lambda p: p.ready)
+
+    def deferred(self, command, now=None):
+        """
+        Args:
+            command (str): Task name.
+            now (datetime):
+
+        Returns:
+            datetime: When to run the task if it will stall on emotion, otherwise None.
+        """
+        if command in NOT_DELAYED or command not in self.battle:
+            return None
+        if now is None:
+            now = datetime.now()
+        plan = self.plan(command, now=now)
+        if plan is None or plan.recovered <= now:
+            return None
+        return plan.recovered
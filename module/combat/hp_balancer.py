@@ -52,20 +52,20 @@ class HPBalancer(ModuleBase):
         """
         self._hp_has_ship[self.fleet_current_index] = value
 
-    def _calculate_hp(self, area):
-        """Calculate hp according to color.
+    def _calculate_hp_all(self, areas):
+        """Calculate hp of multiple bars in one pass, as max of `color_bar_percentage()` in red and green.
 
         Args:
-            area (tuple):
+            areas (list[tuple]):
 
         Returns:
-            float: HP.
+            list[float]: HP.
         """
-        data = max(
-            color_bar_percentage(self.device.image, area=area, prev_color=self.COLOR_HP_RED),
-            color_bar_percentage(self.device.image, area=area, prev_color=self.COLOR_HP_GREEN)
-        )
-        return data
+        count = len(areas)
+        data = color_bar_percentage_batch(
+            self.device.image, areas=areas * 2,
+            prev_color=[self.COLOR_HP_RED] * count + [self.COLOR_HP_GREEN] * count)
+        return np.maximum(data[:count], data[count:]).tolist()
 
     def _hp_grid(self):
         # Location of six HP bar, according to respective server for campaign
@@ -92,7 +92,7 @@ class HPBalancer(ModuleBase):
             logger.info(f'HpControl_HpBalanceWeight {self.config.HpControl_HpBalanceWeight} is revised to {weight}')
             self.config.HpControl_HpBalanceWeight = weight
 
-        hp = [self._calculate_hp(button.area) for button in self._hp_grid().buttons]
+        hp = self._calculate_hp_all([button.area for button in self._hp_grid().buttons])
         weight = to_list(weight)
         scout = np.array(hp[3:]) * np.array(weight) / np.max(weight)
 
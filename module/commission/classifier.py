@@ -0,0 +1,212 @@
+"""
+Classify commission names into genres.
+
+Keyword servers (cn, en, tw) match keywords as substrings of the OCR result,
+all keywords are compiled into one Aho-Corasick automaton, so a name is scanned only once.
+Edit-distance server (jp) finds the nearest keyword under Levenshtein distance,
+keywords are stored in a BK-tree, so most of them are pruned by the triangle inequality.
+
+Results are cached per OCR string, commission list is scanned repeatedly with scrolling
+and most names show up again.
+"""
+from collections import deque
+
+from module.commission.project_data import dictionary_cn, dictionary_en, dictionary_jp, dictionary_tw
+
+
+class KeywordClassifier:
+    def __init__(self, dictionary):
+        """
+        Args:
+            dictionary (dict): Key: genre, value: list of keywords, such as `dictionary_cn`.
+                Genres and keywords that come first have higher priority.
+        """
+        # Trie nodes, each node is a dict of {char: node_index}
+        self.goto = [{}]
+        self.fail = [0]
+        # Keywords that end at each node, in (priority, genre)
+        self.output = [[]]
+
+        priority = 0
+        for genre, keywords in dictionary.items():
+            for keyword in keywords:
+                self._add(keyword, (priority, genre))
+                priority += 1
+        self._build()
+
+        self.cache = {}
+
+    def _add(self, keyword, value):
+        node = 0
+        for char in keyword:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append(value)
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, nxt in self.goto[node].items():
+                queue.append(nxt)
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[nxt] = self.goto[fail].get(char, 0)
+                # Keywords ending at the fail node also end here
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def _classify(self, string):
+        best = None
+        node = 0
+        for char in string:
+            while node and char not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(char, 0)
+            for value in self.output[node]:
+                if best is None or value < best:
+                    best = value
+        if best is None:
+            return '', 0.
+        return best[1], 1.
+
+    def classify(self, string):
+        """
+        Args:
+            string (str): Commission name, such as 'NYB要员护卫'.
+
+        Returns:
+            str: Commission genre, such as 'urgent_gem', or '' if unknown
+            float: Confidence, 1.0 if any keyword matched
+        """
+        try:
+            return self.cache[string]
+        except KeyError:
+            pass
+        result = self._classify(string)
+        self.cache[string] = result
+        return result
+
+
+class BKTree:
+    def __init__(self, distance):
+        """
+        Args:
+            distance (callable): Metric, receives 2 strings and returns int.
+        """
+        self.distance = distance
+        # Each node is [keyword, value, {distance: child}]
+        self.root = None
+
+    def add(self, keyword, value):
+        if self.root is None:
+            self.root = [keyword, value, {}]
+            return
+        node = self.root
+        while True:
+            d = self.distance(keyword, node[0])
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [keyword, value, {}]
+                return
+            node = child
+
+    def search(self, string, radius):
+        """
+        Args:
+            string (str):
+            radius (int): Max distance to include.
+
+        Returns:
+            list[tuple[int, str, Any]]: (distance, keyword, value)
+        """
+        if self.root is None:
+            return []
+        out = []
+        stack = [self.root]
+        while stack:
+            keyword, value, children = stack.pop()
+            d = self.distance(string, keyword)
+            if d <= radius:
+                out.append((d, keyword, value))
+            for child_distance, child in children.items():
+                if d - radius <= child_distance <= d + radius:
+                    stack.append(child)
+        return out
+
+
+class EditDistanceClassifier:
+    def __init__(self, dictionary, max_distance=2):
+        """
+        Args:
+            dictionary (dict): Key: genre, value: list of keywords, such as `dictionary_jp`.
+                If several keywords have the same distance, the one comes first wins.
+            max_distance (int): Names further than this from any keyword are unknown.
+        """
+        import jellyfish
+        self.tree = BKTree(jellyfish.levenshtein_distance)
+        self.max_distance = max_distance
+        priority = 0
+        for genre, keywords in dictionary.items():
+            for keyword in keywords:
+                self.tree.add(keyword, (priority, genre))
+                priority += 1
+
+        self.cache = {}
+
+    def _classify(self, string):
+        result = self.tree.search(string, radius=self.max_distance)
+        if not result:
+            return '', 0.
+        distance, keyword, (_, genre) = min(result, key=lambda row: (row[0], row[2][0]))
+        length = max(len(keyword), len(string), 1)
+        return genre, 1. - distance / length
+
+    def classify(self, string):
+        """
+        Args:
+            string (str): Commission name, such as '要人護衛'.
+
+        Returns:
+            str: Commission genre, such as 'urgent_gem', or '' if unknown
+            float: Confidence, 1 - distance / length
+        """
+        try:
+            return self.cache[string]
+        except KeyError:
+            pass
+        result = self._classify(string)
+        self.cache[string] = result
+        return result
+
+
+# Key: server. Value: classifier
+_classifiers = {}
+
+
+def get_commission_classifier(server):
+    """
+    Args:
+        server (str): cn, en, jp, tw
+
+    Returns:
+        KeywordClassifier | EditDistanceClassifier: Built once and shared in this process.
+    """
+    classifier = _classifiers.get(server)
+    if classifier is None:
+        if server == 'jp':
+            classifier = EditDistanceClassifier(dictionary_jp)
+        elif server == 'en':
+            classifier = KeywordClassifier(dictionary_en)
+        elif server == 'tw':
+            classifier = KeywordClassifier(dictionary_tw)
+        else:
+            classifier = KeywordClassifier(dictionary_cn)
+        _classifiers[server] = classifier
+    return classifier
@@ -1,8 +1,7 @@
 import copy
 from datetime import datetime, timedelta
 
-from scipy import signal
-
+from module.base.lazy import lazy_import
 from module.base.timer import Timer
 from module.base.utils import *
 from module.combat.assets import *
@@ -23,6 +22,8 @@ from module.ui.switch import Switch
 from module.ui.ui import UI
 from module.ui_white.assets import REWARD_1_WHITE, REWARD_GOTO_COMMISSION_WHITE
 
+signal = lazy_import('scipy.signal')
+
 COMMISSION_SWITCH = Switch('Commission_switch', is_selector=True)
 COMMISSION_SWITCH.add_state('daily', COMMISSION_DAILY)
 COMMISSION_SWITCH.add_state('urgent', COMMISSION_URGENT)
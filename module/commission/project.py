@@ -4,6 +4,7 @@ import module.config.server as server
 from module.base.decorator import Config
 from module.base.filter import Filter
 from module.base.utils import *
+from module.commission.classifier import get_commission_classifier
 from module.commission.project_data import *
 from module.logger import logger
 from module.ocr.ocr import Duration, Ocr
@@ -370,10 +371,9 @@ class Commission:
         # string = string.replace(' ', '').replace('-', '')
         if self.is_event_commission():
             return 'daily_event'
-        for key, value in dictionary_en.items():
-            for keyword in value:
-                if keyword in string:
-                    return key
+        genre, _ = get_commission_classifier('en').classify(string)
+        if genre:
+            return genre
 
         logger.warning(f'Name with unknown genre: {string}')
         self.valid = False
@@ -390,18 +390,10 @@ class Commission:
         """
         if self.is_event_commission():
             return 'daily_event'
-        import jellyfish
-        min_key = ''
-        min_distance = 100
         string = re.sub(r'[\x00-\x7F]', '', string)
-        for key, value in dictionary_jp.items():
-            for keyword in value:
-                distance = jellyfish.levenshtein_distance(keyword, string)
-                if distance < min_distance:
-                    min_key = key
-                    min_distance = distance
-        if min_distance < 3:
-            return min_key
+        genre, _ = get_commission_classifier('jp').classify(string)
+        if genre:
+            return genre
 
         logger.warning(f'Name with unknown genre: {string}')
         self.valid = False
@@ -418,10 +410,9 @@ class Commission:
         """
         if self.is_event_commission():
             return 'daily_event'
-        for key, value in dictionary_tw.items():
-            for keyword in value:
-                if keyword in string:
-                    return key
+        genre, _ = get_commission_classifier('tw').classify(string)
+        if genre:
+            return genre
 
         logger.warning(f'Name with unknown genre: {string}')
         self.valid = False
@@ -438,10 +429,9 @@ class Commission:
         """
         if self.is_event_commission():
             return 'daily_event'
-        for key, value in dictionary_cn.items():
-            for keyword in value:
-                if keyword in string:
-                    return key
+        genre, _ = get_commission_classifier('cn').classify(string)
+        if genre:
+            return genre
 
         logger.warning(f'Name with unknown genre: {string}')
         self.valid = False
@@ -220,6 +220,10 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
             else:
                 waiting.append(func)
 
+        if self.EMOTION_PLANNER and pending:
+            pending, deferred = self.emotion_defer(pending)
+            waiting += deferred
+
         f = Filter(regex=r"(.*)", attr=["command"])
         f.load(self.SCHEDULER_PRIORITY)
         if pending:
@@ -233,6 +237,39 @@ class AzurLaneConfig(ConfigUpdater, ManualConfig, GeneratedConfig, ConfigWatcher
         self.pending_task = pending
         self.waiting_task = waiting
 
+    def emotion_defer(self, pending):
+        """
+        Move tasks that will be delayed by emotion control once started to waiting,
+        with next_run set to when emotion is recovered.
+
+        Args:
+            pending (list[Function]):
+
+        Returns:
+            list[Function]: Pending tasks
+            list[Function]: Deferred tasks
+        """
+        from module.combat.emotion_planner import EmotionPlanner
+        planner = EmotionPlanner(self)
+        now = datetime.now()
+        remain, deferred = [], []
+        for func in pending:
+            recovered = planner.deferred(func.command, now=now)
+            if recovered is None:
+                remain.append(func)
+            else:
+                func.next_run = recovered
+                deferred.append(func)
+        return remain, deferred
+
+    def get_emotion_timeline(self):
+        """
+        Returns:
+            list[EmotionPlan]: When can tasks with emotion calculation run at full efficiency.
+        """
+        from module.combat.emotion_planner import EmotionPlanner
+        return EmotionPlanner(self).timeline()
+
     def get_next(self):
         """
         Returns:
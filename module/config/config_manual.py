@@ -89,6 +89,15 @@ class ManualConfig:
     LV32_TRIGGERED = False
     STOP_IF_REACH_LV32 = False
 
+    """
+    module.combat.emotion_planner
+    """
+    # Skip pending tasks that will be delayed by emotion control once started.
+    # Disabled by default, emotion timeline in GUI doesn't need this.
+    EMOTION_PLANNER = False
+    # Battles per run, for tasks that never run
+    EMOTION_PLANNER_BATTLE = 5
+
     """
     module.device
     """
@@ -114,6 +123,19 @@ class ManualConfig:
     MAATOUCH_FILEPATH_LOCAL = './bin/MaaTouch/maatouchsync'
     MAATOUCH_FILEPATH_REMOTE = '/data/local/tmp/maatouchsync'
 
+    # Capture the next screenshot on a worker thread while the current one is being analyzed.
+    # Prefetched frames are dropped after any click/swipe/drag, or if they are older than screenshot interval.
+    # Prefetch starts only after screenshots without device control in between, so click loops don't wait for stale frames.
+    SCREENSHOT_PREFETCH = False
+    # Adjust screenshot interval by screen change rate.
+    # Interval grows to the upper bound when screen is static,
+    # and drops to the lower bound within SCREENSHOT_ADAPTIVE_BOOST seconds after any device control.
+    SCREENSHOT_ADAPTIVE_INTERVAL = False
+    SCREENSHOT_ADAPTIVE_INTERVAL_RANGE = (0.1, 1.0)
+    SCREENSHOT_ADAPTIVE_BOOST = 1.0
+    # Mean absolute difference on a 64x36 gray thumbnail, above which screen is considered changed
+    SCREENSHOT_ADAPTIVE_THRESHOLD = 1.5
+
     """
     module.campaign.gems_farming
     """
@@ -242,6 +264,17 @@ class ManualConfig:
     HOMO_CENTER_THRESHOLD = 0.8
     HOMO_CORNER_THRESHOLD = 0.8
     HOMO_RECTANGLE_THRESHOLD = 10
+    # Search free tiles on half sized image first, then match around the tile lattice only.
+    # False to match on full image every time.
+    # Disabled by default, check results with dev_tools/homography_check.py on recorded map screenshots first.
+    HOMO_FAST_SEARCH = False
+    # Threshold on half sized image, lower than HOMO_CENTER_THRESHOLD because edges are blurred after resizing
+    HOMO_COARSE_THRESHOLD = 0.5
+    # Pixels to search around each tile on the lattice
+    HOMO_LATTICE_RADIUS = 4
+    # Reuse the tile lattice of last detection if difference of quarter sized images is less than this.
+    # Edges shifted by 1px have a difference of about 0.3
+    HOMO_LATTICE_STAY_DIFF = 0.1
 
     HOMO_EDGE_DETECT = True
     HOMO_EDGE_HOUGHLINES_THRESHOLD = 180
@@ -400,6 +433,23 @@ class ManualConfig:
     """
     EVENT_SHOP_IGNORE_DEADLINE = False
 
+    """
+    module.statistics.azurstats
+    """
+    # Drop records are added to spool and delivered by a background worker
+    DROP_SPOOL_FOLDER = './log/drop_spool'
+    DROP_SPOOL_BATCH = 10
+    DROP_SPOOL_INTERVAL = 10
+    # Retry failed records after 10s, 20s, 40s, ... at most 1h
+    DROP_SPOOL_BACKOFF = 10
+    DROP_SPOOL_BACKOFF_MAX = 3600
+    # Remove records that failed 10 times, and the oldest records if more than 20 are pending
+    # Pending records are raw images of a few MB, so spool size is bounded
+    DROP_SPOOL_ATTEMPT_MAX = 10
+    DROP_SPOOL_LIMIT = 20
+    # Azur Stats service is not running, set to True if it re-runs in the future
+    DROP_SPOOL_UPLOAD = False
+
     """
     module.war_archives
     """
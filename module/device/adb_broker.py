@@ -0,0 +1,268 @@
+"""
+A local broker between alas instances and the adb server.
+
+With many emulators on one host, every instance lists devices, brute-force connects
+and sets up forwards on its own, these requests hit the adb server all at once on startup.
+The broker listens on a local port and speaks the adb smart socket protocol,
+instances use it as if it were the adb server, so `Connection` works without changes.
+
+- `host:devices` and `host:devices-l` are answered from a short-lived cache,
+  concurrent requests share one upstream call.
+- Requests that change the state of a serial (connect, disconnect, forward) are serialised per serial.
+- Everything else, shell, sync, transport, forward sockets, is relayed to the adb server as-is.
+
+Enable `AdbBroker` in deploy settings, GUI starts the broker,
+instances connect to it if it's reachable, or connect to the adb server directly.
+"""
+import argparse
+import multiprocessing
+import re
+import socket
+import threading
+import time
+
+from module.logger import logger
+
+process: multiprocessing.Process = None
+
+# Such as 'host-serial:127.0.0.1:16384:forward:tcp:20000;tcp:7912'
+REGEX_HOST_SERIAL = re.compile(r'^host-serial:(.+?):(forward|killforward|killforward-all|reverse)')
+DEVICE_COMMANDS = ('host:devices', 'host:devices-l')
+
+
+def read_exactly(sock, length):
+    data = b''
+    while len(data) < length:
+        chunk = sock.recv(length - len(data))
+        if not chunk:
+            raise ConnectionResetError('Connection closed while reading')
+        data += chunk
+    return data
+
+
+def read_request(sock):
+    """
+    Returns:
+        str: A smart socket request, such as 'host:devices',
+            or None if client closed without sending anything, like `broker_available()` does.
+    """
+    head = sock.recv(4)
+    if not head:
+        return None
+    length = int(head + read_exactly(sock, 4 - len(head)), 16)
+    return read_exactly(sock, length).decode('utf-8', errors='replace')
+
+
+def encode_request(request):
+    data = request.encode('utf-8')
+    return b'%04x' % len(data) + data
+
+
+def relay(source, target):
+    """
+    Copy bytes from source to target until source closes.
+    """
+    try:
+        while True:
+            data = source.recv(65536)
+            if not data:
+                break
+            target.sendall(data)
+    except OSError:
+        pass
+    finally:
+        try:
+            target.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+
+
+class AdbBroker:
+    def __init__(self, port=22270, adb_host='127.0.0.1', adb_port=5037, devices_ttl=1.0):
+        """
+        Args:
+            port (int): Port to listen.
+            adb_host (str): Address of the real adb server
+            adb_port (int):
+            devices_ttl (float): Seconds to cache the result of `host:devices`
+        """
+        self.port = port
+        self.adb_address = (adb_host, adb_port)
+        self.devices_ttl = devices_ttl
+
+        # Key: request, such as 'host:devices'. Value: (time, response bytes)
+        self.devices_cache = {}
+        self.devices_lock = threading.Lock()
+        # Key: serial. Value: Lock
+        self.serial_locks = {}
+        self.serial_locks_lock = threading.Lock()
+
+        self.server = None
+        self.stats = {'requests': 0, 'devices_cached': 0, 'devices_upstream': 0}
+
+    def serial_lock(self, serial):
+        with self.serial_locks_lock:
+            lock = self.serial_locks.get(serial)
+            if lock is None:
+                lock = threading.Lock()
+                self.serial_locks[serial] = lock
+            return lock
+
+    def upstream(self):
+        return socket.create_connection(self.adb_address, timeout=10)
+
+    def invalidate_devices(self):
+        with self.devices_lock:
+            self.devices_cache.clear()
+
+    def _request_once(self, request):
+        """
+        Send a request to adb server and read until it closes.
+
+        Returns:
+            bytes: Raw response
+        """
+        with self.upstream() as conn:
+            conn.sendall(encode_request(request))
+            chunks = []
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    break
+                chunks.append(data)
+        return b''.join(chunks)
+
+    def handle_devices(self, client, request):
+        with self.devices_lock:
+            cached = self.devices_cache.get(request)
+            if cached is not None and time.time() - cached[0] < self.devices_ttl:
+                self.stats['devices_cached'] += 1
+                response = cached[1]
+            else:
+                self.stats['devices_upstream'] += 1
+                response = self._request_once(request)
+                if response.startswith(b'OKAY'):
+                    self.devices_cache[request] = (time.time(), response)
+        client.sendall(response)
+
+    def handle_relay(self, client, request):
+        upstream = self.upstream()
+        # Transport and shell connections can last for long
+        upstream.settimeout(None)
+        client.settimeout(None)
+        try:
+            upstream.sendall(encode_request(request))
+            thread = threading.Thread(target=relay, args=(client, upstream), daemon=True)
+            thread.start()
+            relay(upstream, client)
+            thread.join()
+        finally:
+            upstream.close()
+
+    def handle(self, client):
+        try:
+            client.settimeout(10)
+            request = read_request(client)
+            if request is None:
+                # A probe
+                return
+            self.stats['requests'] += 1
+
+            if request in DEVICE_COMMANDS:
+                self.handle_devices(client, request)
+                return
+
+            serial = None
+            if request.startswith('host:connect:'):
+                serial = request[len('host:connect:'):]
+            elif request.startswith('host:disconnect:'):
+                serial = request[len('host:disconnect:'):]
+            else:
+                res = REGEX_HOST_SERIAL.match(request)
+                if res:
+                    serial = res.group(1)
+
+            if serial is not None:
+                with self.serial_lock(serial):
+                    self.handle_relay(client, request)
+                if request.startswith(('host:connect:', 'host:disconnect:')):
+                    self.invalidate_devices()
+            elif request == 'host:kill':
+                logger.warning('AdbBroker: adb server is being killed by an instance')
+                self.handle_relay(client, request)
+                self.invalidate_devices()
+            else:
+                self.handle_relay(client, request)
+        except (ConnectionRefusedError, socket.timeout) as e:
+            # adb server not running, instances will start it
+            logger.warning(f'AdbBroker: Failed to reach adb server: {e}')
+        except (OSError, ValueError) as e:
+            logger.warning(f'AdbBroker: {e}')
+        finally:
+            client.close()
+
+    def serve_forever(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', self.port))
+        self.server.listen(64)
+        logger.info(f'AdbBroker listening on 127.0.0.1:{self.port}, adb server: {self.adb_address}')
+        while True:
+            try:
+                client, _ = self.server.accept()
+            except OSError:
+                # Server closed
+                break
+            threading.Thread(target=self.handle, args=(client,), daemon=True).start()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+            self.server = None
+
+
+def broker_available(port, timeout=0.5):
+    """
+    Returns:
+        bool: If there's a broker listening on `port`.
+            Connection is closed without a request, broker takes it as a probe.
+    """
+    try:
+        with socket.create_connection(('127.0.0.1', port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+def start_adb_broker(port=22270, adb_port=5037):
+    AdbBroker(port=port, adb_port=adb_port).serve_forever()
+
+
+def start_adb_broker_process(port=22270, adb_port=5037):
+    global process
+    if not alive():
+        process = multiprocessing.Process(target=start_adb_broker, args=(port, adb_port), daemon=True)
+        process.start()
+
+
+def stop_adb_broker_process():
+    global process
+    if alive():
+        process.kill()
+        process = None
+
+
+def alive() -> bool:
+    global process
+    if process is not None:
+        return process.is_alive()
+    else:
+        return False
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Alas adb broker')
+    parser.add_argument('--port', type=int, default=22270, help='Port to listen')
+    parser.add_argument('--adb-port', type=int, default=5037, help='Port of the adb server')
+    args, _ = parser.parse_known_args()
+    start_adb_broker(port=args.port, adb_port=args.adb_port)
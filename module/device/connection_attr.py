@@ -313,6 +313,16 @@ class ConnectionAttr:
             except ValueError:
                 logger.warning(f'Invalid environ variable ANDROID_ADB_SERVER_PORT={port}, using default port')
 
+        # Use adb broker if GUI started one
+        from module.webui.setting import State
+        if State.deploy_config.AdbBroker:
+            from module.device.adb_broker import broker_available
+            broker_port = State.deploy_config.AdbBrokerPort
+            if broker_available(broker_port):
+                port = broker_port
+            else:
+                logger.warning(f'AdbBroker is not running on port {broker_port}, connect adb server directly')
+
         logger.attr('AdbClient', f'AdbClient({host}, {port})')
         return AdbClient(host, port)
 
@@ -17,6 +17,7 @@ from module.config.utils import get_server_next_update
 from module.device.app_control import AppControl
 from module.device.control import Control
 from module.device.input import Input
+from module.device.method.minitouch import CommandBuilder
 from module.device.screenshot import Screenshot
 from module.exception import (EmulatorNotRunningError, GameNotRunningError, GameStuckError, GameTooManyClickError,
                               RequestHumanTakeover)
@@ -189,6 +190,8 @@ class Device(Screenshot, Control, AppControl, Input):
             np.ndarray:
         """
         self.stuck_record_check()
+        # Gestures sent without blocking, screenshot can be taken during the trailing delay
+        self.touch_gesture_wait(tail=CommandBuilder.DEFAULT_DELAY)
 
         try:
             super().screenshot()
@@ -216,6 +219,8 @@ class Device(Screenshot, Control, AppControl, Input):
             self._scrcpy_server_stop()
         if self.config.Emulator_ScreenshotMethod == 'nemu_ipc':
             self.nemu_ipc_release()
+        if self.config.Emulator_ScreenshotMethod == 'ADB_stream':
+            self.adb_stream_stop()
 
     def get_orientation(self):
         """
@@ -329,6 +334,7 @@ class Device(Screenshot, Control, AppControl, Input):
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
         super().app_start()
+        self.screenshot_after_control()
         self.stuck_record_clear()
         self.click_record_clear()
 
@@ -338,5 +344,6 @@ class Device(Screenshot, Control, AppControl, Input):
             logger.critical('Please enable Alas.Error.HandleError or manually login to AzurLane')
             raise RequestHumanTakeover
         super().app_stop()
+        self.screenshot_after_control()
         self.stuck_record_clear()
         self.click_record_clear()
@@ -1,17 +1,19 @@
 import re
+import socket
 import time
 from functools import wraps
 
 import cv2
 import numpy as np
+from adbutils import AdbTimeout
 from adbutils.errors import AdbError
 from lxml import etree
 
 from module.base.decorator import Config
 from module.config.server import DICT_PACKAGE_TO_ACTIVITY
 from module.device.connection import Connection
-from module.device.method.utils import (ImageTruncated, PackageNotInstalled, RETRY_TRIES, handle_adb_error,
-                                        handle_unknown_host_service, remove_prefix, retry_sleep)
+from module.device.method.utils import (AdbConnection, ImageTruncated, PackageNotInstalled, RETRY_TRIES,
+                                        handle_adb_error, handle_unknown_host_service, remove_prefix, retry_sleep)
 from module.exception import EmulatorNotRunningError, RequestHumanTakeover, ScriptError
 from module.logger import logger
 
@@ -117,6 +119,13 @@ def load_screencap(data):
 class Adb(Connection):
     __screenshot_method = [0, 1, 2]
     __screenshot_method_fixed = [0, 1, 2]
+    # Socket of the long-lived `screencap` shell in ADB_stream
+    _adb_stream: socket.socket = None
+    # Preallocated buffer receiving a whole raw frame, header included
+    _adb_stream_buffer: bytearray = None
+    _adb_stream_header = 12
+    # False if device can't keep a binary-safe shell
+    _adb_stream_available = True
 
     @staticmethod
     def __load_screenshot(screenshot, method):
@@ -188,6 +197,103 @@ class Adb(Connection):
 
         return load_screencap(data)
 
+    def adb_stream_init(self):
+        """
+        Start a long-lived shell that outputs a raw screencap each time a line is written to it.
+        The adb connection and the shell are set up once, `screencap` is still spawned on device for each frame.
+        Frames are raw RGBA so there's no PNG encoding on device.
+        """
+        self.adb_stream_stop()
+
+        # Before Android 7.0 (SDK 24), adb shell has no shell protocol v2,
+        # a shell that keeps reading stdin may run on a PTY which turns "\n" into "\r\n" in binary output.
+        if self.sdk_ver < 24:
+            logger.warning(f'ADB_stream is not supported on sdk_ver={self.sdk_ver}, fallback to ADB')
+            self._adb_stream_available = False
+            return
+
+        # Learn frame size from a one-shot screencap.
+        # Header is 12 bytes (width, height, format), Android >= 12 has an extra 4 bytes colorspace.
+        data = self.adb_shell(['screencap'], stream=True)
+        if len(data) < 500:
+            logger.warning(f'Unexpected screenshot: {data}')
+        width, height, _ = np.frombuffer(data[0:12], dtype=np.uint32)
+        header = len(data) - int(width * height * 4)
+        if header not in [12, 16]:
+            raise ImageTruncated(f'Unexpected screencap size {len(data)} for {width}x{height}')
+        logger.attr('AdbStream', f'{width}x{height}, header={header}')
+
+        stream = self.adb_shell('while read _; do screencap; done', stream=True, recvall=False)
+        if isinstance(stream, AdbConnection):
+            stream = stream.conn
+        stream.settimeout(10)
+        self._adb_stream = stream
+        self._adb_stream_buffer = bytearray(len(data))
+        self._adb_stream_header = header
+
+    def adb_stream_stop(self):
+        """
+        Close the screencap shell, device side exits on EOF of stdin.
+        """
+        if self._adb_stream is not None:
+            try:
+                self._adb_stream.close()
+            except Exception as e:
+                logger.warning(f'Failed to close adb stream: {e}')
+            self._adb_stream = None
+
+    def _adb_stream_read(self):
+        """
+        Returns:
+            np.ndarray: RGB image
+        """
+        stream = self._adb_stream
+        buffer = self._adb_stream_buffer
+        stream.sendall(b'\n')
+
+        view = memoryview(buffer)
+        size = len(buffer)
+        received = 0
+        try:
+            while received < size:
+                n = stream.recv_into(view[received:], size - received)
+                if not n:
+                    raise ImageTruncated('Screencap stream closed')
+                received += n
+        except socket.timeout:
+            raise AdbTimeout('adb read timeout')
+
+        width, height, _ = np.frombuffer(buffer, dtype=np.uint32, count=3)
+        header = self._adb_stream_header
+        if header + int(width * height * 4) != size:
+            # Shell warnings or rotated screen, re-learn frame size
+            raise ImageTruncated(f'Unexpected frame header in screencap stream: {width}x{height}')
+
+        raw = np.frombuffer(buffer, dtype=np.uint8, offset=header).reshape(height, width, 4)
+        # Output array is a new one, because `self.image` may be kept in `screenshot_deque`
+        image = np.empty((height, width, 3), dtype=np.uint8)
+        cv2.cvtColor(raw, cv2.COLOR_RGBA2RGB, dst=image)
+        return image
+
+    @retry
+    @Config.when(DEVICE_OVER_HTTP=False)
+    def screenshot_adb_stream(self):
+        if self._adb_stream is None and self._adb_stream_available:
+            self.adb_stream_init()
+        if not self._adb_stream_available:
+            return self.screenshot_adb()
+        try:
+            return self._adb_stream_read()
+        except Exception:
+            # Stream may have data left, restart it on the next trial
+            self.adb_stream_stop()
+            raise
+
+    @Config.when(DEVICE_OVER_HTTP=True)
+    def screenshot_adb_stream(self):
+        # No long-lived socket over http
+        return self.screenshot_adb()
+
     @retry
     def click_adb(self, x, y):
         start = time.time()
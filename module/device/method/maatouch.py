@@ -117,6 +117,17 @@ class MaatouchBuilder(CommandBuilder):
     def send_sync(self, mode=2):
         return self.device.maatouch_send_sync(builder=self, mode=mode)
 
+    def gap(self, mode=2):
+        """
+        Add the delay of a `send_sync()` into command stream,
+        and set inject mode to the last command of current batch, as `send_sync()` does.
+        """
+        for command in self.commands[::-1]:
+            if command.operation in ['r', 'd', 'm', 'u']:
+                command.mode = mode
+                break
+        return super().gap()
+
     def end(self):
         self.device.sleep(self.DEFAULT_DELAY)
 
@@ -355,13 +366,14 @@ class MaaTouch(Connection):
         points = insert_swipe(p0=p1, p3=p2)
         builder = self.maatouch_builder
 
+        # Batches are synced at once, separated by gap() instead of send_sync()
         builder.down(*points[0]).commit().wait(10)
-        builder.send_sync()
+        builder.gap()
 
         for point in points[1:]:
             builder.move(*point).wait(10)
         builder.commit()
-        builder.send_sync()
+        builder.gap()
 
         builder.up().commit()
         builder.send_sync()
@@ -374,15 +386,15 @@ class MaaTouch(Connection):
         builder = self.maatouch_builder
 
         builder.down(*points[0]).commit().wait(10)
-        builder.send_sync()
+        builder.gap()
 
         for point in points[1:]:
             builder.move(*point).commit().wait(10)
-        builder.send_sync()
+        builder.gap()
 
         builder.move(*p2).commit().wait(140)
         builder.move(*p2).commit().wait(140)
-        builder.send_sync()
+        builder.gap()
 
         builder.up().commit()
         builder.send_sync()
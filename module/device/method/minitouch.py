@@ -200,6 +200,33 @@ class Command:
         return json.dumps(out)
 
 
+class GestureHandle:
+    """
+    Completion handle of a gesture that has been written to the touch socket.
+    Commands are timestamped by `w <ms>` and executed by the touch server,
+    so the caller doesn't need to block while the gesture is running.
+    """
+
+    def __init__(self, duration):
+        """
+        Args:
+            duration (float): Seconds until the gesture finishes, including the trailing delay.
+        """
+        self.deadline = time.time() + duration
+
+    def remain(self):
+        return max(self.deadline - time.time(), 0.)
+
+    def wait(self, tail=0.):
+        """
+        Args:
+            tail (float): Return `tail` seconds before the gesture ends.
+        """
+        remain = self.deadline - tail - time.time()
+        if remain > 0:
+            time.sleep(remain)
+
+
 class CommandBuilder:
     """Build command str for minitouch.
 
@@ -316,6 +343,13 @@ class CommandBuilder:
         ))
         return self
 
+    def gap(self):
+        """
+        Add the delay of a `send()` into command stream,
+        so a gesture made of several batches can be sent at once, with the same timing on device.
+        """
+        return self.wait(int(self.DEFAULT_DELAY * 1000))
+
     def clear(self):
         """ clear current commands """
         self.commands = []
@@ -337,8 +371,16 @@ class CommandBuilder:
         self._check_empty(out)
         return out
 
-    def send(self):
-        return self.device.minitouch_send(builder=self)
+    def send(self, block=True):
+        """
+        Args:
+            block (bool): False to return once commands are written,
+                and get a GestureHandle to wait for the end of the gesture.
+
+        Returns:
+            GestureHandle: If not block.
+        """
+        return self.device.minitouch_send(builder=self, block=block)
 
     def _check_empty(self, text=None):
         """
@@ -468,6 +510,8 @@ class Minitouch(Connection):
     max_x: int
     max_y: int
     _minitouch_init_thread = None
+    # Gesture that is still running on device
+    _touch_gesture: GestureHandle = None
 
     @cached_property
     @retry
@@ -582,15 +626,45 @@ class Minitouch(Connection):
             )
         )
 
+    def touch_gesture_wait(self, tail=0.):
+        """
+        Wait until the gesture sent without blocking ends.
+
+        Args:
+            tail (float): Return `tail` seconds before the gesture ends.
+        """
+        gesture = self._touch_gesture
+        if gesture is None:
+            return
+        gesture.wait(tail=tail)
+        if tail <= 0:
+            self._touch_gesture = None
+
+    def _touch_gesture_start(self, builder: CommandBuilder, block=True):
+        """
+        Called after commands are written.
+
+        Returns:
+            GestureHandle: If not block.
+        """
+        duration = builder.delay / 1000 + builder.DEFAULT_DELAY
+        builder.clear()
+        if block:
+            time.sleep(duration)
+            return None
+        self._touch_gesture = GestureHandle(duration)
+        return self._touch_gesture
+
     @Config.when(DEVICE_OVER_HTTP=False)
-    def minitouch_send(self, builder: CommandBuilder):
+    def minitouch_send(self, builder: CommandBuilder, block=True):
+        # Commands after a running gesture should keep the same timing as if it was blocked
+        self.touch_gesture_wait()
         content = builder.to_minitouch()
         # logger.info("send operation: {}".format(content.replace("\n", "\\n")))
         byte_content = content.encode('utf-8')
         self._minitouch_client.sendall(byte_content)
         self._minitouch_client.recv(0)
-        time.sleep(self.minitouch_builder.delay / 1000 + builder.DEFAULT_DELAY)
-        builder.clear()
+        return self._touch_gesture_start(builder, block=block)
 
     @cached_property
     def _minitouch_loop(self):
@@ -651,7 +725,8 @@ class Minitouch(Connection):
         self._minitouch_ws = self._minitouch_loop_run(connect())
 
     @Config.when(DEVICE_OVER_HTTP=True)
-    def minitouch_send(self, builder: CommandBuilder):
+    def minitouch_send(self, builder: CommandBuilder, block=True):
+        self.touch_gesture_wait()
         content = builder.to_atx_agent()
 
         async def send():
@@ -660,15 +735,14 @@ class Minitouch(Connection):
                 await self._minitouch_ws.send(row)
 
         self._minitouch_loop_run(send())
-        time.sleep(builder.delay / 1000 + builder.DEFAULT_DELAY)
-        builder.clear()
+        return self._touch_gesture_start(builder, block=block)
 
     @retry
     def click_minitouch(self, x, y):
         builder = self.minitouch_builder
         builder.down(x, y).commit()
         builder.up().commit()
-        builder.send()
+        builder.send(block=False)
 
     @retry
     def long_click_minitouch(self, x, y, duration=1.0):
@@ -676,22 +750,23 @@ class Minitouch(Connection):
         builder = self.minitouch_builder
         builder.down(x, y).commit().wait(duration)
         builder.up().commit()
-        builder.send()
+        builder.send(block=False)
 
     @retry
     def swipe_minitouch(self, p1, p2):
         points = insert_swipe(p0=p1, p3=p2)
         builder = self.minitouch_builder
 
+        # Batches are sent at once, separated by gap() instead of send()
         builder.down(*points[0]).commit().wait(10)
-        builder.send()
+        builder.gap()
 
         for point in points[1:]:
             builder.move(*point).commit().wait(10)
-        builder.send()
+        builder.gap()
 
         builder.up().commit()
-        builder.send()
+        builder.send(block=False)
 
     @retry
     def drag_minitouch(self, p1, p2, point_random=(-10, -10, 10, 10)):
@@ -701,15 +776,15 @@ class Minitouch(Connection):
         builder = self.minitouch_builder
 
         builder.down(*points[0]).commit().wait(10)
-        builder.send()
+        builder.gap()
 
         for point in points[1:]:
             builder.move(*point).commit().wait(10)
-        builder.send()
+        builder.gap()
 
         builder.move(*p2).commit().wait(140)
         builder.move(*p2).commit().wait(140)
-        builder.send()
+        builder.gap()
 
         builder.up().commit()
-        builder.send()
+        builder.send(block=False)
@@ -20,6 +20,7 @@ from module.device.method.ascreencap import AScreenCap
 from module.device.method.droidcast import DroidCast
 from module.device.method.ldopengl import LDOpenGL
 from module.device.method.nemu_ipc import NemuIpc
+from module.device.method.pool import WORKER_POOL
 from module.device.method.scrcpy import Scrcpy
 from module.device.method.wsa import WSA
 from module.exception import RequestHumanTakeover, ScriptError
@@ -45,6 +46,22 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
     _minicap_uninstalled = False
     _screenshot_interval = Timer(0.1)
     _last_save_time = {}
+    # Bumped on every click/swipe/drag, prefetched frames from older generations are stale.
+    _screenshot_generation = 0
+    # (job, method_name, generation) of the frame being prefetched
+    _screenshot_prefetch = None
+    # Generation when the last screenshot was taken
+    _screenshot_prefetch_generation = -1
+    # Screenshots in a row without device control in between
+    _screenshot_prefetch_streak = 0
+    # Streak required to start prefetch, doubled on stale prefetch and halved on used prefetch
+    _screenshot_prefetch_need = 1
+    # Interval set by screenshot_interval_set(), adaptive interval is derived from it
+    _screenshot_interval_base = 0.1
+    # Screen is considered transitioning within this timer after any device control
+    _screenshot_interval_boost = Timer(1.0)
+    _screenshot_thumbnail = None
+    _screenshot_static_count = 0
     image: np.ndarray
 
     @cached_property
@@ -52,6 +69,7 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         return {
             'ADB': self.screenshot_adb,
             'ADB_nc': self.screenshot_adb_nc,
+            'ADB_stream': self.screenshot_adb_stream,
             'uiautomator2': self.screenshot_uiautomator2,
             'aScreenCap': self.screenshot_ascreencap,
             'aScreenCap_nc': self.screenshot_ascreencap_nc,
@@ -71,8 +89,12 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         Returns:
             np.ndarray:
         """
-        self._screenshot_interval.wait()
-        self._screenshot_interval.reset()
+        prefetched, waited = self.screenshot_prefetch_get()
+        if prefetched is None:
+            # Stale prefetch has waited the interval already, capture again right away
+            if not waited:
+                self._screenshot_interval.wait()
+            self._screenshot_interval.reset()
 
         for _ in range(2):
             if self.screenshot_method_override:
@@ -91,7 +113,10 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
                     logger.warning('截图队列已满，跳过本次抓图以避免编码开销')
                     continue
 
-            self.image = method()
+            if prefetched is not None:
+                self.image, prefetched = prefetched, None
+            else:
+                self.image = method()
 
             if self.config.Emulator_ScreenshotDedithering:
                 # This will take 40-60ms
@@ -115,8 +140,138 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
             else:
                 continue
 
+        self.screenshot_interval_adapt()
+        self.screenshot_prefetch_start()
         return self.image
 
+    @property
+    def screenshot_prefetch_enabled(self):
+        """
+        Returns:
+            bool: If the next frame should be captured while the current one is being analyzed.
+        """
+        if not self.config.SCREENSHOT_PREFETCH:
+            return False
+        if self.screenshot_method_override:
+            return False
+        # Streaming and shared memory methods are already fast, nothing to overlap
+        if self.config.Emulator_ScreenshotMethod in ['scrcpy', 'nemu_ipc', 'ldopengl']:
+            return False
+        return self._screen_size_checked and self._screen_black_checked
+
+    def _screenshot_prefetch_worker(self, method):
+        """
+        Runs on WORKER_POOL.
+
+        Returns:
+            tuple[float, np.ndarray]: Time when capture started, raw image.
+        """
+        self._screenshot_interval.wait()
+        self._screenshot_interval.reset()
+        start = time.time()
+        return start, method()
+
+    def screenshot_prefetch_start(self):
+        """
+        Start capturing the next frame on a worker thread.
+
+        Prefetch only starts after a few screenshots without device control in between.
+        In screenshot-click loops the prefetched frame would be stale,
+        and the next screenshot would have to wait for it before capturing again.
+        """
+        if self._screenshot_prefetch_generation == self._screenshot_generation:
+            self._screenshot_prefetch_streak += 1
+        else:
+            self._screenshot_prefetch_streak = 0
+        self._screenshot_prefetch_generation = self._screenshot_generation
+        if self._screenshot_prefetch_streak < self._screenshot_prefetch_need:
+            return
+        if not self.screenshot_prefetch_enabled:
+            return
+        name = self.config.Emulator_ScreenshotMethod
+        method = self.screenshot_methods.get(name, self.screenshot_adb)
+        job = WORKER_POOL.start_thread_soon(self._screenshot_prefetch_worker, method)
+        self._screenshot_prefetch = (job, name, self._screenshot_generation)
+
+    def screenshot_prefetch_get(self):
+        """
+        Collect the prefetched frame.
+        The ongoing capture is always waited, so screenshot methods never run concurrently.
+
+        Returns:
+            np.ndarray | None: Raw image, or None if there's no valid prefetched frame.
+            bool: If screenshot interval is already waited by the prefetch worker.
+        """
+        prefetch = self._screenshot_prefetch
+        if prefetch is None:
+            return None, False
+        self._screenshot_prefetch = None
+        called = time.time()
+        job, name, generation = prefetch
+        try:
+            start, image = job.get()
+        except Exception as e:
+            logger.warning(f'Screenshot prefetch failed: {e}')
+            return None, True
+
+        if generation != self._screenshot_generation:
+            # Device was controlled after capture started
+            self._screenshot_prefetch_need = min(self._screenshot_prefetch_need * 2, 8)
+            return None, True
+        if name != self.config.Emulator_ScreenshotMethod:
+            return None, True
+        if start < called - self._screenshot_interval.limit:
+            # Frame is older than what a synchronous capture would give,
+            # caller may have been sleeping or doing heavy work.
+            # Interval was reset long ago, waiting it costs nothing.
+            return None, False
+        self._screenshot_prefetch_need = max(self._screenshot_prefetch_need // 2, 1)
+        return image, True
+
+    def screenshot_after_control(self):
+        """
+        Mark prefetched frame as stale, and speed up screenshots while UI is transitioning.
+        Should be called after any device control.
+        """
+        self._screenshot_generation += 1
+        if self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            self._screenshot_interval_boost.limit = self.config.SCREENSHOT_ADAPTIVE_BOOST
+            self._screenshot_interval_boost.reset()
+            self._screenshot_static_count = 0
+            self._screenshot_interval.limit = min(
+                self._screenshot_interval_base, self.config.SCREENSHOT_ADAPTIVE_INTERVAL_RANGE[0])
+
+    def screenshot_interval_adapt(self):
+        """
+        Adjust screenshot interval by how fast screen is changing.
+        Back off during long static waits, such as combat auto, loading and wait_until_stable,
+        and go back to the configured interval as soon as screen changes.
+        """
+        if not self.config.SCREENSHOT_ADAPTIVE_INTERVAL:
+            return
+        # About 0.1ms on a 64x36 gray thumbnail
+        thumbnail = cv2.resize(self.image, (64, 36), interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_RGB2GRAY)
+        prev = self._screenshot_thumbnail
+        self._screenshot_thumbnail = thumbnail
+        if prev is None or prev.shape != thumbnail.shape:
+            return
+
+        lower, upper = self.config.SCREENSHOT_ADAPTIVE_INTERVAL_RANGE
+        base = self._screenshot_interval_base
+        if self._screenshot_interval_boost.started() and not self._screenshot_interval_boost.reached():
+            interval = min(base, lower)
+        elif cv2.absdiff(thumbnail, prev).mean() > self.config.SCREENSHOT_ADAPTIVE_THRESHOLD:
+            self._screenshot_static_count = 0
+            interval = base
+        else:
+            self._screenshot_static_count += 1
+            interval = self._screenshot_interval.limit
+            if self._screenshot_static_count >= 3:
+                interval = min(max(interval, base) * 1.25, max(upper, base))
+        self._screenshot_interval.limit = round(interval, 3)
+
     @property
     def has_cached_image(self):
         return hasattr(self, 'image') and self.image is not None
@@ -226,9 +381,11 @@ class Screenshot(Adb, WSA, DroidCast, AScreenCap, Scrcpy, NemuIpc, LDOpenGL):
         if self.config.Emulator_ScreenshotMethod == 'scrcpy':
             interval = 0.1
 
-        if interval != self._screenshot_interval.limit:
+        if interval != self._screenshot_interval_base:
             logger.info(f'Screenshot interval set to {interval}s')
-            self._screenshot_interval.limit = interval
+            self._screenshot_interval_base = interval
+            self._screenshot_static_count = 0
+        self._screenshot_interval.limit = interval
 
     def image_show(self, image=None):
         if image is None:
@@ -2,7 +2,7 @@
 # 它通过图像识别计算攻守双方的 HP 百分比，并在己方血量过低时触发相应逻辑以保护单局胜率或撤退。
 from module.base.base import ModuleBase
 from module.base.timer import Timer
-from module.base.utils import color_bar_percentage
+from module.base.utils import color_bar_percentage_batch
 from module.combat_ui.assets import *
 from module.exercise.assets import *
 from module.logger import logger
@@ -15,35 +15,27 @@ class HpDaemon(ModuleBase):
     low_hp_confirm_timer: Timer
 
     @staticmethod
-    def _calculate_hp(image, area, reverse=False, starter=2, prev_color=(239, 32, 33), threshold=30):
+    def _calculate_hp_pair(image, attacker, defender, defender_reverse=False,
+                           starter=2, prev_color=(239, 32, 33), threshold=30):
         """
+        Calculate attacker HP and defender HP in one pass, same as calling `color_bar_percentage()` on each.
+
         Args:
             image:
-            area:
-            reverse: True if HP is left align.
+            attacker (tuple): Area of attacker HP bar, always left align.
+            defender (tuple): Area of defender HP bar.
+            defender_reverse: True if defender HP is left align.
             starter:
             prev_color:
             threshold:
 
         Returns:
-            float: HP. 0 to 1.
+            float, float: Attacker HP and defender HP. 0 to 1.
         """
-        # bar = crop(image, area)
-        # length = bar.shape[1]
-        # bar = np.swapaxes(bar, 0, 1)
-        # bar = bar[::-1, :, :] if reverse else bar
-        # prev_index = 0
-        # for index, color in enumerate(bar):
-        #     if index < starter:
-        #         continue
-        #     mask = color_similar_1d(color, prev_color, threshold=30)
-        #     if np.any(mask):
-        #         prev_color = color[mask].mean(axis=0)
-        #         prev_index = index
-        #
-        # return prev_index / length
-        return color_bar_percentage(
-            image, area, prev_color=prev_color, starter=starter, reverse=reverse, threshold=threshold)
+        attacker_hp, defender_hp = color_bar_percentage_batch(
+            image, [attacker, defender], prev_color=prev_color, starter=starter,
+            reverse=[True, defender_reverse], threshold=threshold)
+        return float(attacker_hp), float(defender_hp)
 
     def _show_hp(self, low_hp_time=0.):
         """
@@ -61,8 +53,8 @@ class HpDaemon(ModuleBase):
 
     def _at_low_hp(self, image, pause=PAUSE):
         if pause == PAUSE:
-            self.attacker_hp = self._calculate_hp(image, area=ATTACKER_HP_AREA.area, reverse=True)
-            self.defender_hp = self._calculate_hp(image, area=DEFENDER_HP_AREA.area, reverse=False)
+            self.attacker_hp, self.defender_hp = self._calculate_hp_pair(
+                image, ATTACKER_HP_AREA.area, DEFENDER_HP_AREA.area)
         elif pause in [
             PAUSE_New,
             PAUSE_Iridescent_Fantasy,
@@ -79,12 +71,12 @@ class HpDaemon(ModuleBase):
             PAUSE_ShadowPuppetry,
             PAUSE_MaidCafe,
         ]:
-            self.attacker_hp = self._calculate_hp(image, area=ATTACKER_HP_AREA_New.area, reverse=True)
-            self.defender_hp = self._calculate_hp(image, area=DEFENDER_HP_AREA_New.area, reverse=True)
+            self.attacker_hp, self.defender_hp = self._calculate_hp_pair(
+                image, ATTACKER_HP_AREA_New.area, DEFENDER_HP_AREA_New.area, defender_reverse=True)
         else:
             logger.warning(f'_at_low_hp received unknown pause: {pause}')
-            self.attacker_hp = self._calculate_hp(image, area=ATTACKER_HP_AREA.area, reverse=True)
-            self.defender_hp = self._calculate_hp(image, area=DEFENDER_HP_AREA.area, reverse=False)
+            self.attacker_hp, self.defender_hp = self._calculate_hp_pair(
+                image, ATTACKER_HP_AREA.area, DEFENDER_HP_AREA.area)
 
         # Opponent died or HP bar get covered
         if self.defender_hp < 0.01:
@@ -1,7 +1,6 @@
-from scipy import signal
-
 from module.base.base import ModuleBase
 from module.base.button import Button
+from module.base.lazy import lazy_import
 from module.base.timer import Timer
 from module.base.utils import *
 from module.exception import GameNotRunningError
@@ -10,6 +9,8 @@ from module.logger import logger
 from module.os_handler.assets import CLICK_SAFE_AREA as OS_CLICK_SAFE_AREA
 from module.ui_white.assets import POPUP_CANCEL_WHITE, POPUP_CONFIRM_WHITE, POPUP_SINGLE_WHITE
 
+signal = lazy_import('scipy.signal')
+
 
 def info_letter_preprocess(image):
     """
@@ -4,13 +4,13 @@
 from typing import Union
 
 import numpy as np
-from scipy.signal import find_peaks
 from uiautomator2 import UiObject
 from uiautomator2.exceptions import XPathElementNotFoundError
 from uiautomator2.xpath import XPath, XPathSelector
 
 import module.config.server as server
 from module.base.button import Button
+from module.base.lazy import lazy_import
 from module.base.timer import Timer
 from module.base.utils import color_similarity_2d, crop, random_rectangle_point
 from module.handler.assets import *
@@ -20,6 +20,8 @@ from module.ui.assets import *
 from module.ui.page import page_campaign_menu
 from module.ui.ui import UI
 
+signal = lazy_import('scipy.signal')
+
 
 class LoginHandler(UI):
     def _handle_app_login(self):
@@ -279,7 +281,7 @@ class LoginHandler(UI):
             sims_height = np.mean(sims, axis=1)
             # pyplot.plot(sims_height, color='r')
             # pyplot.show()
-            peaks, __ = find_peaks(sims_height, height=225)
+            peaks, __ = signal.find_peaks(sims_height, height=225)
             if len(peaks) == 2:
                 peaks = (peaks[0] + peaks[1]) / 2
             start_pos = [(start_padding_results[2] + start_margin_results[2]) / 2, float(peaks)]
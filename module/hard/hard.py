@@ -1,10 +1,9 @@
-import importlib
-
 from campaign.campaign_hard.campaign_hard import Campaign
 from module.campaign.run import CampaignRun
 from module.handler.fast_forward import to_map_file_name
 from module.hard.assets import *
 from module.logger import logger
+from module.map.map_cache import load_map
 from module.ocr.ocr import Digit
 
 OCR_HARD_REMAIN = Digit(OCR_HARD_REMAIN, letter=(123, 227, 66), threshold=128, alphabet='0123')
@@ -29,8 +28,7 @@ class CampaignHard(CampaignRun):
 
         # Initial
         self.load_campaign(name='campaign_hard', folder='campaign_hard')  # Load campaign file
-        module = importlib.import_module('.' + name, 'campaign.campaign_main')  # Load map from normal mode.
-        self.campaign.MAP = module.MAP
+        self.campaign.MAP = load_map(name, folder='campaign_main')  # Load map from normal mode.
 
         # UI ensure
         self.device.screenshot()
@@ -1,7 +1,11 @@
+import atexit
 import datetime
 import logging
 import os
 import sys
+import threading
+from collections import deque
+from contextlib import ExitStack
 from typing import Callable, List
 
 from rich.console import Console, ConsoleOptions, ConsoleRenderable, NewLine
@@ -276,7 +280,170 @@ def _get_renderables(
     return renderables
 
 
+class AsyncLogWriter:
+    """
+    Move log formatting and disk I/O off the thread running the task.
+
+    Records are queued by the calling thread and handled by a background writer thread in batches,
+    a batch is written when it reaches `batch_size` records or every `interval` seconds.
+    Records >= ERROR and records with exception info are handled synchronously after flushing the queue,
+    so everything is written before GameStuckError, RequestHumanTakeover or a crash takes the process down.
+    """
+
+    def __init__(self, batch_size=64, interval=0.1, maxsize=10000):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.maxsize = maxsize
+
+        self.queue: "deque[logging.LogRecord]" = deque()
+        # Lock on handler calls, records from queue and synchronous records won't interleave
+        self.lock = threading.RLock()
+        self.notify = threading.Event()
+        self.stopped = False
+
+        # Counters
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._dropped_reported = 0
+
+        self.thread = threading.Thread(target=self._work, name='AsyncLogWriter', daemon=True)
+        self.thread.start()
+
+    def submit(self, record: logging.LogRecord):
+        """
+        Replacement of logger.callHandlers(), called on the logging thread.
+        """
+        # Resolve message now, args may be mutated after logging call returns
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.levelno >= logging.ERROR or record.exc_info or self.stopped:
+            self.flush()
+            with self.lock:
+                logging.Logger.callHandlers(logger, record)
+                self.written += 1
+            return
+
+        if len(self.queue) >= self.maxsize:
+            self.dropped += 1
+            return
+        self.queue.append(record)
+        if len(self.queue) >= self.batch_size:
+            self.notify.set()
+
+    def _write_batch(self):
+        """
+        Returns:
+            int: Number of records written
+        """
+        count = 0
+        with self.lock, ExitStack() as stack:
+            # Console buffers output until context exit, so file is written once per batch
+            for hdlr in logger.handlers:
+                if isinstance(hdlr, RichFileHandler):
+                    stack.enter_context(hdlr.console)
+            while count < self.batch_size:
+                try:
+                    record = self.queue.popleft()
+                except IndexError:
+                    break
+                logging.Logger.callHandlers(logger, record)
+                count += 1
+            if count:
+                self.written += count
+                self.batches += 1
+        return count
+
+    def _report_dropped(self):
+        dropped = self.dropped - self._dropped_reported
+        if dropped > 0:
+            self._dropped_reported = self.dropped
+            logger.warning(f'Log queue full, {dropped} records dropped')
+
+    def _work(self):
+        while not self.stopped:
+            self.notify.wait(timeout=self.interval)
+            self.notify.clear()
+            while self._write_batch():
+                pass
+            self._report_dropped()
+
+    def flush(self):
+        """
+        Write all queued records on the current thread.
+        """
+        with self.lock:
+            while self._write_batch():
+                pass
+
+    def stop(self):
+        # Called by both atexit and multiprocessing finalizer
+        if self.stopped:
+            return
+        self.stopped = True
+        self.notify.set()
+        self.flush()
+        self._report_dropped()
+        # Written synchronously, since writer is stopped
+        stats = self.stats()
+        logger.info(f'Log queue: written={stats["written"]}, batches={stats["batches"]}, '
+                    f'dropped={stats["dropped"]}, depth={stats["depth"]}')
+
+    def stats(self):
+        """
+        Returns:
+            dict: Queue depth and counters of current process
+        """
+        return {
+            'depth': len(self.queue),
+            'written': self.written,
+            'batches': self.batches,
+            'dropped': self.dropped,
+        }
+
+
+_async_writer: "AsyncLogWriter | None" = None
+
+
+def set_async_logger(batch_size=64, interval=0.1, maxsize=10000):
+    """
+    Opt-in asynchronous logging, handlers set by set_file_logger() and set_func_logger()
+    are called on a background writer thread.
+    """
+    global _async_writer
+    if _async_writer is not None:
+        return
+    _async_writer = AsyncLogWriter(batch_size=batch_size, interval=interval, maxsize=maxsize)
+    logger.callHandlers = _async_writer.submit
+    # atexit is not called in multiprocessing children, they run util finalizers instead
+    atexit.register(_async_writer.stop)
+    from multiprocessing import util
+    util.Finalize(None, _async_writer.stop, exitpriority=100)
+
+
+def flush():
+    """
+    Write all queued records, if asynchronous logging is enabled.
+    """
+    if _async_writer is not None:
+        _async_writer.flush()
+
+
+def log_queue_stats():
+    """
+    Returns:
+        dict: Queue depth, written, batches and dropped records, or empty dict if not using async logger.
+            The same counters are logged when the writer stops.
+    """
+    if _async_writer is not None:
+        return _async_writer.stats()
+    return {}
+
+
 def print(*objects: ConsoleRenderable, **kwargs):
+    # Renderables are printed directly, queued records should go first
+    flush()
     for hdlr in logger.handlers:
         if isinstance(hdlr, RichRenderableHandler):
             for renderable in _get_renderables(hdlr.console, *objects, **kwargs):
@@ -352,6 +519,9 @@ logger.attr = attr
 logger.attr_align = attr_align
 logger.set_file_logger = set_file_logger
 logger.set_func_logger = set_func_logger
+logger.set_async_logger = set_async_logger
+logger.flush = flush
+logger.log_queue_stats = log_queue_stats
 logger.rule = rule
 logger.print = print
 logger.log_file: str
@@ -27,6 +27,13 @@ def set_file_logger(
 def set_func_logger(
     func: Callable[[ConsoleRenderable], None],
 ) -> None: ...
+def set_async_logger(
+    batch_size: int = 64,
+    interval: float = 0.1,
+    maxsize: int = 10000,
+) -> None: ...
+def flush() -> None: ...
+def log_queue_stats() -> dict: ...
 
 class __logger(logging.Logger):
     def rule(
@@ -63,6 +70,14 @@ class __logger(logging.Logger):
         self,
         func: Callable[[ConsoleRenderable], None],
     ) -> None: ...
+    def set_async_logger(
+        self,
+        batch_size: int = 64,
+        interval: float = 0.1,
+        maxsize: int = 10000,
+    ) -> None: ...
+    def flush(self) -> None: ...
+    def log_queue_stats(self) -> dict: ...
     def print(
         self,
         *objects: ConsoleRenderable,
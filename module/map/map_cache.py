@@ -0,0 +1,389 @@
+"""
+Precompiled cache of campaign maps.
+
+A map file under `./campaign/<folder>` builds its `CampaignMap` from text on import,
+`shape`, `map_data`, `weight_data`, `spawn_data`, `land_based_data` and so on.
+Here the parsed `CampaignMap` objects are pickled into
+`./campaign/<folder>/__pycache__/map_cache.pickle`, one entry per map file, keyed by the hash of the map file.
+Loading a map from cache doesn't execute the module body.
+
+Map files also define `Campaign` and the grid globals its battle methods use, which can't be pickled.
+Each entry also stores the code of the map file without the statements that build `MAP`,
+`load_map_module()` runs that code on the cached `MAP`, so the text parsing is skipped.
+
+Cache entries are stale if map file changed, or if `CampaignMap` or `GridInfo` changed,
+stale entries fall back to import the module and get rebuilt.
+
+Build cache of all folders:
+    python -m module.map.map_cache
+"""
+import ast
+import hashlib
+import importlib
+import importlib.util
+import marshal
+import os
+import pickle
+import sys
+
+from deploy.atomic import atomic_write
+from module.base.decorator import cached_property
+from module.logger import logger
+from module.map.map_base import CampaignMap
+
+# Increase this if the cache layout changes
+MAP_CACHE_VERSION = 2
+# Source files that define the pickled objects, cache is invalidated if they changed
+MAP_CACHE_DEPENDENCIES = [
+    './module/map/map_base.py',
+    './module/map/map_grids.py',
+    './module/map_detection/grid_info.py',
+]
+
+
+def file_hash(file):
+    """
+    Args:
+        file (str):
+
+    Returns:
+        str: sha1 of file content
+    """
+    with open(file, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _is_map_statement(node):
+    """
+    Args:
+        node (ast.stmt): Top-level statement of a map file.
+
+    Returns:
+        bool: If statement modifies `MAP`, like `MAP.shape = 'H5'` or `MAP.ignore_prediction(G4, is_siren=True)`.
+    """
+
+    def on_map(expr):
+        while isinstance(expr, (ast.Attribute, ast.Subscript)):
+            expr = expr.value
+            if isinstance(expr, ast.Name) and expr.id == 'MAP':
+                return True
+        return False
+
+    if isinstance(node, ast.Assign):
+        return all(on_map(target) for target in node.targets)
+    if isinstance(node, ast.AugAssign):
+        return on_map(node.target)
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+        return on_map(node.value.func)
+    return False
+
+
+def compile_map_module(file):
+    """
+    Compile a map file, with `MAP = CampaignMap(...)` replaced by `MAP = __map_cache__`
+    and the statements modifying `MAP` removed.
+
+    Args:
+        file (str):
+
+    Returns:
+        code: None if map file doesn't have exactly one `MAP = CampaignMap(...)`
+    """
+    with open(file, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=file)
+    body = []
+    count = 0
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == 'MAP':
+            if not (isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name)
+                    and node.value.func.id == 'CampaignMap'):
+                return None
+            node.value = ast.copy_location(ast.Name(id='__map_cache__', ctx=ast.Load()), node.value)
+            count += 1
+        elif _is_map_statement(node):
+            continue
+        body.append(node)
+    if count != 1:
+        return None
+    tree.body = body
+    return compile(ast.fix_missing_locations(tree), file, 'exec')
+
+
+class MapCache:
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): Name of the file folder under campaign, such as 'campaign_main'
+        """
+        self.folder = folder
+        self.file = f'./campaign/{folder}/__pycache__/map_cache.pickle'
+        # Key: map file name, such as 'campaign_7_2'.
+        # Value: (source hash, pickled CampaignMap, marshaled code from compile_map_module() or None)
+        self.maps = {}
+        self.modified = False
+
+    @cached_property
+    def signature(self):
+        """
+        Returns:
+            tuple: Version, bytecode version, and hashes of the classes in cache
+        """
+        return (MAP_CACHE_VERSION, importlib.util.MAGIC_NUMBER) \
+            + tuple(file_hash(file) for file in MAP_CACHE_DEPENDENCIES)
+
+    def source_file(self, name):
+        return f'./campaign/{self.folder}/{name}.py'
+
+    def read(self):
+        try:
+            with open(self.file, 'rb') as f:
+                data = pickle.load(f)
+            if data['signature'] == self.signature:
+                self.maps = data['maps']
+            else:
+                logger.info(f'Map cache outdated: {self.file}')
+                self.maps = {}
+        except FileNotFoundError:
+            self.maps = {}
+        except Exception as e:
+            # Broken cache file, rebuild
+            logger.warning(f'Failed to read map cache {self.file}: {e}')
+            self.maps = {}
+        self.modified = False
+
+    def write(self):
+        if not self.modified:
+            return
+        os.makedirs(os.path.dirname(self.file), exist_ok=True)
+        data = {
+            'signature': self.signature,
+            'maps': self.maps,
+        }
+        atomic_write(self.file, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        self.modified = False
+
+    def get(self, name, source_hash):
+        """
+        Returns:
+            CampaignMap: None if cache not hit
+        """
+        try:
+            cached_hash, data, _ = self.maps[name]
+        except KeyError:
+            return None
+        if cached_hash != source_hash:
+            return None
+        try:
+            return pickle.loads(data)
+        except Exception as e:
+            logger.warning(f'Failed to load cached map {self.folder}.{name}: {e}')
+            return None
+
+    def get_code(self, name, source_hash):
+        """
+        Returns:
+            code: None if cache not hit or map file can't run on cached `MAP`
+        """
+        try:
+            cached_hash, _, code = self.maps[name]
+        except KeyError:
+            return None
+        if cached_hash != source_hash or code is None:
+            return None
+        try:
+            return marshal.loads(code)
+        except Exception as e:
+            logger.warning(f'Failed to load cached code {self.folder}.{name}: {e}')
+            return None
+
+    def put(self, name, source_hash, map_):
+        """
+        Args:
+            name (str):
+            source_hash (str):
+            map_ (CampaignMap):
+        """
+        try:
+            data = pickle.dumps(map_, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.warning(f'Unable to cache map {self.folder}.{name}: {e}')
+            return
+        try:
+            code = compile_map_module(self.source_file(name))
+        except Exception as e:
+            logger.warning(f'Unable to compile map file {self.folder}.{name}: {e}')
+            code = None
+        if code is not None:
+            code = marshal.dumps(code)
+        self.maps[name] = (source_hash, data, code)
+        self.modified = True
+
+    def _import(self, name, source_hash):
+        """
+        Import map file and cache its MAP.
+
+        Returns:
+            module:
+        """
+        logger.info(f'Map cache not hit: {self.folder}.{name}')
+        module_name = f'campaign.{self.folder}.{name}'
+        # A module imported before may have been used in a run, don't cache its runtime states
+        fresh = module_name not in sys.modules
+        module = importlib.import_module(module_name)
+        if not fresh:
+            return module
+        self.put(name, source_hash, module.MAP)
+        try:
+            self.write()
+        except OSError as e:
+            # Cache is optional, just log it
+            logger.warning(f'Failed to write map cache {self.file}: {e}')
+        return module
+
+    def _source_hash(self, name):
+        try:
+            return file_hash(self.source_file(name))
+        except FileNotFoundError:
+            raise ModuleNotFoundError(f'No map file: campaign.{self.folder}.{name}')
+
+    def load(self, name):
+        """
+        Args:
+            name (str): Name of .py file under campaign folder, such as 'campaign_7_2'
+
+        Returns:
+            CampaignMap:
+
+        Raises:
+            ModuleNotFoundError: If map file not exists
+        """
+        source_hash = self._source_hash(name)
+        map_ = self.get(name, source_hash)
+        if map_ is not None:
+            return map_
+        return self._import(name, source_hash).MAP
+
+    def load_module(self, name):
+        """
+        Same as `importlib.import_module(f'campaign.{folder}.{name}')`,
+        but on cache hit, module is created from cached code and cached `MAP`.
+
+        Args:
+            name (str): Name of .py file under campaign folder, such as 'campaign_7_2'
+
+        Returns:
+            module:
+
+        Raises:
+            ModuleNotFoundError: If map file not exists
+        """
+        module_name = f'campaign.{self.folder}.{name}'
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+
+        source_hash = self._source_hash(name)
+        code = self.get_code(name, source_hash)
+        map_ = self.get(name, source_hash) if code is not None else None
+        if map_ is None:
+            return self._import(name, source_hash)
+
+        # Parent package for relative imports in map file, like `from .campaign_base import CampaignBase`
+        importlib.import_module(f'campaign.{self.folder}')
+        spec = importlib.util.spec_from_file_location(module_name, self.source_file(name))
+        module = importlib.util.module_from_spec(spec)
+        module.__dict__['__map_cache__'] = map_
+        sys.modules[module_name] = module
+        try:
+            exec(code, module.__dict__)
+        except Exception as e:
+            logger.warning(f'Failed to run cached map file {self.folder}.{name}: {e}')
+            sys.modules.pop(module_name, None)
+            return importlib.import_module(module_name)
+        finally:
+            module.__dict__.pop('__map_cache__', None)
+        return module
+
+    def build(self):
+        """
+        Build cache of all map files in this folder.
+        """
+        from module.handler.fast_forward import map_files
+        logger.info(f'Build map cache: {self.folder}')
+        self.read()
+        # Modules imported by sibling map files during build are still fresh
+        loaded = set(sys.modules)
+        for name in map_files(self.folder):
+            source_hash = file_hash(self.source_file(name))
+            if name in self.maps and self.maps[name][0] == source_hash:
+                continue
+            module_name = f'campaign.{self.folder}.{name}'
+            if module_name in loaded:
+                continue
+            try:
+                module = importlib.import_module(module_name)
+            except Exception as e:
+                logger.warning(f'Failed to import map file {self.folder}.{name}: {e}')
+                continue
+            map_ = getattr(module, 'MAP', None)
+            if isinstance(map_, CampaignMap):
+                self.put(name, source_hash, map_)
+        self.write()
+
+
+# Key: folder. Value: MapCache
+_map_caches = {}
+
+
+def _get_map_cache(folder):
+    cache = _map_caches.get(folder)
+    if cache is None:
+        cache = MapCache(folder)
+        cache.read()
+        _map_caches[folder] = cache
+    return cache
+
+
+def load_map(name, folder='campaign_main'):
+    """
+    Load a parsed `CampaignMap` from cache, or import the map file if cache is stale.
+
+    Args:
+        name (str): Name of .py file under campaign folder, such as 'campaign_7_2'
+        folder (str): Name of the file folder under campaign.
+
+    Returns:
+        CampaignMap:
+    """
+    return _get_map_cache(folder).load(name)
+
+
+def load_map_module(name, folder='campaign_main'):
+    """
+    Import a map file, skipping the `MAP` building if cache is valid.
+
+    Args:
+        name (str): Name of .py file under campaign folder, such as 'campaign_7_2'
+        folder (str): Name of the file folder under campaign.
+
+    Returns:
+        module:
+    """
+    return _get_map_cache(folder).load_module(name)
+
+
+def build_map_cache():
+    """
+    Build cache of all folders under ./campaign
+    """
+    for folder in sorted(os.listdir('./campaign')):
+        if not os.path.isdir(f'./campaign/{folder}'):
+            continue
+        if folder.startswith('_'):
+            continue
+        MapCache(folder).build()
+
+
+if __name__ == '__main__':
+    build_map_cache()
@@ -8,6 +8,7 @@ from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
 from module.logger import logger
 from module.map_detection.perspective import Perspective
+from module.map_detection.template_fft import TemplateFFT
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
@@ -63,6 +64,11 @@ class Homography:
         """
         self.config = config
         self.homo_loaded = False
+        # Tile center of the last detection, tile lattice doesn't move if camera stays
+        self._lattice_hint = None
+        # Quarter sized image of the last detection, to know if camera stays
+        self._lattice_thumb = None
+        self._fft = TemplateFFT()
 
     @cached_property
     def ui_mask_homo_stroke(self):
@@ -152,6 +158,7 @@ class Homography:
         self.homo_invt = cv2.invert(homo)[1]
         self.homo_size = tuple(size.tolist())
         self.homo_loaded = True
+        self._lattice_hint = None
 
     def detect(self, image):
         """
@@ -186,9 +193,11 @@ class Homography:
         elif self.search_tile_rectangle(image_edge, threshold=self.config.HOMO_RECTANGLE_THRESHOLD):
             pass
         else:
+            self._lattice_hint = None
             raise MapDetectionError('Failed to find a free tile')
 
         self.homo_loca %= self.config.HOMO_TILE
+        self._lattice_hint = self.homo_loca + self.config.HOMO_CENTER_OFFSET
 
         # Detect map edges
         self.lower_edge, self.upper_edge, self.left_edge, self.right_edge = False, False, False, False
@@ -214,6 +223,92 @@ class Homography:
             point2str(*self.homo_loca, length=3))
                     )
 
+    def match_lattice(self, image, template, center):
+        """
+        Match template only around the tile lattice.
+
+        Args:
+            image (np.ndarray): Monochrome image.
+            template (np.ndarray): Monochrome template.
+            center: Any location on the lattice, in the coordinate of matchTemplate result.
+
+        Returns:
+            np.ndarray: Same shape as the result of `cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)`,
+                positions around the lattice have the same values, others are -1.
+        """
+        height, width = image.shape[:2]
+        h, w = template.shape[:2]
+        shape = (height - h + 1, width - w + 1)
+        result = np.full(shape, -1., dtype=np.float32)
+        radius = self.config.HOMO_LATTICE_RADIUS
+        tile_x, tile_y = self.config.HOMO_TILE
+        x0 = int(round(center[0])) % tile_x
+        y0 = int(round(center[1])) % tile_y
+        for y in range(y0 - tile_y, shape[0] + radius, tile_y):
+            y1, y2 = max(y - radius, 0), min(y + radius + 1, shape[0])
+            if y1 >= y2:
+                continue
+            for x in range(x0 - tile_x, shape[1] + radius, tile_x):
+                x1, x2 = max(x - radius, 0), min(x + radius + 1, shape[1])
+                if x1 >= x2:
+                    continue
+                window = image[y1:y2 + h - 1, x1:x2 + w - 1]
+                result[y1:y2, x1:x2] = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        return result
+
+    def camera_stayed(self, prev, thumb):
+        """
+        Args:
+            prev (np.ndarray): Quarter sized image of the last detection.
+            thumb (np.ndarray): Quarter sized image of current detection.
+
+        Returns:
+            bool: If images are almost the same, so the tile lattice doesn't move.
+        """
+        if prev is None or prev.shape != thumb.shape:
+            return False
+        diff = cv2.norm(prev, thumb, cv2.NORM_L1) / max(cv2.norm(prev, cv2.NORM_L1), 1)
+        return diff < self.config.HOMO_LATTICE_STAY_DIFF
+
+    @cached_property
+    def tile_center_image_half(self):
+        image = ASSETS.tile_center_image
+        return cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+
+    def match_tile_center(self, image, threshold_good=0.9, threshold=0.8):
+        """
+        Faster `cv2.matchTemplate(image, ASSETS.tile_center_image, cv2.TM_CCOEFF_NORMED)`.
+        1. If camera stays, tile lattice is the same as last detection, match around it.
+           Camera stays if the image is almost the same as last detection.
+        2. Match on half sized image to find the lattice, then match around it.
+        3. Match on full image, with cached template spectrum.
+
+        Args:
+            image (np.ndarray): Monochrome image.
+            threshold_good (float):
+            threshold (float):
+
+        Returns:
+            np.ndarray: Match result, positions far from the lattice may be -1.
+        """
+        template = ASSETS.tile_center_image
+        thumb = cv2.resize(image, (image.shape[1] // 4, image.shape[0] // 4), interpolation=cv2.INTER_AREA)
+        prev, self._lattice_thumb = self._lattice_thumb, thumb
+        if self._lattice_hint is not None and self.camera_stayed(prev, thumb):
+            result = self.match_lattice(image, template, center=self._lattice_hint)
+            if np.max(result) > threshold_good:
+                return result
+
+        half = cv2.resize(image, (image.shape[1] // 2, image.shape[0] // 2), interpolation=cv2.INTER_AREA)
+        coarse = cv2.matchTemplate(half, self.tile_center_image_half, cv2.TM_CCOEFF_NORMED)
+        _, similarity, _, loca = cv2.minMaxLoc(coarse)
+        if similarity > self.config.HOMO_COARSE_THRESHOLD:
+            result = self.match_lattice(image, template, center=np.multiply(loca, 2))
+            if np.max(result) > threshold:
+                return result
+
+        return self._fft.match(image, template)
+
     def search_tile_center(self, image, threshold_good=0.9, threshold=0.8, encourage=1.0):
         """
         Search for the center of empty tile.
@@ -229,7 +324,10 @@ class Homography:
         Returns:
             bool: If success.
         """
-        result = cv2.matchTemplate(image, ASSETS.tile_center_image, cv2.TM_CCOEFF_NORMED)
+        if self.config.HOMO_FAST_SEARCH:
+            result = self.match_tile_center(image, threshold_good=threshold_good, threshold=threshold)
+        else:
+            result = cv2.matchTemplate(image, ASSETS.tile_center_image, cv2.TM_CCOEFF_NORMED)
         _, similarity, _, loca = cv2.minMaxLoc(result)
         if similarity > threshold_good:
             self.homo_loca = np.array(loca) - self.config.HOMO_CENTER_OFFSET
@@ -266,7 +364,10 @@ class Homography:
         location = np.array([])
         for index in range(4):
             template = ASSETS.tile_corner_image_list[index]
-            result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+            if self.config.HOMO_FAST_SEARCH:
+                result = self._fft.match(image, template)
+            else:
+                result = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
             similarity = max(similarity, np.max(result))
             loca = np.argwhere(result > threshold)[:, ::-1] - self.config.HOMO_CORNER_OFFSET_LIST[index]
             location = np.append(location, loca, axis=0) if len(location) else loca
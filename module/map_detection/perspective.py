@@ -3,8 +3,8 @@ import warnings
 
 import numpy as np
 from PIL import Image, ImageDraw, ImageOps
-from scipy import signal
 
+from module.base.lazy import lazy_import
 from module.base.utils import *
 from module.config.config import AzurLaneConfig
 from module.exception import MapDetectionError
@@ -12,6 +12,8 @@ from module.logger import logger
 from module.map_detection.utils import *
 from module.map_detection.utils_assets import *
 
+signal = lazy_import('scipy.signal')
+
 warnings.filterwarnings("ignore")
 
 
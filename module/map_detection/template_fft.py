@@ -0,0 +1,103 @@
+"""
+TM_CCOEFF_NORMED template matching with cached template spectrums.
+
+`cv2.matchTemplate` transforms the template into frequency domain on every call,
+`Homography` matches the same tile templates on images of the same size again and again,
+so spectrums of zero-mean templates are calculated once and reused.
+
+    R(x, y) = sum(T'(x', y') * I(x + x', y + y')) / sqrt(sum(T'^2) * sum(I'^2))
+
+T' is the zero-mean template, I' is the image window subtracted by its mean,
+window statistics come from integral images, same as what cv2 does.
+"""
+import cv2
+import numpy as np
+
+
+def ccoeff_normed(corr, norm, image, shape):
+    """
+    Normalize cross-correlation into TM_CCOEFF_NORMED, with the same rules as `cv2.matchTemplate`.
+
+    Args:
+        corr (np.ndarray): Correlation of zero-mean templates on image, shape (..., H - h + 1, W - w + 1)
+        norm (float, np.ndarray): Norm of zero-mean templates, broadcastable to `corr`
+        image (np.ndarray): Image to search in, shape (H, W) or (H, W, C).
+            Window statistics of multi-channel images are summed over channels.
+        shape (tuple): Template shape (h, w)
+
+    Returns:
+        np.ndarray: Same shape as `corr`
+    """
+    h, w = shape
+    # Window variance
+    total, total_sq = cv2.integral2(image, sdepth=cv2.CV_64F)
+    window = total[h:, w:] - total[:-h, w:] - total[h:, :-w] + total[:-h, :-w]
+    window_sq = total_sq[h:, w:] - total_sq[:-h, w:] - total_sq[h:, :-w] + total_sq[:-h, :-w]
+    variance = np.maximum(window_sq - window ** 2 / (h * w), 0)
+    if variance.ndim == 3:
+        variance = np.sum(variance, axis=2)
+        window_sq = np.sum(window_sq, axis=2)
+    # Same as cv2, flat windows have 0 similarity
+    variance[variance <= np.minimum(0.5, 10 * np.finfo(np.float32).eps * window_sq)] = 0
+    denominator = norm * np.sqrt(variance)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.where(np.abs(corr) < denominator, corr / denominator, 0.)
+    # Rounding errors at perfect matches
+    almost = (np.abs(corr) >= denominator) & (np.abs(corr) < denominator * 1.125) & (denominator > 0)
+    result[almost] = np.sign(corr[almost])
+    return result
+
+
+class TemplateFFT:
+    def __init__(self):
+        # Key: (id of template, dft shape). Value: (template, spectrum, norm of zero-mean template)
+        # Template itself is kept so its id won't be reused.
+        self.cache = {}
+
+    def prepare(self, template, dft_shape):
+        """
+        Args:
+            template (np.ndarray): Monochrome template.
+            dft_shape (tuple): (height, width)
+
+        Returns:
+            tuple: spectrum, norm of zero-mean template
+        """
+        key = (id(template), dft_shape)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached[1:]
+
+        h, w = template.shape[:2]
+        zero_mean = template.astype(np.float32)
+        zero_mean -= zero_mean.mean()
+        norm = float(np.sqrt(np.sum(zero_mean.astype(np.float64) ** 2)))
+        padded = np.zeros(dft_shape, dtype=np.float32)
+        padded[:h, :w] = zero_mean
+        spectrum = cv2.dft(padded, flags=cv2.DFT_COMPLEX_OUTPUT)
+        self.cache[key] = (template, spectrum, norm)
+        return spectrum, norm
+
+    def match(self, image, template):
+        """
+        Args:
+            image (np.ndarray): Monochrome image.
+            template (np.ndarray): Monochrome template.
+
+        Returns:
+            np.ndarray: Same as `cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)`
+        """
+        height, width = image.shape[:2]
+        h, w = template.shape[:2]
+        # No need to pad for (height + h - 1), wrapped results are out of the valid area
+        dft_shape = (cv2.getOptimalDFTSize(height), cv2.getOptimalDFTSize(width))
+        spectrum, norm = self.prepare(template, dft_shape)
+
+        padded = np.zeros(dft_shape, dtype=np.float32)
+        padded[:height, :width] = image
+        image_spectrum = cv2.dft(padded, flags=cv2.DFT_COMPLEX_OUTPUT)
+        corr = cv2.mulSpectrums(image_spectrum, spectrum, 0, conjB=True)
+        corr = cv2.idft(corr, flags=cv2.DFT_REAL_OUTPUT | cv2.DFT_SCALE)
+        corr = corr[:height - h + 1, :width - w + 1].astype(np.float64)
+        return ccoeff_normed(corr, norm, image, (h, w)).astype(np.float32)
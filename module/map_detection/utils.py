@@ -1,8 +1,10 @@
 import numpy as np
-from scipy import optimize
 
+from module.base.lazy import lazy_import
 from module.base.utils import area_pad
 
+optimize = lazy_import('scipy.optimize')
+
 
 class Points:
     def __init__(self, points):
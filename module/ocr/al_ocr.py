@@ -9,9 +9,10 @@ from module.logger import logger
 
 try:
     logger.info('Loading OCR dependencies')
+    import mxnet as mx
     from cnocr import CnOcr
     from cnocr.cn_ocr import (check_model_name, data_dir, gen_network, load_module,
-                              read_charset)
+                              read_charset, rename_params)
     from cnocr.fit.ctc_metrics import CtcMetrics
     from cnocr.hyperparams.cn_hyperparams import CnHyperparams as Hyperparams
 except Exception as e:
@@ -37,6 +38,8 @@ class AlOcr(CnOcr):
     # 'cpu' or 'gpu'
     # To use predict in gpu, the gpu version of mxnet must be installed.
     CNOCR_CONTEXT = get_mxnet_context()
+    # Executor bound to memory-mapped params, see module.ocr.shared
+    _shared_executor = None
 
     def __init__(
             self,
@@ -49,6 +52,8 @@ class AlOcr(CnOcr):
     ):
         self._args = (model_name, model_epoch, cand_alphabet, root, context, name)
         self._model_loaded = False
+        # Key: data shape, value: executor reshaped from `_shared_executor`
+        self._shared_reshaped = {}
 
     def init(self,
              model_name='densenet-lite-gru',
@@ -111,7 +116,7 @@ class AlOcr(CnOcr):
             self.init(*self._args)
             self._model_loaded = True
 
-        return super().ocr_for_single_lines(img_list)
+        return self._ocr_for_single_lines_batched(img_list)
 
     def set_cand_alphabet(self, cand_alphabet):
         if not self._model_loaded:
@@ -150,7 +155,35 @@ class AlOcr(CnOcr):
 
         super().set_cand_alphabet(cand_alphabet)
 
-        return super().ocr_for_single_lines(img_list)
+        return self._ocr_for_single_lines_batched(img_list)
+
+    def _ocr_for_single_lines_batched(self, img_list):
+        """
+        Same as CnOcr.ocr_for_single_lines(), but lines are resized and padded
+        into one preallocated tensor, instead of resizing, expanding and padding each line.
+        """
+        if len(img_list) == 0:
+            return []
+        if any(img.ndim != 2 for img in img_list):
+            return super().ocr_for_single_lines(img_list)
+
+        batch, img_widths = self._preprocess_img_batch(img_list)
+        batch_size = len(img_list)
+
+        prob = self._predict(mx.nd.array(batch))
+        # [seq_len, batch_size, num_classes]
+        prob = np.reshape(prob, (-1, batch_size, prob.shape[1]))
+
+        if self._cand_alph_idx is not None:
+            prob = prob * self._gen_mask(prob.shape)
+
+        max_width = max(img_widths)
+        res = []
+        for i in range(batch_size):
+            res.append(
+                self._gen_line_pred_chars(prob[:, i, :], img_widths[i], max_width)
+            )
+        return res
 
     def _assert_and_prepare_model_files(self):
         model_dir = self._model_dir
@@ -184,6 +217,17 @@ class AlOcr(CnOcr):
         data_names = ['data']
         data_shapes = [(data_names[0], (hp.batch_size, 1, hp.img_height, hp.img_width))]
         logger.info('Loading OCR model: %s' % self._model_dir)  # Change log appearance.
+
+        from module.webui.setting import State
+        if State.deploy_config.OcrSharedParams and context == 'cpu':
+            try:
+                self._shared_executor = self._get_shared_executor(network, prefix, data_shapes[0][1])
+                self._shared_reshaped = {}
+                return None
+            except Exception as e:
+                logger.warning(f'Failed to load shared OCR params, fallback to private ones: {e}')
+                self._shared_executor = None
+
         mod = load_module(
             prefix,
             self._model_epoch,
@@ -195,6 +239,45 @@ class AlOcr(CnOcr):
         )
         return mod
 
+    def _get_shared_executor(self, network, prefix, data_shape):
+        """
+        Same as `load_module()`, but binds an executor directly on memory-mapped params,
+        instead of a Module that copies params into its own arrays.
+        """
+        from module.ocr.shared import load_shared_params
+        arg_params, aux_params = load_shared_params(prefix, self._model_epoch)
+
+        net_prefix = self._net_prefix or ''
+        if net_prefix:
+            arg_params = {rename_params(k, net_prefix): v for k, v in arg_params.items()}
+            aux_params = {rename_params(k, net_prefix): v for k, v in aux_params.items()}
+        pred_fc = network.get_internals()[net_prefix + 'pred_fc_output']
+        sym = mx.sym.softmax(data=pred_fc)
+
+        args = {'data': mx.nd.zeros(data_shape)}
+        for name in sym.list_arguments():
+            if name != 'data':
+                args[name] = arg_params[name]
+        aux_states = {name: aux_params[name] for name in sym.list_auxiliary_states()}
+        return sym.bind(mx.cpu(), args=args, grad_req='null', aux_states=aux_states)
+
+    def _predict(self, sample):
+        if self._shared_executor is None:
+            return super()._predict(sample)
+
+        shape = tuple(sample.shape)
+        executor = self._shared_reshaped.get(shape)
+        if executor is None:
+            # Reshaped executors share param arrays with the original one
+            executor = self._shared_executor.reshape(allow_up_sizing=True, data=shape)
+            if len(self._shared_reshaped) >= 16:
+                self._shared_reshaped.clear()
+            self._shared_reshaped[shape] = executor
+        executor.forward(is_train=False, data=sample)
+        prob = executor.outputs[0]
+        mx.nd.waitall()
+        return prob.asnumpy()
+
     def _preprocess_img_array(self, img):
         """
         :param img: image array with type mx.nd.NDArray or np.ndarray,
@@ -209,6 +292,27 @@ class AlOcr(CnOcr):
         img = np.expand_dims(img, 0).astype('float32') / 255.0
         return img
 
+    def _preprocess_img_batch(self, img_list):
+        """
+        Batched version of `_preprocess_img_array()` and `_pad_arrays()`.
+
+        Args:
+            img_list (list[np.ndarray]): Gray images, shape (height, width)
+
+        Returns:
+            np.ndarray, list[int]: Float32 tensor with shape (batch, 1, img_height, max_width),
+                and width of each line after resizing.
+        """
+        height = self._hp.img_height
+        img_widths = [int(round(height / img.shape[0] * img.shape[1])) for img in img_list]
+        # Zero padding on the right, same as np.pad(..., constant_values=0.0)
+        batch = np.zeros((len(img_list), 1, height, max(img_widths)), dtype=np.float32)
+        for index, (img, width) in enumerate(zip(img_list, img_widths)):
+            batch[index, 0, :, :width] = cv2.resize(img, (width, height))
+        # Divide in float32, so values are identical to `astype('float32') / 255.0`
+        np.divide(batch, 255.0, out=batch)
+        return batch, img_widths
+
     def _gen_line_pred_chars(self, line_prob, img_width, max_img_width):
         """
         Get the predicted characters.
@@ -69,6 +69,40 @@ class Ocr:
 
         return image.astype(np.uint8)
 
+    @classmethod
+    def pre_process_pixelwise(cls):
+        """
+        Returns:
+            bool: If pre_process() is a pure pixel-wise operation,
+                so crops can be stacked and processed at once.
+        """
+        return cls.pre_process in (Ocr.pre_process, OcrYuv.pre_process)
+
+    def pre_process_areas(self, image, areas):
+        """
+        Crop all OCR areas from one frame and pre-process them.
+        If areas have the same size, crops are copied into one preallocated tensor
+        and pre-processed in a single pass, instead of once per area.
+
+        Args:
+            image (np.ndarray): Screenshot, shape (height, width, channel)
+            areas (list[tuple]):
+
+        Returns:
+            list[np.ndarray]: Shape (height, width)
+        """
+        if len(areas) > 1 and image.ndim == 3 and self.pre_process_pixelwise():
+            sizes = set(area_size(tuple(round(x) for x in area)) for area in areas)
+            if len(sizes) == 1 and min(*next(iter(sizes))) > 0:
+                width, height = sizes.pop()
+                stack = np.empty((len(areas) * height, width, image.shape[2]), dtype=np.uint8)
+                for index, area in enumerate(areas):
+                    stack[index * height:(index + 1) * height] = crop(image, area, copy=False)
+                stack = self.pre_process(stack)
+                return [stack[index * height:(index + 1) * height] for index in range(len(areas))]
+
+        return [self.pre_process(crop(image, area)) for area in areas]
+
     def after_process(self, result):
         """
         Args:
@@ -93,7 +127,7 @@ class Ocr:
         if direct_ocr:
             image_list = [self.pre_process(i) for i in image]
         else:
-            image_list = [self.pre_process(crop(image, area)) for area in self.buttons]
+            image_list = self.pre_process_areas(image, self.buttons)
 
         # This will show the images feed to OCR model
         # self.cnocr.debug(image_list)
@@ -131,8 +165,8 @@ class OcrYuv(Ocr):
             np.ndarray: Shape (width, height)
         """
         y = rgb2luma(image)
-        letter_y = (np.ones(y.shape) * self.letter_y).astype(np.uint8)
-        diff = cv2.absdiff(y, letter_y)
+        # Absdiff to a scalar, no need to allocate a full-size array of letter_y
+        diff = cv2.absdiff(y, (int(self.letter_y), 0, 0, 0))
         diff = cv2.multiply(diff, 255.0 / self.threshold)
         return diff
 
@@ -0,0 +1,142 @@
+"""
+Share OCR model parameters between Alas instance processes.
+
+Parameters of an mxnet checkpoint are exported once into a flat binary file next to the `.params` file,
+each process memory-maps it read-only and wraps the mapped pages into NDArrays without copying.
+Physical memory of the parameters is then shared through page cache,
+RAM doesn't grow linearly with the number of running instances.
+"""
+import json
+import os
+
+import numpy as np
+
+from deploy.atomic import atomic_write
+from module.logger import logger
+
+# Increase this if the file layout below changes
+SHARED_PARAMS_VERSION = 1
+# Align each parameter to 64 bytes
+SHARED_PARAMS_ALIGN = 64
+
+
+def shared_params_files(prefix, epoch):
+    """
+    Args:
+        prefix (str): Such as './bin/cnocr_models/azur_lane/cnocr-v1.2.0-densenet-lite-gru'
+        epoch (int):
+
+    Returns:
+        str, str, str: Source params file, shared binary file, index file
+    """
+    base = '%s-%04d' % (prefix, epoch)
+    return f'{base}.params', f'{base}.shared', f'{base}.shared.json'
+
+
+def shared_params_signature(params_file):
+    """
+    Shared files are considered stale if the source params file changed.
+    """
+    stat = os.stat(params_file)
+    return {
+        'version': SHARED_PARAMS_VERSION,
+        'size': stat.st_size,
+        'mtime': int(stat.st_mtime),
+    }
+
+
+def export_shared_params(prefix, epoch):
+    """
+    Dump parameters of an mxnet checkpoint into a file that can be memory-mapped.
+
+    Args:
+        prefix (str):
+        epoch (int):
+
+    Returns:
+        dict: Index of the exported params
+    """
+    import mxnet as mx
+    params_file, data_file, index_file = shared_params_files(prefix, epoch)
+    logger.info(f'Export shared OCR params: {data_file}')
+
+    chunks = []
+    params = []
+    offset = 0
+    for key, value in mx.nd.load(params_file).items():
+        # Keys are like 'arg:pred_fc_weight' or 'aux:bn0_moving_mean'
+        kind, name = key.split(':', 1)
+        array = np.ascontiguousarray(value.asnumpy())
+        pad = -offset % SHARED_PARAMS_ALIGN
+        if pad:
+            chunks.append(b'\x00' * pad)
+            offset += pad
+        params.append({
+            'kind': kind,
+            'name': name,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape),
+            'offset': offset,
+        })
+        chunks.append(array.tobytes())
+        offset += array.nbytes
+
+    index = {
+        'source': shared_params_signature(params_file),
+        'params': params,
+    }
+    # Data first, so a valid index always points to a complete data file
+    atomic_write(data_file, b''.join(chunks))
+    atomic_write(index_file, json.dumps(index, indent=2))
+    return index
+
+
+def _to_ndarray(array):
+    """
+    Args:
+        array (np.ndarray): Read-only array on memory-mapped pages
+
+    Returns:
+        mx.nd.NDArray:
+    """
+    import mxnet as mx
+    try:
+        # Zero-copy through DLPack, available in mxnet >= 1.6
+        return mx.nd.from_numpy(array, zero_copy=True)
+    except (AttributeError, ValueError, TypeError) as e:
+        logger.warning(f'Unable to share OCR params with zero copy, fallback to copy: {e}')
+        return mx.nd.array(array, dtype=array.dtype)
+
+
+def load_shared_params(prefix, epoch):
+    """
+    Args:
+        prefix (str):
+        epoch (int):
+
+    Returns:
+        dict[str, mx.nd.NDArray], dict[str, mx.nd.NDArray]: arg_params, aux_params
+    """
+    params_file, data_file, index_file = shared_params_files(prefix, epoch)
+    signature = shared_params_signature(params_file)
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index['source'] != signature or not os.path.exists(data_file):
+            logger.info(f'Shared OCR params outdated: {data_file}')
+            index = export_shared_params(prefix, epoch)
+    except (FileNotFoundError, KeyError, ValueError):
+        index = export_shared_params(prefix, epoch)
+
+    mapped = np.memmap(data_file, dtype=np.uint8, mode='r')
+    arg_params = {}
+    aux_params = {}
+    for row in index['params']:
+        array = np.ndarray(
+            shape=tuple(row['shape']), dtype=np.dtype(row['dtype']), buffer=mapped, offset=row['offset'])
+        if row['kind'] == 'arg':
+            arg_params[row['name']] = _to_ndarray(array)
+        elif row['kind'] == 'aux':
+            aux_params[row['name']] = _to_ndarray(array)
+
+    return arg_params, aux_params
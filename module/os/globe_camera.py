@@ -3,8 +3,10 @@ from module.base.utils import *
 from module.exception import GameStuckError
 from module.logger import logger
 from module.os.assets import *
-from module.os.globe_detection import GLOBE_MAP_SHAPE, GlobeDetection
+from module.map.map_grids import SelectedGrids
+from module.os.globe_detection import GLOBE_CAMERA_AREA, GlobeDetection
 from module.os.globe_operation import GlobeOperation
+from module.os.globe_tour import GlobeTour
 from module.os.globe_zone import Zone, ZoneManager
 from module.os_ash.assets import ASH_QUIT, ASH_SHOWDOWN
 from module.os_handler.assets import ACTION_POINT_CANCEL, ACTION_POINT_USE, AUTO_SEARCH_REWARD
@@ -169,13 +171,105 @@ class GlobeCamera(GlobeOperation, ZoneManager):
             if point_in_area(self.globe2screen([zone.location])[0], area=sight):
                 break
 
-            area = (400, 200, GLOBE_MAP_SHAPE[0] - 400, GLOBE_MAP_SHAPE[1] - 250)
-            loca = point_limit(zone.location, area=area)
+            loca = point_limit(zone.location, area=GLOBE_CAMERA_AREA)
             vector = np.array(loca) - self.globe_camera
             vector = vector / self.config.OS_GLOBE_SWIPE_MULTIPLY
             swipe = tuple(np.min([np.abs(vector), swipe_limit], axis=0) * np.sign(vector))
             self.globe_swipe(swipe)
 
+    def globe_sight(self, sight=(20, 220, 980, 620)):
+        """
+        Args:
+            sight (tuple): Area on screen.
+
+        Returns:
+            np.ndarray: 4 corners of sight on globe map, relative to globe camera.
+        """
+        self._globe_init()
+        x1, y1, x2, y2 = sight
+        corners = [(x1, y1), (x2, y1), (x2, y2), (x1, y2)]
+        return self.globe.screen2globe(corners) - self.globe.homo_center
+
+    def globe_tour(self, sight=(20, 220, 980, 620)):
+        """
+        Args:
+            sight (tuple): Area on screen.
+
+        Returns:
+            GlobeTour:
+        """
+        return GlobeTour(self.globe_sight(sight), camera_area=GLOBE_CAMERA_AREA,
+                         swipe_multiply=self.config.OS_GLOBE_SWIPE_MULTIPLY)
+
+    def globe_zones_in_sight(self, zones, sight=(20, 220, 980, 620)):
+        """
+        Args:
+            zones (SelectedGrids):
+            sight (tuple):
+
+        Returns:
+            SelectedGrids: Zones in sight now.
+        """
+        return zones.filter(lambda z: point_in_area(self.globe2screen([z.location])[0], area=sight))
+
+    def globe_camera_to(self, camera, zones=None, swipe_limit=(620, 340), sight=(20, 220, 980, 620)):
+        """
+        Swipe globe camera to a location.
+
+        Args:
+            camera (tuple, np.ndarray): Location on globe map.
+            zones (SelectedGrids): Stop swiping if all of them are in sight.
+            swipe_limit (tuple):
+            sight (tuple):
+        """
+        for _ in range(5):
+            if zones and self.globe_zones_in_sight(zones, sight=sight).count == zones.count:
+                break
+            vector = (np.array(camera) - self.globe_camera) / self.config.OS_GLOBE_SWIPE_MULTIPLY
+            if np.linalg.norm(vector) <= 25:
+                break
+            swipe = tuple(np.min([np.abs(vector), swipe_limit], axis=0) * np.sign(vector))
+            self.globe_swipe(swipe)
+
+    def globe_scan(self, zones, sight=(20, 220, 980, 620)):
+        """
+        Get zones in sight with the least swipes, following a tour from `GlobeTour`.
+        self.globe_update() needs to be called first
+
+        Args:
+            zones (SelectedGrids):
+            sight (tuple):
+
+        Yields:
+            SelectedGrids: Zones in sight that were not yielded before.
+                Camera stays until the next iteration.
+
+        Examples:
+            for to_check in self.globe_scan(zones):
+                for zone in to_check:
+                    ...
+        """
+        tour = self.globe_tour(sight).plan(zones.location, start=self.globe_camera)
+        logger.info(f'Globe tour: {len(tour)} stops for {zones.count} zones')
+        remain = zones
+        for camera, index in tour:
+            planned = SelectedGrids([zones[i] for i in index])
+            self.globe_camera_to(camera, zones=planned, sight=sight)
+            to_check = self.globe_zones_in_sight(remain, sight=sight)
+            if to_check:
+                remain = remain.delete(to_check)
+                yield to_check
+
+        # Camera may not stop where planned, find the rest one by one
+        while remain:
+            zone = remain.sort_by_camera_distance(self.globe_camera)[0]
+            self.globe_in_sight(zone, sight=sight)
+            to_check = self.globe_zones_in_sight(remain, sight=sight)
+            if not to_check:
+                to_check = SelectedGrids([zone])
+            remain = remain.delete(to_check)
+            yield to_check
+
     def get_globe_pinned_zone(self):
         """
         Returns:
@@ -283,13 +377,8 @@ class GlobeCamera(GlobeOperation, ZoneManager):
             out: in_globe, is_zone_pinned() if found.
         """
         sight = (20, 220, 980, 620)
-        while zones:
-            prev = self.camera_to_zone(self.globe_camera)
-            zone = zones.sort_by_camera_distance(prev.location)[0]
-            logger.info(f'Find siren stronghold around {zone}')
-            self.globe_in_sight(zone, sight=sight)
-
-            to_check = zones.filter(lambda z: point_in_area(self.globe2screen([z.location])[0], area=sight))
+        for to_check in self.globe_scan(zones, sight=sight):
+            logger.info(f'Find siren stronghold in {to_check}')
             for zone in to_check:
                 if self._globe_predict_stronghold(zone):
                     logger.info(f'Zone {zone.zone_id} is a siren stronghold')
@@ -303,8 +392,6 @@ class GlobeCamera(GlobeOperation, ZoneManager):
                 else:
                     logger.info(f'Zone {zone.zone_id} is not a siren stronghold')
 
-            zones = zones.delete(to_check)
-
         logger.info('Find siren stronghold finished')
         return None
 
@@ -9,6 +9,8 @@ from module.map_detection.utils import *
 
 GLOBE_MAP = './assets/map_detection/os_globe_map.png'
 GLOBE_MAP_SHAPE = (2570, 1696)
+# Where globe camera can be, on os_globe_map.png
+GLOBE_CAMERA_AREA = (400, 200, GLOBE_MAP_SHAPE[0] - 400, GLOBE_MAP_SHAPE[1] - 250)
 
 
 class GlobeDetection:
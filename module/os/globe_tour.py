@@ -0,0 +1,219 @@
+"""
+Plan camera tours on OpSi globe map.
+
+Scanning zones one by one, nearest first, swipes back and forth across the globe.
+Here a tour is planned before moving:
+1. Camera positions, a small set of them that gets every zone in sight once (greedy set cover).
+2. The order to visit them, that has the least swipe distance from current camera (open path TSP).
+
+Planner works on 2D globe map coordinates, it doesn't touch the device,
+so it's used by `GlobeCamera.globe_scan()` and offline by `dev_tools/globe_tour_simulate.py`.
+"""
+import itertools
+
+import numpy as np
+
+
+class GlobeTour:
+    def __init__(self, sight, camera_area, swipe_multiply=(1.91, 2.21), swipe_limit=(620, 340), margin=0.85):
+        """
+        Args:
+            sight (np.ndarray): Shape (n, 2), convex polygon of the area in sight,
+                on globe map, relative to camera, such as the 4 corners of screen sight.
+            camera_area (tuple): (x1, y1, x2, y2), where camera can be.
+            swipe_multiply (tuple): config.OS_GLOBE_SWIPE_MULTIPLY, distance on globe map / swipe distance
+            swipe_limit (tuple): Max swipe distance in one swipe.
+            margin (float): Shrink sight towards its center,
+                because camera doesn't stop at the exact position after swipes.
+        """
+        sight = np.asarray(sight, dtype=float)
+        self.center = sight.mean(axis=0)
+        self.sight = self.center + (sight - self.center) * margin
+        self.camera_area = camera_area
+        self.swipe_multiply = np.asarray(swipe_multiply, dtype=float)
+        self.swipe_limit = np.asarray(swipe_limit, dtype=float)
+
+        # Polygon edges and orientation, for point in polygon tests
+        self._edge = np.roll(self.sight, -1, axis=0) - self.sight
+        x, y = self.sight[:, 0], self.sight[:, 1]
+        area = np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y)
+        self._orientation = 1 if area >= 0 else -1
+
+    def clamp(self, cameras):
+        """
+        Args:
+            cameras (np.ndarray): Shape (n, 2)
+
+        Returns:
+            np.ndarray: Cameras limited in camera_area
+        """
+        x1, y1, x2, y2 = self.camera_area
+        return np.clip(cameras, (x1, y1), (x2, y2))
+
+    def visible(self, cameras, points):
+        """
+        Args:
+            cameras (np.ndarray): Shape (m, 2)
+            points (np.ndarray): Shape (n, 2)
+
+        Returns:
+            np.ndarray: Shape (m, n), if points[j] is in sight when camera at cameras[i]
+        """
+        relative = np.asarray(points, dtype=float)[np.newaxis] - np.asarray(cameras, dtype=float)[:, np.newaxis]
+        result = np.ones(relative.shape[:2], dtype=bool)
+        for start, edge in zip(self.sight, self._edge):
+            diff = relative - start
+            cross = edge[0] * diff[:, :, 1] - edge[1] * diff[:, :, 0]
+            result &= cross * self._orientation >= -1e-6
+        return result
+
+    def swipe_distance(self, vector):
+        """
+        Args:
+            vector: Camera movement on globe map.
+
+        Returns:
+            float: Swipe distance on screen.
+        """
+        return float(np.linalg.norm(np.asarray(vector, dtype=float) / self.swipe_multiply))
+
+    def swipe_count(self, vector):
+        """
+        Args:
+            vector: Camera movement on globe map.
+
+        Returns:
+            int: Swipes needed, same as `GlobeCamera.globe_in_sight()` does, each swipe is limited by swipe_limit.
+        """
+        vector = np.abs(np.asarray(vector, dtype=float) / self.swipe_multiply)
+        if np.linalg.norm(vector) < 1:
+            return 0
+        return int(np.max(np.ceil(vector / self.swipe_limit)))
+
+    def cover(self, points, start):
+        """
+        Select camera positions that get all points in sight.
+
+        Args:
+            points (np.ndarray): Shape (n, 2)
+            start: Current camera.
+
+        Returns:
+            np.ndarray: Cameras, shape (m, 2)
+            np.ndarray: Points that can't be in sight at any camera, in bool
+        """
+        points = np.asarray(points, dtype=float)
+        uncovered = np.ones(len(points), dtype=bool)
+        if not len(points):
+            return np.zeros((0, 2)), uncovered
+        # Put each point at the center, vertexes and middle of edges of sight
+        anchors = np.vstack([self.center, self.sight, self.sight + self._edge / 2])
+        candidates = self.clamp((points[:, np.newaxis] - anchors[np.newaxis]).reshape(-1, 2))
+        visible = self.visible(candidates, points)
+
+        cameras = []
+        current = np.asarray(start, dtype=float)
+        while uncovered.any():
+            gain = np.sum(visible[:, uncovered], axis=1)
+            best = gain.max()
+            if best == 0:
+                break
+            # Among the best, prefer the nearest to previous camera
+            index = np.flatnonzero(gain == best)
+            index = index[np.argmin(np.linalg.norm(candidates[index] - current, axis=1))]
+            current = candidates[index]
+            cameras.append(current)
+            uncovered &= ~visible[index]
+
+        return np.array(cameras).reshape(-1, 2), uncovered
+
+    def order(self, cameras, start):
+        """
+        Order cameras to have the least swipe distance, starting from current camera, no need to return.
+        Exact for a few cameras, nearest neighbour + 2-opt for more.
+
+        Args:
+            cameras (np.ndarray): Shape (m, 2)
+            start: Current camera.
+
+        Returns:
+            list[int]: Index of cameras
+        """
+        n = len(cameras)
+        if n <= 1:
+            return list(range(n))
+        nodes = np.vstack([np.asarray(start, dtype=float), cameras])
+        diff = (nodes[:, np.newaxis] - nodes[np.newaxis]) / self.swipe_multiply
+        dist = np.linalg.norm(diff, axis=2)
+
+        def length(path):
+            return dist[0, path[0]] + sum(dist[a, b] for a, b in zip(path[:-1], path[1:]))
+
+        if n <= 7:
+            path = min(itertools.permutations(range(1, n + 1)), key=length)
+            return [i - 1 for i in path]
+
+        # Nearest neighbour
+        path = []
+        remain = set(range(1, n + 1))
+        current = 0
+        while remain:
+            current = min(remain, key=lambda i: dist[current, i])
+            path.append(current)
+            remain.remove(current)
+        # 2-opt
+        improved = True
+        while improved:
+            improved = False
+            for i in range(n - 1):
+                for j in range(i + 1, n):
+                    new = path[:i] + path[i:j + 1][::-1] + path[j + 1:]
+                    if length(new) < length(path) - 1e-6:
+                        path = new
+                        improved = True
+        return [i - 1 for i in path]
+
+    def plan(self, points, start):
+        """
+        Args:
+            points (np.ndarray, list): Shape (n, 2), location of zones on globe map.
+            start: Current camera.
+
+        Returns:
+            list[tuple[np.ndarray, list[int]]]: Stops of the tour, in visiting order.
+                Each stop is (camera, index of points that get in sight first time at this camera).
+                Points that can't be in sight are not in any stop.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        cameras, _ = self.cover(points, start=start)
+        cameras = cameras[self.order(cameras, start=start)]
+        visible = self.visible(cameras, points)
+
+        tour = []
+        checked = np.zeros(len(points), dtype=bool)
+        for camera, row in zip(cameras, visible):
+            index = np.flatnonzero(row & ~checked)
+            if not len(index):
+                continue
+            checked[index] = True
+            # Move camera to the middle of its points, if they are still in sight,
+            # so swipe errors are less likely to push them out
+            middle = self.clamp(((points[index].min(axis=0) + points[index].max(axis=0)) / 2 - self.center)[np.newaxis])
+            if self.visible(middle, points[index]).all():
+                camera = middle[0]
+            tour.append((camera, index.tolist()))
+        return tour
+
+    def tour_distance(self, tour, start):
+        """
+        Returns:
+            float: Total swipe distance of a tour.
+            int: Total swipes of a tour.
+        """
+        distance, count = 0., 0
+        current = np.asarray(start, dtype=float)
+        for camera, _ in tour:
+            distance += self.swipe_distance(camera - current)
+            count += self.swipe_count(camera - current)
+            current = camera
+        return distance, count
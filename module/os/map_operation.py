@@ -1,4 +1,7 @@
-from module.base.decorator import Config
+import os
+import time
+
+from module.base.decorator import Config, cached_property
 from module.base.timer import Timer
 from module.base.utils import *
 from module.exception import MapDetectionError, ScriptError
@@ -7,6 +10,7 @@ from module.ocr.ocr import Ocr
 from module.os.assets import *
 from module.os.globe_zone import Zone
 from module.os.map_fleet_selector import OSFleetSelector
+from module.os.zone_resolver import CONFIDENCE_LOW, CONFIDENCE_MIN, ZoneNameResolver
 from module.os_handler.assets import AUTO_SEARCH_REWARD, EXCHANGE_CHECK
 from module.os_handler.map_order import MapOrderHandler
 from module.os_handler.mission import MissionHandler
@@ -18,6 +22,8 @@ from module.ui.assets import BACK_ARROW, OS_CHECK
 class OSMapOperation(MapOrderHandler, MissionHandler, PortHandler, StorageHandler, OSFleetSelector):
     zone: Zone
     is_zone_name_hidden = False
+    # Zone resolved with low confidence on the last screenshot, waiting for the next one to confirm
+    zone_unconfirmed = None
 
     def is_meowfficer_searching(self):
         """
@@ -76,6 +82,7 @@ class OSMapOperation(MapOrderHandler, MissionHandler, PortHandler, StorageHandle
         name = name.replace('nnocean', 'naocean')
         # A OceanwsectorB-Safe zone
         name = re.sub('^aocean', 'naocean',  name)
+        # Other misread zone names are resolved in get_current_zone()
 
         # `-` is missing or read as '.'
         # due to font size
@@ -112,6 +119,7 @@ class OSMapOperation(MapOrderHandler, MissionHandler, PortHandler, StorageHandle
         name = name.replace('リバプル', 'リバープール')
         name = name.replace('リバープル', 'リバープール')
         name = name.replace('リバプール', 'リバープール')
+        # Other misread zone names are resolved in get_current_zone()
         return name
 
     @Config.when(SERVER='tw')
@@ -147,19 +155,65 @@ class OSMapOperation(MapOrderHandler, MissionHandler, PortHandler, StorageHandle
             Zone:
 
         Raises:
-            MapDetectionError: If failed to parse zone name.
+            MapDetectionError: If failed to parse zone name,
+                or zone is resolved with low confidence and not confirmed by the last screenshot yet.
             ScriptError:
         """
         name = self.get_zone_name()
         logger.info(f'Map name processed: {name}')
+        unconfirmed, self.zone_unconfirmed = self.zone_unconfirmed, None
         try:
             self.zone = self.name_to_zone(name)
         except ScriptError as e:
-            raise MapDetectionError(*e.args)
+            zone, confidence = self.zone_name_resolver.resolve(name)
+            if confidence < CONFIDENCE_LOW:
+                self.zone_name_save(name, zone, confidence)
+            if zone is None or confidence < CONFIDENCE_MIN:
+                raise MapDetectionError(*e.args)
+            # Zone name may be half-drawn while sliding in,
+            # accept low confidence results only if the same zone is resolved on two screenshots in a row.
+            if confidence < CONFIDENCE_LOW and (unconfirmed is None or zone != unconfirmed):
+                self.zone_unconfirmed = zone
+                raise MapDetectionError(f'Zone name resolved with low confidence, wait for confirm: {name} -> {zone}')
+            self.zone = zone
         logger.attr('Zone', self.zone)
         self.zone_config_set()
         return self.zone
 
+    @cached_property
+    def zone_name_resolver(self):
+        lang = self.config.SERVER if self.config.SERVER in ['en', 'jp', 'tw'] else 'cn'
+        return ZoneNameResolver(self.zones, lang=lang)
+
+    @cached_property
+    def zone_name_saved(self):
+        """
+        Returns:
+            set[str]: Processed OCR results that have screenshots saved.
+        """
+        return set()
+
+    def zone_name_save(self, name, zone, confidence):
+        """
+        Save screenshots of zone names that are resolved with low confidence, for tuning `MISREADS`.
+        Only the first screenshot of each misread is saved.
+
+        Args:
+            name (str): Processed OCR result.
+            zone (Zone): Resolved zone.
+            confidence (float):
+        """
+        if name in self.zone_name_saved:
+            logger.warning(f'Zone name resolved with low confidence: {name} -> {zone} ({confidence})')
+            return
+        self.zone_name_saved.add(name)
+        folder = './log/os_zone_name'
+        file = os.path.join(folder, f'{int(time.time() * 1000)}.png')
+        logger.warning(f'Zone name resolved with low confidence: {name} -> {zone} ({confidence}), '
+                       f'screenshot saved to {file}')
+        os.makedirs(folder, exist_ok=True)
+        save_image(self.device.image, file)
+
     def zone_config_set(self):
         if self.zone.region == 5:
             self.config.HOMO_EDGE_COLOR_RANGE = (0, 8)
@@ -185,6 +239,7 @@ class OSMapOperation(MapOrderHandler, MissionHandler, PortHandler, StorageHandle
             MapDetectionError: If failed to parse zone name.
         """
         logger.hr('Zone init')
+        self.zone_unconfirmed = None
         self.wait_os_map_buttons()
         logger.info('Get zone name')
         timeout = Timer(1.5, count=5).start()
@@ -35,6 +35,19 @@ class RadarGrid:
         'FL': 'is_fleet',
     }
 
+    # Colour checks, (area relative to center, color, threshold, count), see image_color_count()
+    # Radar.predict() runs them on all grids in batch.
+    COLOR_CHECKS = {
+        'enemy': ((-3, -3, 3, 3), (247, 89, 49), 221, 10),
+        'resource': ((-3, -3, 3, 3), (66, 231, 165), 221, 10),
+        'meowfficer': ((-3, 0, 3, 6), (33, 186, 255), 221, 10),
+        'exclamation': ((-3, -3, 3, 3), (255, 203, 49), 221, 10),
+        'boss': ((-3, -3, 3, 3), (147, 12, 8), 221, 10),
+        'port': ((-3, -3, 3, 3), (255, 255, 255), 235, 9),
+        'question': ((0, -7, 6, 0), (255, 255, 255), 235, 9),
+        'archive': ((-3, -3, 3, 3), (173, 113, 255), 235, 10),
+    }
+
     def __init__(self, location, image, center, config):
         """
         Args:
@@ -121,34 +134,39 @@ class RadarGrid:
         return np.sum(mask) >= count
 
     def predict_enemy(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(247, 89, 49), threshold=221, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['enemy'])
 
     def predict_resource(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(66, 231, 165), threshold=221, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['resource'])
 
     def predict_meowfficer(self):
-        return self.image_color_count(area=(-3, 0, 3, 6), color=(33, 186, 255), threshold=221, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['meowfficer'])
 
     def predict_exclamation(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(255, 203, 49), threshold=221, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['exclamation'])
 
     def predict_boss(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(147, 12, 8), threshold=221, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['boss'])
 
     def predict_port(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(255, 255, 255), threshold=235, count=9)
+        return self.image_color_count(*self.COLOR_CHECKS['port'])
 
     def predict_question(self):
-        return self.image_color_count(area=(0, -7, 6, 0), color=(255, 255, 255), threshold=235, count=9)
+        return self.image_color_count(*self.COLOR_CHECKS['question'])
 
     def predict_archive(self):
-        return self.image_color_count(area=(-3, -3, 3, 3), color=(173, 113, 255), threshold=235, count=10)
+        return self.image_color_count(*self.COLOR_CHECKS['archive'])
 
 
 class Radar:
     grids: dict
     center_loca = (0, 0)
     port_loca = (0, 0)
+    # Attributes predicted in batch, values are stored in `self.attrs`
+    PREDICT_ATTRS = [
+        'is_enemy', 'is_resource', 'is_meowfficer', 'is_exclamation', 'is_port', 'is_question', 'is_archive',
+        'is_ally', 'is_akashi', 'is_fleet',
+    ]
 
     def __init__(self, config, center=(1140, 226), delta=(11.7, 11.7), radius=5.15):
         """
@@ -174,6 +192,38 @@ class Radar:
                 grid_center = np.round(delta * (x, y) + center).astype(int)
                 self.grids[(x, y)] = RadarGrid(location=(x, y), image=None, center=grid_center, config=self.config)
 
+        self.grid_list = list(self.grids.values())
+        # Key: attribute name, such as 'is_enemy'. Value: np.ndarray of bool, in the order of `grid_list`
+        self.attrs = {attr: np.array([grid.__getattribute__(attr) for grid in self.grid_list], dtype=bool)
+                      for attr in self.PREDICT_ATTRS}
+        self._build_index()
+
+    def _build_index(self):
+        """
+        Pre-calculate where each colour check of each grid is,
+        so `predict()` sums the colour masks of all grids from one integral image.
+        """
+        centers = np.array([grid.center for grid in self.grid_list], dtype=int)
+        areas = np.array([area for area, _, _, _ in RadarGrid.COLOR_CHECKS.values()], dtype=int)
+        # Area to crop, covering all checks of all grids
+        self.region = (
+            int(centers[:, 0].min() + areas[:, 0].min()),
+            int(centers[:, 1].min() + areas[:, 1].min()),
+            int(centers[:, 0].max() + areas[:, 2].max()),
+            int(centers[:, 1].max() + areas[:, 3].max()),
+        )
+        # Key: check name. Value: (x1, y1, x2, y2), each is np.ndarray of all grids, relative to region
+        self.check_index = {}
+        for name, (area, _, _, _) in RadarGrid.COLOR_CHECKS.items():
+            x1, y1, x2, y2 = area
+            self.check_index[name] = (
+                centers[:, 0] + x1 - self.region[0],
+                centers[:, 1] + y1 - self.region[1],
+                centers[:, 0] + x2 - self.region[0],
+                centers[:, 1] + y2 - self.region[1],
+            )
+        self.fleet_index = np.array([grid.is_fleet for grid in self.grid_list], dtype=bool)
+
     def __iter__(self):
         return iter(self.grids.values())
 
@@ -192,6 +242,34 @@ class Radar:
             text = ' '.join([self[(x, y)].str if (x, y) in self else '  ' for x in range(*self.shape[0])])
             logger.info(text)
 
+    def predict_color_checks(self, image):
+        """
+        Run `RadarGrid.COLOR_CHECKS` on all grids.
+        Each (color, threshold) is calculated once on the radar region,
+        then pixel counts of each grid are read from the integral image.
+
+        Args:
+            image: Masked screenshot.
+
+        Returns:
+            dict: Key: check name, such as 'enemy'. Value: np.ndarray of bool, in the order of `grid_list`
+        """
+        region = crop(image, self.region, copy=False)
+        # Key: (color, threshold). Value: integral image of mask
+        integrals = {}
+        result = {}
+        for name, (_, color, threshold, count) in RadarGrid.COLOR_CHECKS.items():
+            key = (color, threshold)
+            integral = integrals.get(key)
+            if integral is None:
+                mask = (color_similarity_2d(region, color=color) > threshold).astype(np.uint8)
+                integral = cv2.integral(mask)
+                integrals[key] = integral
+            x1, y1, x2, y2 = self.check_index[name]
+            total = integral[y2, x2] - integral[y1, x2] - integral[y2, x1] + integral[y1, x1]
+            result[name] = total >= count
+        return result
+
     def predict(self, image):
         """
         Args:
@@ -201,10 +279,35 @@ class Radar:
 
         """
         image = MASK_RADAR.apply(image)
-        for grid in self:
+        checks = self.predict_color_checks(image)
+        # Same as RadarGrid.predict()
+        is_enemy = checks['enemy'] | checks['boss']
+        not_fleet = ~self.fleet_index
+        attrs = self.attrs
+        attrs['is_enemy'] = is_enemy & not_fleet
+        attrs['is_resource'] = checks['resource'] & not_fleet
+        attrs['is_meowfficer'] = checks['meowfficer'] & not_fleet
+        attrs['is_exclamation'] = checks['exclamation'] & not_fleet
+        attrs['is_port'] = checks['port'] & not_fleet
+        attrs['is_question'] = checks['question'] & not_fleet
+        attrs['is_archive'] = checks['archive'] & not_fleet
+        attrs['is_ally'] = np.zeros_like(is_enemy)
+        attrs['is_akashi'] = np.zeros_like(is_enemy)
+
+        for index, grid in enumerate(self.grid_list):
             grid.image = image
             grid.reset()
-            grid.predict()
+            grid.is_enemy = bool(attrs['is_enemy'][index])
+            grid.is_resource = bool(attrs['is_resource'][index])
+            grid.is_meowfficer = bool(attrs['is_meowfficer'][index])
+            grid.is_exclamation = bool(attrs['is_exclamation'][index])
+            grid.is_port = bool(attrs['is_port'][index])
+            grid.is_question = bool(attrs['is_question'][index])
+            if not grid.is_fleet:
+                grid.is_archive = bool(attrs['is_archive'][index])
+            if grid.is_enemy:
+                grid.enemy_genre = 'Enemy'
+
         # Fixup is_question near is_port
         for port in self.select(is_port=True):
             for grid in self.select(is_question=True):
@@ -212,6 +315,7 @@ class Radar:
                     logger.warning(f'Wrong radar prediction is_question {grid.location} {grid.encode()} '
                                    f'near {port.location} {port.encode()}')
                     grid.is_question = False
+                    attrs['is_question'][self.grid_list.index(grid)] = False
 
     def select(self, **kwargs):
         """
@@ -221,6 +325,13 @@ class Radar:
         Returns:
             SelectedGrids:
         """
+        if kwargs and all(k in self.attrs and isinstance(v, bool) for k, v in kwargs.items()):
+            # Query predicted arrays directly
+            flag = np.ones(len(self.grid_list), dtype=bool)
+            for k, v in kwargs.items():
+                flag &= self.attrs[k] == v
+            return SelectedGrids([self.grid_list[index] for index in np.flatnonzero(flag)])
+
         result = []
         for grid in self:
             flag = True
@@ -362,13 +473,10 @@ class Radar:
         Returns:
             RadarGrid: Or None if no objects
         """
-        objects = []
-        for grid in self:
-            if grid.is_port:
-                continue
-            if grid.is_enemy or grid.is_resource or grid.is_meowfficer \
-                    or grid.is_exclamation or grid.is_question or grid.is_archive:
-                objects.append(grid)
+        attrs = self.attrs
+        flag = (attrs['is_enemy'] | attrs['is_resource'] | attrs['is_meowfficer']
+                | attrs['is_exclamation'] | attrs['is_question'] | attrs['is_archive']) & ~attrs['is_port']
+        objects = [self.grid_list[index] for index in np.flatnonzero(flag)]
         objects = SelectedGrids(objects).sort_by_camera_distance((0, 0))
         if not objects:
             return None
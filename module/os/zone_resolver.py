@@ -0,0 +1,205 @@
+"""
+Resolve OCR results of OpSi zone names into zones.
+
+OCR misreads a few characters in zone names, such as 'nvcity' for 'nycity' and 'タフント' for 'タラント'.
+Known misreads are fixed in `get_zone_name()` first, names that still don't match any zone are matched
+under a weighted edit distance here, edits that OCR is known to make are cheap.
+Known edits are learned from the pairs in `MISREADS`, which mirror the fixes in `get_zone_name()`,
+so the same kind of misread in other zone names is resolved too.
+"""
+from module.logger import logger
+
+# Pairs of (OCR result, correct text), in the processed format of `get_zone_name()`
+MISREADS = {
+    'en': [
+        ('nvcity', 'nycity'),
+        ('cibraltar', 'gibraltar'),
+        ('pasage', 'passage'),
+        ('shef', 'shelf'),
+        ('nnocean', 'naocean'),
+        ('aocean', 'naocean'),
+    ],
+    'jp': [
+        # Kanji '一', '力' and '卜' are not used, while Katakana 'ー', 'カ' and 'ト' are misread as Kanji sometimes.
+        ('一', 'ー'),
+        ('力', 'カ'),
+        ('卜', 'ト'),
+        # Katakana 'ペ' may be misread as Hiragana 'ぺ'.
+        ('ぺ', 'ペ'),
+        ('ジブフルタル', 'ジブラルタル'),
+        ('タント', 'タラント'),
+        ('タフント', 'タラント'),
+        ('N海域', 'NA海域'),
+        ('リバプル', 'リバープール'),
+        ('リバープル', 'リバープール'),
+        ('リバプール', 'リバープール'),
+    ],
+    'cn': [],
+    'tw': [],
+}
+# Cost of edits learned from MISREADS, other edits cost 1
+CONFUSION_COST = 0.25
+# Results under this confidence are dropped
+CONFIDENCE_MIN = 0.6
+# Results under this confidence are accepted once resolved on two screenshots in a row,
+# and logged with screenshots saved for tuning
+CONFIDENCE_LOW = 0.9
+
+
+def align(source, target):
+    """
+    Levenshtein alignment.
+
+    Args:
+        source (str):
+        target (str):
+
+    Returns:
+        list[tuple[str, str]]: Edits to turn source into target,
+            (a, b) for substitution, (a, '') for deletion, ('', b) for insertion.
+    """
+    n, m = len(source), len(target)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        dp[i][0] = i
+    for j in range(m + 1):
+        dp[0][j] = j
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            dp[i][j] = min(
+                dp[i - 1][j] + 1,
+                dp[i][j - 1] + 1,
+                dp[i - 1][j - 1] + (source[i - 1] != target[j - 1]),
+            )
+
+    edits = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and dp[i][j] == dp[i - 1][j - 1] + (source[i - 1] != target[j - 1]):
+            if source[i - 1] != target[j - 1]:
+                edits.append((source[i - 1], target[j - 1]))
+            i, j = i - 1, j - 1
+        elif i > 0 and dp[i][j] == dp[i - 1][j] + 1:
+            edits.append((source[i - 1], ''))
+            i -= 1
+        else:
+            edits.append(('', target[j - 1]))
+            j -= 1
+    return edits[::-1]
+
+
+class ConfusionModel:
+    def __init__(self, misreads, cost=CONFUSION_COST):
+        """
+        Args:
+            misreads (list[tuple[str, str]]): Pairs of (OCR result, correct text).
+            cost (float): Cost of learned edits.
+        """
+        # Key: (OCR char, correct char), '' for missing or extra chars. Value: cost
+        self.edits = {}
+        for wrong, right in misreads:
+            for edit in align(wrong, right):
+                self.edits[edit] = cost
+
+    def substitute(self, a, b):
+        if a == b:
+            return 0.
+        return self.edits.get((a, b), 1.)
+
+    def delete(self, a):
+        """
+        Cost of an extra char `a` in OCR result.
+        """
+        return self.edits.get((a, ''), 1.)
+
+    def insert(self, b):
+        """
+        Cost of a char `b` missing in OCR result.
+        """
+        return self.edits.get(('', b), 1.)
+
+    def distance(self, source, target):
+        """
+        Weighted edit distance from OCR result to a correct text.
+
+        Args:
+            source (str): OCR result.
+            target (str):
+
+        Returns:
+            float:
+        """
+        prev = [0.]
+        for b in target:
+            prev.append(prev[-1] + self.insert(b))
+        for a in source:
+            delete = self.delete(a)
+            row = [prev[0] + delete]
+            for j, b in enumerate(target):
+                row.append(min(
+                    prev[j + 1] + delete,
+                    row[j] + self.insert(b),
+                    prev[j] + self.substitute(a, b),
+                ))
+            prev = row
+        return prev[-1]
+
+
+def normalize(name):
+    """
+    Args:
+        name (str):
+
+    Returns:
+        str: Same as `name_to_zone()` does, also removes chars that `get_zone_name()` removes.
+    """
+    name = str(name).replace(' ', '').lower()
+    name = name.replace('é', 'e').replace('.', '').replace('・', '')
+    return name
+
+
+class ZoneNameResolver:
+    def __init__(self, zones, lang):
+        """
+        Args:
+            zones (SelectedGrids): All zones.
+            lang (str): cn, en, jp, tw
+        """
+        self.lang = lang
+        self.model = ConfusionModel([(normalize(a), normalize(b)) for a, b in MISREADS.get(lang, [])])
+        # List of (normalized name, zone)
+        self.names = [(normalize(zone.__getattribute__(lang)), zone) for zone in zones]
+        # Key: OCR result. Value: (zone, confidence)
+        self.cache = {}
+
+    def _resolve(self, name):
+        name = normalize(name)
+        if not name:
+            return None, 0.
+        result = sorted([(self.model.distance(name, text), text, zone) for text, zone in self.names],
+                        key=lambda row: row[0])
+        best_cost, best_text, best = result[0]
+        # Zones like 'NA海域西南A' and 'NA海域西南B' are only 1 char away,
+        # confidence is low if another zone is close.
+        second = result[1][0] if len(result) > 1 else best_cost + 1.
+        margin = min(second - best_cost, 1.)
+        similarity = max(1. - best_cost / max(len(name), len(best_text), 1), 0.)
+        return best, round(similarity * margin, 3)
+
+    def resolve(self, name):
+        """
+        Args:
+            name (str): OCR result, processed by `get_zone_name()`
+
+        Returns:
+            Zone: The nearest zone, or None if name is empty.
+            float: Confidence from 0 to 1.
+        """
+        try:
+            return self.cache[name]
+        except KeyError:
+            pass
+        result = self._resolve(name)
+        logger.attr('Zone_resolve', f'{name} -> {result[0]} ({result[1]})')
+        self.cache[name] = result
+        return result
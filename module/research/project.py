@@ -1,8 +1,7 @@
 from datetime import timedelta
 
-from scipy import signal
-
 from module.base.decorator import cached_property
+from module.base.lazy import lazy_import
 from module.base.utils import *
 from module.device.method.utils import remove_suffix
 from module.logger import logger
@@ -12,6 +11,8 @@ from module.research.project_data import LIST_RESEARCH_PROJECT
 from module.research.series import get_detail_series, get_research_series_3
 from module.statistics.utils import *
 
+signal = lazy_import('scipy.signal')
+
 RESEARCH_SERIES = (SERIES_1, SERIES_2, SERIES_3, SERIES_4, SERIES_5)
 RESEARCH_STATUS = [STATUS_1, STATUS_2, STATUS_3, STATUS_4, STATUS_5]
 OCR_RESEARCH = [OCR_RESEARCH_1, OCR_RESEARCH_2, OCR_RESEARCH_3, OCR_RESEARCH_4, OCR_RESEARCH_5]
@@ -397,6 +398,26 @@ def research_detect(image):
     return projects
 
 
+def build_research_project_index():
+    """
+    Index LIST_RESEARCH_PROJECT, so projects can be looked up without scanning the whole list.
+    Values are lists in the order of LIST_RESEARCH_PROJECT, same as what a linear scan yields.
+
+    Returns:
+        dict: Key: (series, name), such as (4, 'D-057-UL'). Value: list[dict]
+        dict: Key: (series, name without suffix), such as (4, 'D-057'). Value: list[dict]
+    """
+    index = {}
+    index_loose = {}
+    for data in LIST_RESEARCH_PROJECT:
+        index.setdefault((data['series'], data['name']), []).append(data)
+        index_loose.setdefault((data['series'], data['name'].rstrip('MIRFUL-')), []).append(data)
+    return index, index_loose
+
+
+RESEARCH_PROJECT_INDEX, RESEARCH_PROJECT_INDEX_LOOSE = build_research_project_index()
+
+
 class ResearchProject:
     REGEX_SHIP = re.compile(
         '('
@@ -583,31 +604,25 @@ class ResearchProject:
         Yields:
             dict:
         """
-        for data in LIST_RESEARCH_PROJECT:
-            if (data['series'] == series) and (data['name'] == name):
-                yield data
+        yield from RESEARCH_PROJECT_INDEX.get((series, name), [])
 
         if len(name) and name[0].isdigit():
             for t in 'QGE':
                 name1 = f'{t}-{self.name}'
                 logger.info(f'Testing the most similar candidate {name1}')
-                for data in LIST_RESEARCH_PROJECT:
-                    if (data['series'] == series) and (data['name'] == name1):
-                        self.name = name1
-                        yield data
+                for data in RESEARCH_PROJECT_INDEX.get((series, name1), []):
+                    self.name = name1
+                    yield data
 
         if name.startswith('D'):
             # Letter 'C' may recognized as 'D', because project card is shining.
             name1 = 'C' + self.name[1:]
-            for data in LIST_RESEARCH_PROJECT:
-                if (data['series'] == series) and (data['name'] == name1):
-                    self.name = name1
-                    yield data
-
-        for data in LIST_RESEARCH_PROJECT:
-            if (data['series'] == series) and (data['name'].rstrip('MIRFUL-') == name.rstrip('MIRFUL-')):
+            for data in RESEARCH_PROJECT_INDEX.get((series, name1), []):
+                self.name = name1
                 yield data
 
+        yield from RESEARCH_PROJECT_INDEX_LOOSE.get((series, name.rstrip('MIRFUL-')), [])
+
         return False
 
     @cached_property
@@ -10,7 +10,7 @@ import numpy as np
 
 import module.config.server as server
 from module.base.button import ButtonGrid
-from module.base.utils import (color_similar, crop, extract_letters, get_color,
+from module.base.utils import (color_similar, crop, extract_letters, get_color_batch,
                                image_color_count, limit_in,
                                random_normal_distribution_int,
                                random_rectangle_point)
@@ -307,8 +307,8 @@ class RarityScanner(Scanner):
             return 'unknown'
 
     def _scan(self, image) -> List:
-        return [self.color_to_rarity(get_color(image, button.area))
-                for button in self.grids.buttons]
+        colors = get_color_batch(image, [button.area for button in self.grids.buttons])
+        return [self.color_to_rarity(color) for color in colors]
 
     def limit_value(self, value) -> str:
         return value if value in self.value_list else 'any'
@@ -1,14 +1,20 @@
+import atexit
+import hashlib
 import threading
 import io
 import json
 import os
 import time
+from collections import deque
 
+import numpy as np
 import requests
 from PIL import Image
 from requests.adapters import HTTPAdapter
 
-from module.base.utils import save_image
+from deploy.atomic import atomic_failure_cleanup, atomic_read_bytes, atomic_read_text, atomic_remove, \
+    atomic_write, random_id
+from module.base.decorator import cached_property
 from module.config.config import AzurLaneConfig
 from module.config.deep import deep_get
 from module.exception import ScriptError
@@ -81,6 +87,439 @@ class DropImage:
                              save=self.save, upload=self.upload, info=self.info)
 
 
+def encode_png(image):
+    """
+    Args:
+        image (np.ndarray):
+
+    Returns:
+        bytes: Image in png format.
+    """
+    output = io.BytesIO()
+    Image.fromarray(image, mode='RGB').save(output, format='png')
+    return output.getvalue()
+
+
+def upload_image(session, api, user_agent, data, filename, timeout=20):
+    """
+    Args:
+        session (requests.Session):
+        api (str): Upload url.
+        user_agent (str):
+        data (bytes): Image in png format.
+        filename (str): 'xxx.png'
+        timeout (int, float):
+
+    Returns:
+        bool: If success
+    """
+    files = {'file': (filename, io.BytesIO(data), 'image/png')}
+    headers = {'user-agent': user_agent}
+    try:
+        resp = session.post(api, files=files, headers=headers, timeout=timeout)
+    except Exception as e:
+        logger.warning(f'Image upload failed, {e}')
+        return False
+
+    if resp.status_code == 200:
+        # print(resp.text)
+        try:
+            info = json.loads(resp.text)
+        except json.JSONDecodeError:
+            info = {}
+
+        # Lsky response
+        status = deep_get(info, keys='status', default=None)
+        if status is not None:
+            if status:
+                md5 = deep_get(info, keys='data.md5', default='')
+                logger.info(f'Image upload success, md5: {md5}')
+                return True
+            else:
+                message = deep_get(info, keys='message', default='')
+                logger.warning(f'Image upload failed, message: {message}')
+                return False
+
+        # Imgurl response
+        code = deep_get(info, keys='code', default=None)
+        if code is not None:
+            if code == 200:
+                imgid = deep_get(info, keys='imgid', default='')
+                logger.info(f'Image upload success, imgid: {imgid}')
+                return True
+            elif code == 0:
+                msg = deep_get(info, keys='msg', default='')
+                logger.warning(f'Image upload failed, msg: {msg}')
+                return False
+
+    logger.warning(f'Image upload failed, unexpected server returns, '
+                   f'status_code: {resp.status_code}, returns: {resp.text[:500]}')
+    return False
+
+
+class DropSpool:
+    """
+    Drop records on disk, waiting to be saved or uploaded by `DropSpoolWorker`.
+
+    A record is two files:
+        <id>.npy: Packed image as raw numpy array, so committing doesn't pay for png encoding.
+        <id>.json: Metadata, written after the image. A record exists only if its metadata exists.
+    Both are written by `atomic_write()`, records that are not delivered yet survive process exits.
+    """
+    HISTORY = 'history.json'
+    # Amount of delivered image hashes to keep for deduplication
+    HISTORY_SIZE = 200
+
+    def __init__(self, folder, limit=0):
+        """
+        Args:
+            folder (str):
+            limit (int): Max pending records, oldest records are removed when exceeded. 0 for no limit.
+        """
+        self.folder = folder
+        self.limit = limit
+
+    def file(self, record_id, ext):
+        return os.path.join(self.folder, f'{record_id}{ext}')
+
+    def put(self, image, meta):
+        """
+        Args:
+            image (np.ndarray):
+            meta (dict): genre, filename, save, save_folder, upload, api, user_agent
+
+        Returns:
+            str: Record id, ordered by commit time.
+        """
+        record_id = f'{int(time.time() * 1000)}_{random_id()}'
+        output = io.BytesIO()
+        np.save(output, image, allow_pickle=False)
+        atomic_write(self.file(record_id, '.npy'), output.getvalue())
+        meta = dict(meta, id=record_id, attempt=0, next_try=0)
+        atomic_write(self.file(record_id, '.json'), json.dumps(meta, indent=2))
+        self.trim()
+        return record_id
+
+    def record_ids(self):
+        """
+        Returns:
+            list[str]: Id of pending records, oldest first.
+        """
+        try:
+            files = os.listdir(self.folder)
+        except FileNotFoundError:
+            return []
+        return sorted(file[:-5] for file in files if file.endswith('.json') and file != self.HISTORY)
+
+    def trim(self):
+        """
+        Remove oldest records if there are more than `limit`.
+        """
+        if not self.limit:
+            return
+        record_ids = self.record_ids()
+        for record_id in record_ids[:-self.limit]:
+            logger.warning(f'Drop record spool is full, limit={self.limit}, remove oldest record {record_id}')
+            self.remove({'id': record_id})
+
+    def records(self):
+        """
+        Returns:
+            list[dict]: Metadata of pending records, oldest first.
+        """
+        out = []
+        for record_id in self.record_ids():
+            try:
+                text = atomic_read_text(self.file(record_id, '.json'))
+                if not text:
+                    # Removed by trim() in the meantime
+                    continue
+                out.append(json.loads(text))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Failed to read drop record {record_id}.json, {e}')
+        return out
+
+    def count(self):
+        """
+        Returns:
+            int: Number of pending records.
+        """
+        return len(self.record_ids())
+
+    def load(self, meta):
+        """
+        Args:
+            meta (dict):
+
+        Returns:
+            np.ndarray:
+        """
+        data = atomic_read_bytes(self.file(meta['id'], '.npy'))
+        return np.load(io.BytesIO(data), allow_pickle=False)
+
+    def update(self, meta):
+        atomic_write(self.file(meta['id'], '.json'), json.dumps(meta, indent=2))
+
+    def remove(self, meta):
+        # Metadata first, a record without metadata is an orphan image
+        atomic_remove(self.file(meta['id'], '.json'))
+        atomic_remove(self.file(meta['id'], '.npy'))
+
+    def cleanup(self):
+        """
+        Remove temp files and images without metadata, which are left if process exits while committing.
+        Should be called before any commit in this process.
+        """
+        if not os.path.exists(self.folder):
+            return
+        atomic_failure_cleanup(self.folder)
+        files = os.listdir(self.folder)
+        for file in files:
+            name, ext = os.path.splitext(file)
+            if ext == '.npy' and f'{name}.json' not in files:
+                logger.info(f'Remove orphan drop record image: {file}')
+                atomic_remove(os.path.join(self.folder, file))
+
+    @cached_property
+    def history(self):
+        """
+        Returns:
+            list[str]: Hash of delivered images, oldest first.
+        """
+        try:
+            text = atomic_read_text(os.path.join(self.folder, self.HISTORY))
+            # Empty if file not exist
+            return json.loads(text) if text else []
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to read drop record history, {e}')
+            return []
+
+    def history_add(self, digest):
+        self.history.append(digest)
+        del self.history[:-self.HISTORY_SIZE]
+        atomic_write(os.path.join(self.folder, self.HISTORY), json.dumps(self.history))
+
+
+class DropSpoolWorker:
+    """
+    Background thread that delivers records in `DropSpool`.
+
+    Images from `put()` are kept in memory and written to spool by the worker, so committing doesn't block.
+    Images still in memory are written to spool at exit.
+    Records are handled in batches, every `interval` seconds or once `batch` records are pending.
+    Uploads in a batch share one HTTP session.
+    Failed records are retried with exponential backoff, and removed after `attempt_max` failures.
+    """
+
+    def __init__(self, spool, batch=10, interval=10, backoff=10, backoff_max=3600, attempt_max=0, timeout=20):
+        """
+        Args:
+            spool (DropSpool):
+            batch (int): Max records to handle in one batch.
+            interval (int, float): Seconds between batches.
+            backoff (int, float): Seconds to wait after the first failure, doubled on each failure.
+            backoff_max (int, float):
+            attempt_max (int): Max delivery attempts of a record, 0 for no limit.
+            timeout (int, float): Upload timeout.
+        """
+        self.spool = spool
+        self.batch = batch
+        self.interval = interval
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.attempt_max = attempt_max
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending = deque()
+        self.notify = threading.Event()
+
+        self.spool.cleanup()
+        self.thread = threading.Thread(target=self._work, name='DropSpoolWorker', daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        self.notify.set()
+
+    def put(self, image, meta):
+        """
+        Add a record, it's written to spool by worker thread.
+
+        Args:
+            image (np.ndarray):
+            meta (dict): genre, filename, save, save_folder, upload, api, user_agent
+        """
+        self.pending.append((image, meta))
+        self.wake()
+
+    def flush(self):
+        """
+        Write records in memory to spool on the current thread.
+        """
+        with self.pending_lock:
+            while self.pending:
+                image, meta = self.pending.popleft()
+                try:
+                    self.spool.put(image, meta)
+                except Exception as e:
+                    logger.warning(f'Failed to add drop record to spool, {e}')
+
+    def _work(self):
+        last = 0
+        while 1:
+            self.notify.wait(timeout=self.interval)
+            self.notify.clear()
+            try:
+                self.flush()
+                now = time.time()
+                if self.spool.count() < self.batch and now - last < self.interval:
+                    # Deliver once a batch is full or at the next interval
+                    continue
+                last = now
+                while self.deliver() >= self.batch:
+                    # Full batch, more records may be due
+                    continue
+            except Exception as e:
+                logger.exception(e)
+
+    def retry_delay(self, attempt):
+        """
+        Args:
+            attempt (int): Failed attempts.
+
+        Returns:
+            float: Seconds to wait before next attempt.
+        """
+        return min(self.backoff * 2 ** (attempt - 1), self.backoff_max)
+
+    def session(self):
+        session = requests.Session()
+        session.trust_env = False
+        session.mount('http://', HTTPAdapter(max_retries=2))
+        session.mount('https://', HTTPAdapter(max_retries=2))
+        return session
+
+    def deliver(self, now=None):
+        """
+        Handle one batch of due records.
+
+        Args:
+            now (float): Timestamp.
+
+        Returns:
+            int: Number of records handled, no matter success or not.
+        """
+        with self.lock:
+            if now is None:
+                now = time.time()
+            records = [meta for meta in self.spool.records() if meta.get('next_try', 0) <= now][:self.batch]
+            if not records:
+                return 0
+
+            logger.info(f'Drop record delivery, amount={len(records)}')
+            session = None
+            handled = 0
+            for meta in records:
+                if meta.get('upload') and session is None:
+                    session = self.session()
+                result = self.deliver_record(meta, session=session)
+                handled += 1
+                if result is None:
+                    # Server unreachable, leave the rest to next batch
+                    break
+            if session is not None:
+                session.close()
+            return handled
+
+    def deliver_record(self, meta, session=None):
+        """
+        Args:
+            meta (dict):
+            session (requests.Session):
+
+        Returns:
+            bool: If record is delivered and removed from spool.
+                None if upload failed, the rest uploads are likely to fail too.
+        """
+        try:
+            image = self.spool.load(meta)
+        except (OSError, ValueError) as e:
+            logger.warning(f'Drop record {meta["id"]} is broken, removed, {e}')
+            self.spool.remove(meta)
+            return False
+
+        digest = hashlib.md5(image.tobytes() + meta['genre'].encode()).hexdigest()
+        if digest in self.spool.history:
+            logger.info(f'Drop record {meta["id"]} is a duplicate, skipped')
+            self.spool.remove(meta)
+            return True
+
+        data = encode_png(image)
+        failed = False
+        if meta.get('save'):
+            try:
+                folder = os.path.join(meta['save_folder'], meta['genre'])
+                file = os.path.join(folder, meta['filename'])
+                atomic_write(file, data)
+                logger.info(f'Image save success, file: {file}')
+                meta['save'] = False
+            except Exception as e:
+                logger.exception(e)
+                failed = True
+        unreachable = False
+        if meta.get('upload'):
+            if upload_image(session, api=meta['api'], user_agent=meta['user_agent'],
+                            data=data, filename=meta['filename'], timeout=self.timeout):
+                meta['upload'] = False
+            else:
+                failed = unreachable = True
+
+        if not failed:
+            self.spool.history_add(digest)
+            self.spool.remove(meta)
+            return True
+
+        meta['attempt'] = meta.get('attempt', 0) + 1
+        if self.attempt_max and meta['attempt'] >= self.attempt_max:
+            logger.warning(f'Drop record {meta["id"]} delivery failed {meta["attempt"]} times, removed')
+            self.spool.remove(meta)
+            return None if unreachable else False
+        delay = self.retry_delay(meta['attempt'])
+        meta['next_try'] = time.time() + delay
+        self.spool.update(meta)
+        logger.warning(f'Drop record {meta["id"]} delivery failed, attempt {meta["attempt"]}, '
+                       f'retry in {int(delay)}s')
+        return None if unreachable else False
+
+
+_workers = {}
+_workers_lock = threading.Lock()
+
+
+def drop_spool_worker(folder, **kwargs):
+    """
+    Args:
+        folder (str): Spool folder.
+        **kwargs: Arguments of `DropSpoolWorker`.
+
+    Returns:
+        DropSpoolWorker: One worker per spool folder in this process, started at first call.
+    """
+    folder = os.path.abspath(folder)
+    with _workers_lock:
+        worker = _workers.get(folder)
+        if worker is None:
+            limit = kwargs.pop('limit', 0)
+            worker = DropSpoolWorker(DropSpool(folder, limit=limit), **kwargs)
+            _workers[folder] = worker
+            # Write records in memory before exit
+            # atexit is not called in multiprocessing children, they run util finalizers instead
+            atexit.register(worker.flush)
+            from multiprocessing import util
+            util.Finalize(None, worker.flush, exitpriority=100)
+        return worker
+
+
 class AzurStats:
     TIMEOUT = 20
 
@@ -108,90 +547,41 @@ class AzurStats:
     def _user_agent(self):
         return f'Alas ({str(self.config.DropRecord_AzurStatsID)})'
 
-    def _upload(self, image, genre, filename):
-        """
-        Args:
-            image: Image to upload.
-            genre (str):
-            filename (str): 'xxx.png'
+    @property
+    def spool_folder(self):
+        # Each instance has its own spool, so workers of different processes won't compete
+        return os.path.join(self.config.DROP_SPOOL_FOLDER, self.config.config_name)
 
+    @property
+    def worker(self):
+        """
         Returns:
-            bool: If success
+            DropSpoolWorker:
         """
-        output = io.BytesIO()
-        Image.fromarray(image, mode='RGB').save(output, format='png')
-        output.seek(0)
-
-        data = {'file': (filename, output, 'image/png')}
-        headers = {'user-agent': self._user_agent}
-        session = requests.Session()
-        session.trust_env = False
-        session.mount('http://', HTTPAdapter(max_retries=5))
-        session.mount('https://', HTTPAdapter(max_retries=5))
-        try:
-            resp = session.post(self._api, files=data,
-                                headers=headers, timeout=self.TIMEOUT)
-        except Exception as e:
-            logger.warning(f'Image upload failed, {e}')
-            return False
-
-        if resp.status_code == 200:
-            # print(resp.text)
-            info = json.loads(resp.text)
-
-            # Lsky response
-            status = deep_get(info, keys='status', default=None)
-            if status is not None:
-                if status:
-                    md5 = deep_get(info, keys='data.md5', default='')
-                    logger.info(f'Image upload success, md5: {md5}')
-                    return True
-                else:
-                    message = deep_get(info, keys='message', default='')
-                    logger.warning(f'Image upload failed, message: {message}')
-                    return False
-
-            # Imgurl response
-            code = deep_get(info, keys='code', default=None)
-            if code is not None:
-                if code == 200:
-                    imgid = deep_get(info, keys='imgid', default='')
-                    logger.info(f'Image upload success, imgid: {imgid}')
-                    return True
-                elif code == 0:
-                    msg = deep_get(info, keys='msg', default='')
-                    logger.warning(f'Image upload failed, msg: {msg}')
-                    return False
-
-        logger.warning(f'Image upload failed, unexpected server returns, '
-                       f'status_code: {resp.status_code}, returns: {resp.text[:500]}')
-        return False
-
-    def _save(self, image, genre, filename):
+        return drop_spool_worker(
+            self.spool_folder,
+            batch=self.config.DROP_SPOOL_BATCH,
+            interval=self.config.DROP_SPOOL_INTERVAL,
+            backoff=self.config.DROP_SPOOL_BACKOFF,
+            backoff_max=self.config.DROP_SPOOL_BACKOFF_MAX,
+            attempt_max=self.config.DROP_SPOOL_ATTEMPT_MAX,
+            limit=self.config.DROP_SPOOL_LIMIT,
+            timeout=self.TIMEOUT,
+        )
+
+    def resume(self):
         """
-        Args:
-            image: Image to save.
-            genre (str): Name of sub folder.
-            filename (str): 'xxx.png'
-
-        Returns:
-            bool: If success
+        Start delivering records left by the last run.
         """
-        try:
-            folder = os.path.join(
-                str(self.config.DropRecord_SaveFolder), genre)
-            os.makedirs(folder, exist_ok=True)
-            file = os.path.join(folder, filename)
-            save_image(image, file)
-            logger.info(f'Image save success, file: {file}')
-            return True
-        except Exception as e:
-            logger.exception(e)
-
-        return False
+        count = DropSpool(self.spool_folder).count()
+        if count:
+            logger.info(f'Resume drop record delivery, amount={count}')
+            self.worker.wake()
 
     def commit(self, images, genre, save=False, upload=False, info=''):
         """
+        Add images to spool worker, they will be saved or uploaded in background.
+
         Args:
             images (list): List of images in numpy array.
             genre (str):
@@ -208,6 +598,10 @@ class AzurStats:
         save, upload = bool(save), bool(upload)
         logger.info(
             f'Drop record commit, genre={genre}, amount={len(images)}, save={save}, upload={upload}')
+        # Set DROP_SPOOL_UPLOAD=True if stats service re-run in the future
+        upload = upload and self.config.DROP_SPOOL_UPLOAD
+        if not save and not upload:
+            return False
         image = pack(images)
         now = int(time.time() * 1000)
 
@@ -216,17 +610,14 @@ class AzurStats:
         else:
             filename = f'{now}.png'
 
+        meta = {'genre': str(genre), 'filename': filename, 'save': save, 'upload': upload}
         if save:
-            save_thread = threading.Thread(
-                target=self._save, args=(image, genre, filename))
-            save_thread.start()
-
-        # Uncomment these if stats service re-run in the future
-        # if upload:
-        #     upload_thread = threading.Thread(
-        #         target=self._upload, args=(image, genre, filename))
-        #     upload_thread.start()
-
+            meta['save_folder'] = str(self.config.DropRecord_SaveFolder)
+        if upload:
+            meta['api'] = self._api
+            meta['user_agent'] = self._user_agent
+        # Written to spool by worker thread, combat flow doesn't wait for disk
+        self.worker.put(image, meta)
         return True
 
     def new(self, genre, method='do_not', info=''):
@@ -41,6 +41,19 @@ class CampaignBonusStatistics(GetItemsStatistics):
             list[Item]:
         """
         result = super().stats_get_items(image, **kwargs)
+        return self.revise_items(result)
+
+    def revise_items(self, result):
+        """
+        Args:
+            result (list[Item]): Items with names.
+
+        Returns:
+            list[Item]:
+
+        Raises:
+            ImageError: If campaign bonus is invalid.
+        """
         valid = False
         valid_coin = False
         for item in result:
@@ -1,19 +1,54 @@
 import csv
+import hashlib
+import json
+import multiprocessing
 import shutil
+import traceback
 
 from tqdm import tqdm
 
-from module.base.decorator import cached_property
-from module.base.utils import load_image
+from deploy.atomic import atomic_write
+from module.base.decorator import cached_property, del_cached_property
+from module.base.utils import load_image, save_image
 from module.logger import logger
 from module.ocr.al_ocr import AlOcr
 from module.ocr.ocr import Ocr
 from module.statistics.battle_status import BattleStatusStatistics
 from module.statistics.campaign_bonus import CampaignBonusStatistics
-from module.statistics.get_items import GetItemsStatistics
+from module.statistics.get_items import ITEM_GROUP, GetItemsStatistics
 from module.statistics.utils import *
 
 
+def file_hash(file):
+    """
+    Returns:
+        str: sha1 of file content
+    """
+    with open(file, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+# DropStatistics object in worker processes, created once per worker
+_worker = None
+
+
+def _worker_init(config):
+    """
+    Args:
+        config (dict): Class attributes of DropStatistics in the main process,
+            they are not inherited on Windows where processes are spawned.
+    """
+    global _worker
+    for key, value in config.items():
+        setattr(DropStatistics, key, value)
+    _worker = DropStatistics()
+
+
+def _worker_run(args):
+    method, file = args
+    return getattr(_worker, method)(file)
+
+
 class DropStatistics:
     DROP_FOLDER = './screenshots'
     TEMPLATE_FOLDER = 'item_templates'
@@ -22,6 +57,8 @@ class DropStatistics:
     CSV_FILE = 'drop_result.csv'
     CSV_OVERWRITE = True
     CSV_ENCODING = 'utf-8'
+    PROCESSES = 1
+    MANIFEST_FILE = ''
 
     def __init__(self):
         AlOcr.CNOCR_CONTEXT = DropStatistics.CNOCR_CONTEXT
@@ -33,6 +70,8 @@ class DropStatistics:
         self.get_items = GetItemsStatistics()
         self.campaign_bonus = CampaignBonusStatistics()
         self.get_items.load_template_folder(self.template_folder)
+        # Templates loaded from folder, names not in it are auto-increased IDs given in this run
+        self.known_templates = set(ITEM_GROUP.templates.keys())
 
     @property
     def template_folder(self):
@@ -57,17 +96,34 @@ class DropStatistics:
                 os.remove(self.csv_file)
         return True
 
-    def parse_template(self, file):
+    def parse_template(self, file, folder=None):
         """
         Extract template from a single file.
         New templates will be given an auto-increased ID.
+
+        Args:
+            file (str):
+            folder (str): Folder to save new templates, default to template_folder.
         """
+        if folder is None:
+            folder = self.template_folder
         images = unpack(load_image(file))
         for image in images:
             if self.get_items.appear_on(image):
-                self.get_items.extract_template(image, folder=self.template_folder)
+                self.get_items.extract_template(image, folder=folder)
             if self.campaign_bonus.appear_on(image):
-                self.campaign_bonus.extract_template(image, folder=self.template_folder)
+                self.campaign_bonus.extract_template(image, folder=folder)
+
+    @staticmethod
+    def file_info(file):
+        """
+        Returns:
+            str: timestamp
+            str: campaign
+        """
+        ts = os.path.splitext(os.path.basename(file))[0]
+        campaign = os.path.basename(os.path.abspath(os.path.join(file, '../')))
+        return ts, campaign
 
     def parse_drop(self, file):
         """
@@ -79,8 +135,7 @@ class DropStatistics:
         Yields:
             list: [timestamp, campaign, enemy_name, drop_type, item, amount]
         """
-        ts = os.path.splitext(os.path.basename(file))[0]
-        campaign = os.path.basename(os.path.abspath(os.path.join(file, '../')))
+        ts, campaign = self.file_info(file)
         images = unpack(load_image(file))
         enemy_name = 'unknown'
         for image in images:
@@ -93,6 +148,249 @@ class DropStatistics:
                 for item in self.campaign_bonus.stats_get_items(image):
                     yield [ts, campaign, enemy_name, 'CAMPAIGN_BONUS', item.name, item.amount]
 
+    def load_items(self, file, template=False):
+        """
+        Load items from a single file without giving names.
+        Names depend on template hit counts, so they are given in the main process in the order of files,
+        worker processes only do the heavy work.
+
+        Args:
+            file (str):
+            template (bool): True to load items for template extraction, False for drops.
+
+        Yields:
+            str: drop_type, 'GET_ITEMS' or 'CAMPAIGN_BONUS'
+            str: enemy_name
+            list[tuple[Item, dict]]: Items and results of `ItemGrid.match_template_all()`
+            float: Similarity used to match items
+        """
+        images = unpack(load_image(file))
+        enemy_name = 'unknown'
+        for image in images:
+            if not template and self.battle_status.appear_on(image):
+                enemy_name = self.battle_status.stats_battle_status(image)
+            for drop_type, stats in [('GET_ITEMS', self.get_items), ('CAMPAIGN_BONUS', self.campaign_bonus)]:
+                if not stats.appear_on(image):
+                    continue
+                stats._stats_get_items_load(image)
+                if ITEM_GROUP.grids is None:
+                    continue
+                if template:
+                    ITEM_GROUP._load_image(image)
+                    similarity = ITEM_GROUP.extract_similarity
+                else:
+                    ITEM_GROUP.predict(image, name=False)
+                    similarity = ITEM_GROUP.similarity
+                items = []
+                for item in ITEM_GROUP.items:
+                    # Screenshot is no longer needed after cropping, don't send it between processes
+                    item.image_raw = None
+                    item._button = None
+                    items.append((item, ITEM_GROUP.match_template_all(item.image, similarity=similarity)))
+                yield drop_type, enemy_name, items, similarity
+
+    @staticmethod
+    def _run(func):
+        """
+        Returns:
+            tuple[str, Any]: ('ok', result of func), ('warning', message) on ImageError,
+                ('error', traceback) on other exceptions.
+        """
+        try:
+            return 'ok', func()
+        except ImageError as e:
+            return 'warning', str(e)
+        except Exception:
+            return 'error', traceback.format_exc()
+
+    def run_template(self, file):
+        """
+        Extract templates from a single file, errors are caught.
+        """
+        return self._run(lambda: self.parse_template(file))
+
+    def run_drop(self, file):
+        """
+        Parse a single file, errors are caught.
+
+        Returns:
+            tuple[str, Any]: ('ok', list of rows) or error, see `_run()`.
+        """
+        return self._run(lambda: list(self.parse_drop(file)))
+
+    def run_items(self, file, template=False):
+        """
+        Load items from a single file, errors are caught.
+
+        Returns:
+            list: Results of `load_items()`, items loaded before the error are kept,
+                they still need names to keep hit counts the same as running in serial.
+            tuple[str, Any]: ('ok', None) or error, see `_run()`.
+        """
+        sections = []
+
+        def load():
+            for section in self.load_items(file, template=template):
+                sections.append(section)
+
+        return sections, self._run(load)
+
+    def run_template_items(self, file):
+        return self.run_items(file, template=True)
+
+    def run_drop_items(self, file):
+        return self.run_items(file, template=False)
+
+    @cached_property
+    def pool(self):
+        """
+        Worker processes, each loads templates and OCR models once.
+        Created on first use and shared by all campaigns.
+        """
+        config = {
+            'DROP_FOLDER': DropStatistics.DROP_FOLDER,
+            'TEMPLATE_FOLDER': DropStatistics.TEMPLATE_FOLDER,
+            'CNOCR_CONTEXT': DropStatistics.CNOCR_CONTEXT,
+        }
+        logger.info(f'Starting {DropStatistics.PROCESSES} worker processes')
+        return multiprocessing.Pool(DropStatistics.PROCESSES, initializer=_worker_init, initargs=(config,))
+
+    def close(self):
+        """
+        Stop worker processes.
+        """
+        if 'pool' in self.__dict__:
+            self.pool.close()
+            self.pool.join()
+            del_cached_property(self, 'pool')
+
+    def _map(self, method, files):
+        """
+        Run `method` on files, in worker processes if PROCESSES > 1.
+
+        Args:
+            method (str): 'run_template', 'run_drop', or 'run_template_items', 'run_drop_items' in parallel
+            files (list[str]):
+
+        Yields:
+            tuple[str, Any]: Results in the order of files.
+        """
+        if DropStatistics.PROCESSES > 1 and len(files) > 1:
+            # Workers take continuous chunks, so each worker meets the files in the original order
+            chunksize = max(1, min(16, len(files) // (DropStatistics.PROCESSES * 4)))
+            yield from self.pool.imap(_worker_run, [(method, file) for file in files], chunksize=chunksize)
+        else:
+            func = getattr(self, method)
+            for file in files:
+                yield func(file)
+
+    @property
+    def manifest_file(self):
+        return os.path.join(self.template_folder, DropStatistics.MANIFEST_FILE)
+
+    @cached_property
+    def manifest(self):
+        """
+        Processed files, so reruns only handle new screenshots.
+        Stored in template folder, removing the folder also resets the manifest.
+
+        Returns:
+            dict:
+                'template': list of file hashes that templates have been extracted from.
+                'signature': hash of template folder when drops were parsed.
+                'drop': Key: file hash, value: rows without timestamp and campaign.
+        """
+        manifest = {'template': [], 'signature': '', 'drop': {}}
+        if DropStatistics.MANIFEST_FILE and os.path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                    manifest.update(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f'Failed to read manifest {self.manifest_file}: {e}')
+        manifest['template'] = set(manifest['template'])
+        return manifest
+
+    def manifest_save(self):
+        if not DropStatistics.MANIFEST_FILE:
+            return
+        data = dict(self.manifest)
+        data['template'] = sorted(data['template'])
+        atomic_write(self.manifest_file, json.dumps(data, ensure_ascii=False))
+
+    def template_signature(self):
+        """
+        Returns:
+            str: Hash of template names and contents. Renaming templates invalidates cached drops.
+        """
+        sha1 = hashlib.sha1()
+        for name, file in sorted(load_folder(self.template_folder).items()):
+            sha1.update(name.encode('utf-8'))
+            sha1.update(file_hash(file).encode('utf-8'))
+        return sha1.hexdigest()
+
+    def merge_template(self, sections, result):
+        """
+        Give names to items loaded by worker processes, in the order of files,
+        so new templates get the same auto-increased IDs as running in serial.
+
+        Args:
+            sections (list): Results of `load_items()`
+            result (tuple[str, Any]): Result of `run_items()`
+
+        Returns:
+            tuple[str, Any]: Same as `run_template()`
+        """
+        for _, _, items, similarity in sections:
+            # Same as ItemGrid.extract_template()
+            prev = set(ITEM_GROUP.templates.keys())
+            new = {}
+            for item, known in items:
+                name = ITEM_GROUP.match_template(item.image, similarity=similarity, known=known)
+                if name not in prev:
+                    new[name] = item.image
+            for name, image in new.items():
+                save_image(image, os.path.join(self.template_folder, f'{name}.png'))
+        return result
+
+    def merge_drop(self, file, sections, result):
+        """
+        Give names to items loaded by worker processes, in the order of files,
+        so rows and auto-increased IDs are the same as running in serial.
+
+        Args:
+            file (str):
+            sections (list): Results of `load_items()`
+            result (tuple[str, Any]): Result of `run_items()`
+
+        Returns:
+            tuple[str, Any]: Same as `run_drop()`
+        """
+        ts, campaign = self.file_info(file)
+        rows = []
+        for drop_type, enemy_name, items, similarity in sections:
+            for item, known in items:
+                item.name = ITEM_GROUP.match_template(item.image, similarity=similarity, known=known)
+            items = [item for item, _ in items]
+            if drop_type == 'CAMPAIGN_BONUS':
+                try:
+                    items = self.campaign_bonus.revise_items(items)
+                except ImageError as e:
+                    return 'warning', str(e)
+            for item in items:
+                rows.append([ts, campaign, enemy_name, drop_type, item.name, item.amount])
+        if result[0] != 'ok':
+            return result
+        return 'ok', rows
+
+    @staticmethod
+    def _log_result(ts, result):
+        status, data = result
+        if status == 'warning':
+            logger.warning(data)
+        elif status == 'error':
+            logger.error(data)
+            logger.warning(f'Error on image {ts}')
+
     def extract_template(self, campaign):
         """
         Extract images from a given folder.
@@ -102,16 +400,27 @@ class DropStatistics:
         """
         print('')
         logger.hr(f'Extract templates from {campaign}', level=1)
-        for ts, file in tqdm(load_folder(self.drop_folder(campaign)).items()):
-            try:
-                self.parse_template(file)
-            except ImageError as e:
-                logger.warning(e)
-                continue
-            except Exception as e:
-                logger.exception(e)
-                logger.warning(f'Error on image {ts}')
+        use_manifest = bool(DropStatistics.MANIFEST_FILE)
+        manifest = self.manifest['template'] if use_manifest else set()
+        files = {}
+        for ts, file in load_folder(self.drop_folder(campaign)).items():
+            sha1 = file_hash(file) if use_manifest else ''
+            if sha1 not in manifest:
+                files[ts] = (file, sha1)
+        logger.info(f'{len(files)} new files')
+
+        parallel = DropStatistics.PROCESSES > 1
+        results = self._map('run_template_items' if parallel else 'run_template',
+                            [file for file, _ in files.values()])
+        for (ts, (file, sha1)), result in tqdm(zip(files.items(), results), total=len(files)):
+            if parallel:
+                result = self.merge_template(*result)
+            self._log_result(ts, result)
+            if result[0] == 'error':
                 continue
+            manifest.add(sha1)
+
+        self.manifest_save()
 
     def extract_drop(self, campaign):
         """
@@ -124,19 +433,52 @@ class DropStatistics:
         logger.hr(f'extract drops from {campaign}', level=1)
         _ = self.csv_overwrite_check
 
+        use_manifest = bool(DropStatistics.MANIFEST_FILE)
+        signature = self.template_signature() if use_manifest else ''
+        if self.manifest['signature'] != signature:
+            self.manifest['signature'] = signature
+            self.manifest['drop'] = {}
+        cached = self.manifest['drop']
+
+        # Rows of each file in the original order, None if file is new
+        files = {}
+        rows = {}
+        for ts, file in load_folder(self.drop_folder(campaign)).items():
+            sha1 = file_hash(file) if use_manifest else ''
+            files[ts] = (file, sha1)
+            if sha1 in cached:
+                _, campaign_name = self.file_info(file)
+                rows[ts] = [[ts, campaign_name] + row for row in cached[sha1]]
+        new = [ts for ts in files if ts not in rows]
+        logger.info(f'{len(new)} new files, {len(rows)} cached')
+
+        parallel = DropStatistics.PROCESSES > 1
+        results = self._map('run_drop_items' if parallel else 'run_drop', [files[ts][0] for ts in new])
+        for ts, result in tqdm(zip(new, results), total=len(new)):
+            if parallel:
+                result = self.merge_drop(files[ts][0], *result)
+            self._log_result(ts, result)
+            status, data = result
+            if status == 'error':
+                continue
+            sha1 = files[ts][1]
+            if status == 'warning':
+                rows[ts] = []
+                if use_manifest:
+                    cached[sha1] = []
+                continue
+            rows[ts] = data
+            # IDs given in this run may change in the next run, don't cache them
+            if use_manifest and all(not row[4].isdigit() or row[4] in self.known_templates for row in data):
+                cached[sha1] = [row[2:] for row in data]
+
         with open(self.csv_file, 'a', newline='', encoding=DropStatistics.CSV_ENCODING) as csv_file:
             writer = csv.writer(csv_file)
-            for ts, file in tqdm(load_folder(self.drop_folder(campaign)).items()):
-                try:
-                    rows = list(self.parse_drop(file))
-                    writer.writerows(rows)
-                except ImageError as e:
-                    logger.warning(e)
-                    continue
-                except Exception as e:
-                    logger.exception(e)
-                    logger.warning(f'Error on image {ts}')
-                    continue
+            for ts in files:
+                if ts in rows:
+                    writer.writerows(rows[ts])
+
+        self.manifest_save()
 
 
 if __name__ == '__main__':
@@ -157,6 +499,14 @@ if __name__ == '__main__':
     # Usually to be 'utf-8'.
     # For better Chinese export to Excel, use 'gbk'.
     DropStatistics.CSV_ENCODING = 'gbk'
+    # Number of worker processes. 1 to run in current process.
+    # Each worker loads templates and OCR models once, results are the same as running in current process.
+    DropStatistics.PROCESSES = 1
+    # Set a file name like 'manifest.json' to record processed files in {DROP_FOLDER}/{TEMPLATE_FOLDER}/{MANIFEST_FILE},
+    # reruns only handle new screenshots.
+    # Skipped files don't count in template hits, so auto-increased IDs may differ from a full run.
+    # Default to '', disabled.
+    DropStatistics.MANIFEST_FILE = ''
     # campaign names to export under DROP_FOLDER.
     # This will load {DROP_FOLDER}/{CAMPAIGN}.
     # Just a demonstration here, you should modify it to your own.
@@ -187,3 +537,5 @@ if __name__ == '__main__':
     """
     for i in CAMPAIGNS:
         stat.extract_drop(i)
+
+    stat.close()
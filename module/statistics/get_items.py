@@ -82,14 +82,20 @@ class GetItemsStatistics:
         """
         ITEM_GROUP.load_template_folder(folder)
 
-    def extract_template(self, image, folder):
+    def extract_template(self, image, folder=None):
         """
         Args:
             image:
-            folder: Folder to save new templates.
+            folder: Folder to save new templates. Don't save if None.
+
+        Returns:
+            dict: Newly found templates. Key: str, template name. Value: np.ndarray
         """
         self._stats_get_items_load(image)
-        if ITEM_GROUP.grids is not None:
-            new = ITEM_GROUP.extract_template(image)
+        if ITEM_GROUP.grids is None:
+            return {}
+        new = ITEM_GROUP.extract_template(image)
+        if folder is not None:
             for name, im in new.items():
                 save_image(im, os.path.join(folder, f'{name}.png'))
+        return new
@@ -5,6 +5,7 @@ from module.base.button import ButtonGrid
 from module.base.utils import *
 from module.logger import logger
 from module.ocr.ocr import Digit, DigitYuv
+from module.statistics.item_matcher import ItemTemplateMatcher
 from module.statistics.utils import *
 
 
@@ -153,9 +154,11 @@ class ItemGrid:
         self.colors = {}
         self.templates = {}
         self.templates_hit = {}
+        self.matcher = ItemTemplateMatcher()
         self.next_template_index = len(self.templates.keys())
         for name, template in templates.items():
             self.templates[name] = crop(template.image, area=self.template_area)
+            self.colors[name] = cv2.mean(self.templates[name])[:3]
             self.templates_hit[name] = 0
             if name.isdigit() and int(name) > self.next_template_index:
                 self.next_template_index = int(name)
@@ -217,31 +220,48 @@ class ItemGrid:
             self.next_cost_template_index += 1
         self.next_cost_template_index = max(self.next_cost_template_index, max_digit + 1)
 
-    def match_template(self, image, similarity=None):
+    def _match_candidates(self, image):
+        """
+        Args:
+            image (np.ndarray):
+
+        Returns:
+            list[str]: Template names to try in order, after color prefilter.
+        """
+        color = cv2.mean(crop(image, self.template_area))[:3]
+        # Match frequently hit templates first
+        names = np.array(list(self.templates.keys()))[np.argsort(list(self.templates_hit.values()))][::-1]
+        # Match known templates first
+        names = [name for name in names if not name.isdigit()] + [name for name in names if name.isdigit()]
+        # Color prefilter, same as color_similar(threshold=30) on each template
+        if len(names):
+            diff = np.array(color) - np.array([self.colors[name] for name in names])
+            tolerance = np.max(np.maximum(diff, 0), axis=1) - np.min(np.minimum(diff, 0), axis=1)
+            names = [name for name, t in zip(names, tolerance) if t <= 30]
+        return names
+
+    def match_template(self, image, similarity=None, known=None):
         """
         Match templates, try most frequent hit templates first.
+        Templates that pass the color prefilter are matched in batch by `ItemTemplateMatcher`.
 
         Args:
             image (np.ndarray):
             similarity (float):
+            known (dict): Result of `match_template_all()`, templates in it are not matched again.
 
         Returns:
             str: Template name.
         """
         if similarity is None:
             similarity = self.similarity
-        color = cv2.mean(crop(image, self.template_area))[:3]
-        # Match frequently hit templates first
-        names = np.array(list(self.templates.keys()))[np.argsort(list(self.templates_hit.values()))][::-1]
-        # Match known templates first
-        names = [name for name in names if not name.isdigit()] + [name for name in names if name.isdigit()]
-        for name in names:
-            if color_similar(color1=color, color2=self.colors[name], threshold=30):
-                res = cv2.matchTemplate(image, self.templates[name], cv2.TM_CCOEFF_NORMED)
-                _, sim, _, _ = cv2.minMaxLoc(res)
-                if sim > similarity:
-                    self.templates_hit[name] += 1
-                    return name
+        names = self._match_candidates(image)
+        # Match all candidates in batch
+        name = self.matcher.match(
+            image, {name: self.templates[name] for name in names}, similarity=similarity, known=known)
+        if name is not None:
+            self.templates_hit[name] += 1
+            return name
 
         self.next_template_index += 1
         name = str(self.next_template_index)
@@ -252,6 +272,26 @@ class ItemGrid:
         self.templates_hit[name] = self.templates_hit.get(name, 0) + 1
         return name
 
+    def match_template_all(self, image, similarity=None):
+        """
+        Match all templates without changing hit counts,
+        so the heavy work can be done in another process and `match_template()` gives names later.
+
+        Args:
+            image (np.ndarray):
+            similarity (float):
+
+        Returns:
+            dict: Key: template name, value: bool, if template matches.
+        """
+        if similarity is None:
+            similarity = self.similarity
+        names = self._match_candidates(image)
+        result = dict.fromkeys(self.templates.keys(), False)
+        result.update(self.matcher.match_all(
+            image, {name: self.templates[name] for name in names}, similarity=similarity))
+        return result
+
     def extract_template(self, image, folder=None):
         """
         Args:
@@ -0,0 +1,153 @@
+"""
+Batched template matching for ItemGrid.
+
+`cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)` is called once per template in a python loop,
+here an item image is scored against a stack of templates in one pass, using FFT cross-correlation.
+
+Result is the same as TM_CCOEFF_NORMED on colour images:
+    R(x, y) = sum(T'(x', y') * I'(x + x', y + y')) / sqrt(sum(T'^2) * sum(I'^2))
+where T' and I' are template and image window subtracted by their mean, per channel.
+Templates are zero-mean, so numerator is just the correlation of T' and I,
+it's normalized by `ccoeff_normed()`, shared with `TemplateFFT` in map detection.
+"""
+import cv2
+import numpy as np
+
+from module.map_detection.template_fft import ccoeff_normed
+
+
+def _as_3d(image):
+    image = np.asarray(image, dtype=np.float64)
+    if image.ndim == 2:
+        image = image[:, :, np.newaxis]
+    return image
+
+
+class ItemTemplateMatcher:
+    # Frequently hit templates are tried first and usually match in the first few,
+    # cv2.matchTemplate() is faster on a few templates, batch has a fixed cost of about 5 templates.
+    loop_size = 4
+    # Templates in one batch. Batches stop at the first match, like what the loop does.
+    batch_size = 32
+    # Similarity from fft differs from cv2.matchTemplate() in about 1e-6,
+    # templates that are this close to the threshold are confirmed by cv2.
+    margin = 1e-3
+
+    def __init__(self):
+        # Key: (template name, image shape). Value: result of `add()`
+        self.cache = {}
+
+    def add(self, name, template, shape):
+        """
+        Prepare a template, new templates can be added at anytime.
+
+        Args:
+            name (str):
+            template (np.ndarray): Template image
+            shape (tuple): Shape of the images to search in, (H, W)
+
+        Returns:
+            tuple: Conjugated fft of zero-mean template, norm of zero-mean template, template shape (h, w)
+        """
+        key = (name, shape)
+        if key in self.cache:
+            return self.cache[key]
+        template = _as_3d(template)
+        template = template - template.mean(axis=(0, 1), keepdims=True)
+        norm = np.sqrt(np.sum(template ** 2))
+        # Channel first, so each channel is a 2D fft
+        # Conjugated once here, instead of on every match.
+        # Single precision like cv2.matchTemplate(), which also halves memory traffic in batch
+        fft = np.conj(np.fft.rfft2(template.transpose(2, 0, 1).astype(np.float32), s=shape))
+        self.cache[key] = (fft, norm, template.shape[:2])
+        return self.cache[key]
+
+    def similarity(self, image, templates):
+        """
+        Args:
+            image (np.ndarray): Image to search in.
+            templates (dict): Key: template name, value: template image.
+                Templates must have the same shape.
+
+        Returns:
+            np.ndarray: Max TM_CCOEFF_NORMED similarity of each template, in the order of `templates`.
+        """
+        if not templates:
+            return np.array([])
+        shape = image.shape[:2]
+        prepared = [self.add(name, template, shape) for name, template in templates.items()]
+        h, w = prepared[0][2]
+        if h > shape[0] or w > shape[1]:
+            return np.zeros(len(prepared))
+
+        # Numerator, cross-correlation of all templates in one batch
+        image_fft = np.fft.rfft2(_as_3d(image).transpose(2, 0, 1).astype(np.float32))
+        template_fft = np.stack([row[0] for row in prepared])
+        corr = np.fft.irfft2(np.einsum('chw,kchw->khw', image_fft, template_fft), s=shape)
+        corr = corr[:, :shape[0] - h + 1, :shape[1] - w + 1]
+
+        norm = np.array([row[1] for row in prepared])[:, np.newaxis, np.newaxis]
+        result = ccoeff_normed(corr, norm, image, (h, w))
+        return np.max(result.reshape(len(prepared), -1), axis=1)
+
+    def match_one(self, image, template, similarity):
+        """
+        Returns:
+            bool: If `cv2.matchTemplate()` gives similarity > `similarity`.
+        """
+        res = cv2.matchTemplate(image, template, cv2.TM_CCOEFF_NORMED)
+        _, sim, _, _ = cv2.minMaxLoc(res)
+        return sim > similarity
+
+    def match(self, image, templates, similarity, known=None):
+        """
+        Args:
+            image (np.ndarray): Image to search in.
+            templates (dict): Key: template name, value: template image. In the order to try.
+            similarity (float):
+            known (dict): Key: template name, value: bool, results of `match_all()` that don't need to match again.
+
+        Returns:
+            str: Name of the first template that has similarity > `similarity`, or None.
+        """
+        if known is None:
+            known = {}
+        unknown = [name for name in templates.keys() if name not in known]
+        looped = set(unknown[:self.loop_size])
+        sims = {}
+        for name in templates.keys():
+            if name in known:
+                if known[name]:
+                    return name
+                continue
+            if name in looped:
+                if self.match_one(image, templates[name], similarity):
+                    return name
+                continue
+            if name not in sims:
+                start = unknown.index(name)
+                batch = {n: templates[n] for n in unknown[start:start + self.batch_size]}
+                sims.update(zip(batch.keys(), self.similarity(image, batch)))
+            # Confirm by cv2, so results are exactly the same as the loop
+            if sims[name] > similarity - self.margin and self.match_one(image, templates[name], similarity):
+                return name
+        return None
+
+    def match_all(self, image, templates, similarity):
+        """
+        Args:
+            image (np.ndarray): Image to search in.
+            templates (dict): Key: template name, value: template image.
+            similarity (float):
+
+        Returns:
+            dict: Key: template name, value: bool, if template has similarity > `similarity`.
+        """
+        result = {}
+        names = list(templates.keys())
+        for start in range(0, len(names), self.batch_size):
+            batch = {name: templates[name] for name in names[start:start + self.batch_size]}
+            for name, sim in zip(batch.keys(), self.similarity(image, batch)):
+                result[name] = bool(sim > similarity - self.margin) \
+                               and self.match_one(image, templates[name], similarity)
+        return result
@@ -386,7 +386,8 @@ class RewardTacticalClass(Dock):
         grids = ButtonGrid(
             origin=(421, 596), delta=(223, 0), button_shape=(139, 27), grid_shape=(4, 1), name='TACTICAL_REMAIN')
 
-        is_running = [self.image_color_count(button, color=(148, 255, 99), count=50) for button in grids.buttons]
+        is_running = image_color_count_batch(
+            self.device.image, [button.area for button in grids.buttons], color=(148, 255, 99), count=50)
         logger.info(f'Tactical status: {["running" if s else "empty" for s in is_running]}')
 
         buttons = [b for b, s in zip(grids.buttons, is_running) if s]
@@ -61,6 +61,7 @@ from module.config.utils import (
     readable_time,
 )
 from module.config.utils import time_delta
+from module.device.adb_broker import start_adb_broker_process, stop_adb_broker_process
 from module.log_res.log_res import LogRes
 from module.logger import logger
 from module.log_res import LogRes
@@ -73,7 +74,7 @@ from module.webui.fastapi import asgi_app
 from module.webui.lang import _t, t
 from module.webui.patch import patch_executor, patch_mimetype
 from module.webui.pin import put_input, put_select
-from module.webui.process_manager import ProcessManager
+from module.webui.process_manager import ProcessManager, UpdateEvent
 from module.webui.remote_access import RemoteAccess
 from module.webui.setting import State
 from module.webui.updater import updater
@@ -745,6 +746,14 @@ class AlasGUI(Frame):
                     put_scope("waiting_tasks"),
                 ],
             )
+            put_scope(
+                "emotion",
+                [
+                    put_text(t("Gui.Overview.Emotion")),
+                    put_html('<hr class="hr-group">'),
+                    put_scope("emotion_tasks"),
+                ],
+            )
 
         switch_scheduler = BinarySwitchButton(
             label_on=t("Gui.Button.Stop"),
@@ -1043,9 +1052,29 @@ class AlasGUI(Frame):
                     color="off",
                 )
 
+        timeline = self.alas_config.get_emotion_timeline()
+
+        def put_emotion(plan):
+            with use_scope(f"overview-emotion_{plan.command}"):
+                battle = f"{plan.battle}" if plan.observed else f"~{plan.battle}"
+                put_column(
+                    [
+                        put_text(t(f"Task.{plan.command}.name")).style("--arg-title--"),
+                        put_text(f"{plan.ready.replace(microsecond=0)} "
+                                 f"(x{battle}, {plan.interval})").style("--arg-help--"),
+                    ],
+                    size="auto auto",
+                )
+                put_button(
+                    label=t("Gui.Button.Setting"),
+                    onclick=lambda: self.alas_set_group(plan.command),
+                    color="off",
+                )
+
         clear("running_tasks")
         clear("pending_tasks")
         clear("waiting_tasks")
+        clear("emotion_tasks")
         with use_scope("running_tasks"):
             if running:
                 for task in running:
@@ -1064,6 +1093,12 @@ class AlasGUI(Frame):
                     put_task(task)
             else:
                 put_text(t("Gui.Overview.NoTask")).style("--overview-notask-text--")
+        with use_scope("emotion_tasks"):
+            if timeline:
+                for plan in timeline:
+                    put_emotion(plan)
+            else:
+                put_text(t("Gui.Overview.NoTask")).style("--overview-notask-text--")
 
     def _update_dashboard(self, num=None, groups_to_display=None):
         x = 0
@@ -1630,6 +1665,29 @@ class AlasGUI(Frame):
                     scope="updater_btn",
                     disabled=True,
                 )
+            elif state == "stage":
+                put_loading("border", "primary", "updater_loading").style(
+                    "--loading-border--"
+                )
+                put_text(t("Gui.Update.UpdateStage"), scope="updater_state")
+                put_button(
+                    t("Gui.Button.CancelUpdate"),
+                    onclick=updater.cancel,
+                    color="danger",
+                    scope="updater_btn",
+                )
+            elif state == "rolling":
+                put_loading("border", "primary", "updater_loading").style(
+                    "--loading-border--"
+                )
+                put_text(t("Gui.Update.UpdateRolling"), scope="updater_state")
+                put_button(
+                    t("Gui.Button.CancelUpdate"),
+                    onclick=updater.cancel,
+                    color="danger",
+                    scope="updater_btn",
+                    disabled=True,
+                )
             elif state == "reload":
                 put_loading("grow", "success", "updater_loading").style(
                     "--loading-grow--"
@@ -2560,7 +2618,7 @@ def debug():
 def startup():
     State.init()
     lang.reload()
-    updater.event = State.manager.Event()
+    updater.event = UpdateEvent(State.manager)
     if updater.delay > 0:
         task_handler.add(updater.check_update, updater.delay)
     task_handler.add(updater.schedule_update(), 86400)
@@ -2569,6 +2627,11 @@ def startup():
         init_discord_rpc()
     if State.deploy_config.StartOcrServer:
         start_ocr_server_process(State.deploy_config.OcrServerPort)
+    if State.deploy_config.AdbBroker:
+        start_adb_broker_process(
+            State.deploy_config.AdbBrokerPort,
+            int(os.environ.get('ANDROID_ADB_SERVER_PORT', 5037)),
+        )
     if (
         State.deploy_config.EnableRemoteAccess
         and State.deploy_config.Password is not None
@@ -2585,6 +2648,7 @@ def clearup():
     RemoteAccess.kill_ssh_process()
     close_discord_rpc()
     stop_ocr_server_process()
+    stop_adb_broker_process()
     for alas in ProcessManager._processes.values():
         alas.stop()
     State.clearup()
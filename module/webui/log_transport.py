@@ -0,0 +1,130 @@
+"""
+Log transport between alas instance processes and web UI.
+
+Renderables used to go through a `SyncManager.Queue()`, which costs a round trip
+through the manager server process for every log line.
+Here each instance has its own pipe, the instance sends pickled batches of renderables,
+which are length-prefixed by `multiprocessing.connection.Connection.send_bytes()`.
+Web UI reads them into a bounded ring buffer.
+"""
+import pickle
+import threading
+from collections import deque
+from multiprocessing import util
+from multiprocessing.connection import Connection
+from typing import List, Tuple
+
+from rich.console import ConsoleRenderable
+
+
+class LogPipeSender:
+    """
+    Runs in alas instance process, `put` is used as the func of `set_func_logger()`.
+    """
+
+    def __init__(self, conn: Connection, batch_size=32, interval=0.05):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self.buffer: "deque[ConsoleRenderable]" = deque()
+        self.lock = threading.Lock()
+        self.notify = threading.Event()
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._work, name='LogPipeSender', daemon=True)
+        self.thread.start()
+        # Send the rest before process exits
+        util.Finalize(self, self.close, exitpriority=50)
+
+    def put(self, renderable: ConsoleRenderable):
+        self.buffer.append(renderable)
+        if len(self.buffer) >= self.batch_size:
+            self.notify.set()
+
+    def flush(self):
+        with self.lock:
+            while self.buffer:
+                batch = []
+                while self.buffer and len(batch) < self.batch_size:
+                    batch.append(self.buffer.popleft())
+                try:
+                    self.conn.send_bytes(pickle.dumps(batch, protocol=pickle.HIGHEST_PROTOCOL))
+                except (BrokenPipeError, EOFError, OSError):
+                    # Web UI closed the pipe, nobody is reading
+                    self.buffer.clear()
+                    self.closed = True
+                    return
+
+    def _work(self):
+        while not self.closed:
+            self.notify.wait(timeout=self.interval)
+            self.notify.clear()
+            self.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        self.notify.set()
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+
+class RenderableRing:
+    """
+    Bounded ring buffer of renderables.
+
+    Items are addressed by a monotonic index, so readers can ask for what's new
+    since their last read, without slicing and copying the whole list.
+    """
+
+    def __init__(self, maxlen=400):
+        self.items: "deque[ConsoleRenderable]" = deque(maxlen=maxlen)
+        # Number of items ever appended
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def append(self, item):
+        with self.lock:
+            self.items.append(item)
+            self.total += 1
+
+    def extend(self, items):
+        with self.lock:
+            self.items.extend(items)
+            self.total += len(items)
+
+    def since(self, index: int) -> Tuple[List[ConsoleRenderable], int]:
+        """
+        Args:
+            index: Monotonic index of the last read, `total` at that time.
+
+        Returns:
+            New items, and the index to use for the next read.
+            Items that have been pushed out of the buffer are skipped.
+        """
+        with self.lock:
+            total = self.total
+            new = min(total - index, len(self.items))
+            if new <= 0:
+                return [], total
+            # deque is fast on both ends, iterate from the right
+            items = [self.items[i] for i in range(-new, 0)]
+            return items, total
+
+    def snapshot(self) -> Tuple[List[ConsoleRenderable], int]:
+        with self.lock:
+            return list(self.items), self.total
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, index):
+        return self.items[index]
+
+    def __bool__(self):
+        return len(self.items) > 0
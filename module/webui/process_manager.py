@@ -2,13 +2,15 @@ import argparse
 # 此文件专门用于管理 Alas 运行时各实例进程的生存周期及其子进程。
 # 负责多账号多开时的进程池维护、状态（运行中、停止、异常）追踪及进程间通信的安全处理逻辑。
 import os
+import pickle
 import queue
 import threading
-from multiprocessing import Process
+from multiprocessing import Pipe, Process
+from multiprocessing.connection import Connection
 from typing import Dict, List, Union
 
 import inflection
-from rich.console import Console, ConsoleRenderable
+from rich.console import Console
 
 # Since this file does not run under the same process or subprocess of app.py
 # the following code needs to be repeated
@@ -21,25 +23,67 @@ from module.logger import logger, set_file_logger, set_func_logger
 from module.submodule.submodule import load_mod
 from module.submodule.utils import get_available_func, get_available_mod, get_available_mod_func, get_config_mod, \
     get_func_mod, list_mod_instance
+from module.webui.log_transport import LogPipeSender, RenderableRing
 from module.webui.setting import State
 
 
+class UpdateEvent:
+    """
+    Update events of alas instances.
+    Each instance has its own event, so instances can be stopped one by one in rolling update.
+    `set()` and `clear()` apply to all instances, same as a single event.
+    """
+
+    def __init__(self, manager) -> None:
+        """
+        Args:
+            manager (SyncManager): To create events shared with subprocesses.
+        """
+        self.manager = manager
+        self.events: Dict[str, threading.Event] = {}
+        self._set = False
+
+    def get(self, config_name: str) -> threading.Event:
+        event = self.events.get(config_name)
+        if event is None:
+            event = self.manager.Event()
+            if self._set:
+                event.set()
+            self.events[config_name] = event
+        return event
+
+    def set(self) -> None:
+        self._set = True
+        for event in self.events.values():
+            event.set()
+
+    def clear(self) -> None:
+        self._set = False
+        for event in self.events.values():
+            event.clear()
+
+    def is_set(self) -> bool:
+        return self._set
+
+
 class ProcessManager:
     _processes: Dict[str, "ProcessManager"] = {}
 
     def __init__(self, config_name: str = "alas") -> None:
         self.config_name = config_name
-        self._renderable_queue: queue.Queue[ConsoleRenderable] = State.manager.Queue()
+        # Read end of the log pipe, a new pipe is created on each start
+        self._renderable_reader: Connection = None
         self._screenshot_data_queue = None
-        self.renderables: List[ConsoleRenderable] = []
         self.renderables_max_length = 400
-        self.renderables_reduce_length = 80
+        self.renderables = RenderableRing(maxlen=self.renderables_max_length)
         self._process: Process = None
         self._process_locks: Dict[str, threading.Lock] = {}
         self.thd_log_queue_handler: threading.Thread = None
 
-    def start(self, func, ev: threading.Event = None) -> None:
+    def start(self, func, ev: Union[threading.Event, UpdateEvent] = None) -> None:
         if not self.alive:
+            if isinstance(ev, UpdateEvent):
+                ev = ev.get(self.config_name)
             if func is None:
                 func = get_config_mod(self.config_name)
             try:
@@ -64,10 +108,13 @@ class ProcessManager:
                     self._screenshot_enabled_flag = None
             except Exception:
                 logger.exception("雪风大人提醒无法创建多进程截图队列")
+            self._close_renderable_reader()
+            reader, writer = Pipe(duplex=False)
+            self._renderable_reader = reader
             args = (
                 self.config_name,
                 func,
-                self._renderable_queue,
+                writer,
                 self._screenshot_data_queue,
                 ev,
             )
@@ -78,8 +125,25 @@ class ProcessManager:
                 args=args,
             )
             self._process.start()
+            # Child has its own copy, close ours so reader gets EOF when child exits
+            writer.close()
             self.start_log_queue_handler()
 
+    def _close_renderable_reader(self):
+        """
+        Close read end of the previous log pipe, after the handler thread drains it.
+        """
+        reader = self._renderable_reader
+        if reader is None:
+            return
+        if self.thd_log_queue_handler is not None:
+            self.thd_log_queue_handler.join(timeout=1)
+        self._renderable_reader = None
+        try:
+            reader.close()
+        except OSError:
+            pass
+
     def start_log_queue_handler(self):
         if (
             self.thd_log_queue_handler is not None
@@ -112,15 +176,32 @@ class ProcessManager:
                     )
         logger.info(f"[{self.config_name}] exited")
 
+    def _receive_renderables(self, timeout: float) -> bool:
+        """
+        Receive a batch of renderables from log pipe.
+
+        Returns:
+            If received anything.
+        """
+        reader = self._renderable_reader
+        if reader is None:
+            return False
+        try:
+            if not reader.poll(timeout):
+                return False
+            batch = pickle.loads(reader.recv_bytes())
+        except (EOFError, OSError):
+            # Process exited and pipe drained
+            return False
+        self.renderables.extend(batch)
+        return True
+
     def _thread_log_queue_handler(self) -> None:
         while self.alive:
-            try:
-                log = self._renderable_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            self.renderables.append(log)
-            if len(self.renderables) > self.renderables_max_length:
-                self.renderables = self.renderables[self.renderables_reduce_length :]
+            self._receive_renderables(timeout=1)
+        # Logs sent right before process exit
+        while self._receive_renderables(timeout=0):
+            pass
         logger.info("End of log queue handler loop")
 
     @property
@@ -189,7 +270,7 @@ class ProcessManager:
 
     @staticmethod
     def run_process(
-        config_name, func: str, q: queue.Queue, screenshot_q: queue.Queue, e: threading.Event = None, screenshot_enabled=None
+        config_name, func: str, q: Union[Connection, queue.Queue], screenshot_q: queue.Queue, e: threading.Event = None, screenshot_enabled=None
     ) -> None:
         parser = argparse.ArgumentParser()
         parser.add_argument(
@@ -205,7 +286,12 @@ class ProcessManager:
             logger.info("Electron detected, remove log output to stdout")
             from module.logger import console_hdlr
             logger.removeHandler(console_hdlr)
-        set_func_logger(func=q.put)
+        if isinstance(q, Connection):
+            set_func_logger(func=LogPipeSender(q).put)
+        else:
+            set_func_logger(func=q.put)
+        if State.deploy_config.AsyncLogger:
+            logger.set_async_logger()
 
         from module.config.config import AzurLaneConfig
 
@@ -255,7 +341,7 @@ class ProcessManager:
 
     @staticmethod
     def restart_processes(
-        instances: List[Union["ProcessManager", str]] = None, ev: threading.Event = None
+        instances: List[Union["ProcessManager", str]] = None, ev: Union[threading.Event, UpdateEvent] = None
     ):
         """
         After update and reload, or failed to perform an update,
@@ -0,0 +1,268 @@
+"""
+Rolling update, update Alas without stopping all instances at once.
+
+Full update in `Updater` waits for all instances to stop, runs git and pip, then restarts everything.
+Rolling update prepares the new revision while instances are still running:
+1. Stage: check out the new revision into a separate git worktree.
+2. Validate: precompile it, import core modules and dry run `ConfigUpdater` on user configs, all in the worktree.
+3. Apply: stop instances affected by the changed files at their task boundary,
+   reset working directory to the new revision, copy the precompiled bytecode, and restart them.
+Instances that are not affected keep running, none of the files they use are changed.
+
+Changes to GUI, deploy scripts or requirements still need a full update,
+because GUI itself has to reload and dependencies can't be installed while instances are running.
+"""
+import os
+import shutil
+import subprocess
+import sys
+
+from module.logger import logger
+from module.submodule.utils import MOD_DICT
+
+STAGE_FOLDER = './log/update_stage'
+# Changed files with these prefixes need a full update
+FULL_UPDATE_PATHS = (
+    'deploy/',
+    'module/webui/',
+    'gui.py',
+    'requirements',
+    'assets/gui/',
+    'webapp/',
+)
+# Changed files with these prefixes don't affect running instances
+NO_RESTART_PATHS = (
+    'doc/',
+    'dev_tools/',
+    'tools/',
+    '.github/',
+    'config/deploy.',
+    'README',
+    'LICENSE',
+)
+NO_RESTART_SUFFIX = ('.md',)
+# Imported in the staged worktree to check if the new revision works at all
+SMOKE_IMPORT = [
+    'module.config.config',
+    'module.config.config_updater',
+    'module.handler.login',
+    'alas',
+]
+VALIDATE_SCRIPT = """
+import os, sys
+for name in sys.argv[2:]:
+    __import__(name)
+from module.config.config_updater import ConfigUpdater
+from module.config.utils import read_file
+updater = ConfigUpdater()
+folder = sys.argv[1]
+for file in sorted(os.listdir(folder)):
+    name, ext = os.path.splitext(file)
+    # Mod configs are <name>.<mod>.json, templates are not user configs
+    if ext != '.json' or '.' in name or name.startswith('template'):
+        continue
+    updater.config_update(read_file(os.path.join(folder, file)))
+    print(f'Config dry run: {file}')
+"""
+
+
+class UpdateAffect:
+    def __init__(self, full=False, mods=None):
+        """
+        Args:
+            full (bool): If needs a full update.
+            mods (set[str]): Mods that need restart, 'alas' for Alas itself.
+        """
+        self.full = full
+        self.mods = mods if mods is not None else set()
+
+    def __str__(self):
+        if self.full:
+            return 'UpdateAffect(full)'
+        return f'UpdateAffect(mods={sorted(self.mods)})'
+
+    __repr__ = __str__
+
+
+def update_affect(files):
+    """
+    Args:
+        files (list[str]): Changed files, relative to repo root, as `git diff --name-only` outputs.
+
+    Returns:
+        UpdateAffect:
+    """
+    affect = UpdateAffect()
+    mod_dirs = {f'submodule/{folder}/': mod for mod, folder in MOD_DICT.items()}
+    for file in files:
+        file = file.replace('\\', '/')
+        if file.startswith(FULL_UPDATE_PATHS):
+            logger.info(f'Full update required by: {file}')
+            affect.full = True
+            return affect
+        if file.startswith(NO_RESTART_PATHS) or file.endswith(NO_RESTART_SUFFIX):
+            continue
+        for prefix, mod in mod_dirs.items():
+            if file.startswith(prefix):
+                affect.mods.add(mod)
+                break
+        else:
+            # Shared code, mods run on Alas modules too
+            affect.mods.add('alas')
+            affect.mods.update(MOD_DICT)
+    return affect
+
+
+class RollingUpdate:
+    def __init__(self, git='git', python=sys.executable, root='.', source='origin', branch='master'):
+        """
+        Args:
+            git (str): Git executable.
+            python (str): Python executable.
+            root (str): Root of Alas repo.
+            source (str):
+            branch (str):
+        """
+        self.git = git
+        self.python = python
+        self.root = os.path.abspath(root)
+        self.source = source
+        self.branch = branch
+        self.stage_folder = os.path.abspath(os.path.join(self.root, STAGE_FOLDER))
+
+    def run(self, args, cwd=None, check=True):
+        """
+        Args:
+            args (list[str]):
+            cwd (str): Default to repo root.
+            check (bool): Raise CalledProcessError if command failed.
+
+        Returns:
+            str: stdout
+        """
+        result = subprocess.run(
+            args, cwd=cwd or self.root, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        if check and result.returncode:
+            # Commands may contain scripts, show outputs only
+            logger.warning(f'{args[0]} exited with {result.returncode}\n{result.stdout}{result.stderr}')
+            raise subprocess.CalledProcessError(result.returncode, args, result.stdout, result.stderr)
+        return result.stdout
+
+    def revision(self, ref='HEAD'):
+        return self.run([self.git, 'rev-parse', ref]).strip()
+
+    @property
+    def upstream(self):
+        return f'{self.source}/{self.branch}'
+
+    def has_local_changes(self):
+        """
+        Returns:
+            bool: If tracked files are modified, untracked files are not counted.
+        """
+        return bool(self.run([self.git, 'status', '--porcelain', '--untracked-files=no']).strip())
+
+    def changed_files(self, new, old='HEAD'):
+        """
+        Returns:
+            list[str]: Files changed between two revisions.
+        """
+        return [line for line in self.run([self.git, 'diff', '--name-only', old, new]).splitlines() if line]
+
+    def stage(self, new):
+        """
+        Check out new revision into stage folder.
+        """
+        logger.hr('Stage update', 1)
+        self.cleanup()
+        os.makedirs(os.path.dirname(self.stage_folder), exist_ok=True)
+        self.run([self.git, 'worktree', 'add', '--force', '--detach', self.stage_folder, new])
+        logger.info(f'Staged {new[:8]} at {self.stage_folder}')
+
+    def validate(self):
+        """
+        Precompile and validate the staged revision.
+
+        Returns:
+            bool: If success.
+        """
+        logger.hr('Validate update', 1)
+        # Hash based pyc is valid at any path and any mtime, as long as the source is the same,
+        # so they can be copied to the working directory later.
+        try:
+            self.run([self.python, '-m', 'compileall', '-q', '--invalidation-mode', 'checked-hash', self.stage_folder])
+        except subprocess.CalledProcessError:
+            logger.warning('Failed to compile staged revision')
+            return False
+        try:
+            output = self.run([self.python, '-c', VALIDATE_SCRIPT, os.path.join(self.root, 'config'), *SMOKE_IMPORT],
+                              cwd=self.stage_folder)
+        except subprocess.CalledProcessError:
+            logger.warning('Staged revision failed smoke check')
+            return False
+        for line in output.splitlines():
+            logger.info(line)
+        logger.info('Staged revision validated')
+        return True
+
+    def apply(self, new, files):
+        """
+        Reset working directory to the new revision, and copy precompiled bytecode of changed files.
+        Instances affected by the changed files must be stopped before this,
+        they import modules lazily and would mix two revisions.
+
+        Args:
+            new (str): Revision.
+            files (list[str]): Changed files.
+        """
+        logger.hr('Apply update', 1)
+        self.run([self.git, 'reset', '--hard', new])
+        copied = 0
+        for file in files:
+            if not file.endswith('.py'):
+                continue
+            folder, name = os.path.split(file)
+            cache = os.path.join(self.stage_folder, folder, '__pycache__')
+            if not os.path.isdir(cache):
+                continue
+            prefix = os.path.splitext(name)[0] + '.'
+            for pyc in os.listdir(cache):
+                if pyc.startswith(prefix) and pyc.endswith('.pyc'):
+                    target = os.path.join(self.root, folder, '__pycache__')
+                    os.makedirs(target, exist_ok=True)
+                    shutil.copyfile(os.path.join(cache, pyc), os.path.join(target, pyc))
+                    copied += 1
+        logger.info(f'Updated to {new[:8]}, {len(files)} files changed, {copied} bytecode files copied')
+
+    def cleanup(self):
+        if os.path.exists(self.stage_folder):
+            self.run([self.git, 'worktree', 'remove', '--force', self.stage_folder], check=False)
+            shutil.rmtree(self.stage_folder, ignore_errors=True)
+        self.run([self.git, 'worktree', 'prune'], check=False)
+
+    def prepare(self):
+        """
+        Stage and validate the upstream revision, `git fetch` should be done before.
+
+        Returns:
+            tuple[str, list[str], UpdateAffect]: New revision, changed files, affect.
+                Revision is None if failed or up to date.
+        """
+        new = self.revision(self.upstream)
+        if new == self.revision():
+            logger.info('Already up to date')
+            return None, [], UpdateAffect()
+        files = self.changed_files(new)
+        affect = update_affect(files)
+        logger.info(f'{len(files)} files changed, {affect}')
+        if affect.full:
+            return new, files, affect
+        try:
+            self.stage(new)
+        except subprocess.CalledProcessError:
+            logger.warning('Failed to stage update')
+            return None, files, affect
+        if not self.validate():
+            self.cleanup()
+            return None, files, affect
+        return new, files, affect
@@ -11,8 +11,10 @@ from deploy.pip import PipManager
 from deploy.utils import DEPLOY_CONFIG
 from module.base.retry import retry
 from module.logger import logger
+from module.submodule.utils import get_config_mod, list_mod_instance
 from module.webui.config import DeployConfig
-from module.webui.process_manager import ProcessManager
+from module.webui.process_manager import ProcessManager, UpdateEvent
+from module.webui.rolling_update import RollingUpdate
 from module.webui.setting import State
 from module.webui.utils import TaskHandler, get_next_time
 
@@ -21,7 +23,7 @@ class Updater(DeployConfig, GitManager, PipManager):
     def __init__(self, file=DEPLOY_CONFIG):
         super().__init__(file=file)
         self.state = 0
-        self.event: threading.Event = None
+        self.event: UpdateEvent = None
 
     @property
     def delay(self):
@@ -201,12 +203,140 @@ class Updater(DeployConfig, GitManager, PipManager):
             return False
         return True
 
-    def run_update(self):
+    def run_update(self) -> bool:
+        """
+        Returns:
+            bool: If update finished or there's nothing to update.
+        """
         if self.state not in ("failed", 0, 1):
-            return
-        self._start_update()
+            return False
+        self.read()
+        if self.UpdateMode == "rolling":
+            return self._start_rolling_update()
+        else:
+            return self._start_update()
+
+    @property
+    def rolling(self) -> RollingUpdate:
+        return RollingUpdate(
+            git=self.git,
+            python=self.python,
+            root=self.root_filepath,
+            source="origin",
+            branch=self.Branch,
+        )
 
-    def _start_update(self):
+    def _start_rolling_update(self) -> bool:
+        """
+        Stage and validate new revision while instances are running,
+        then stop affected instances at their task boundary, apply the new revision and restart them.
+        Fallback to full update if rolling update is not possible.
+
+        Returns:
+            bool: If update finished or there's nothing to update.
+        """
+        self.state = "stage"
+        logger.hr("Run rolling update")
+        rolling = self.rolling
+        if State.deploy_config.GitOverCdn:
+            logger.info("Rolling update is not available with git over cdn, use full update")
+            return self._start_update()
+        if self.KeepLocalChanges and rolling.has_local_changes():
+            logger.info("Local changes need to be kept, use full update")
+            return self._start_update()
+
+        try:
+            new, files, affect = rolling.prepare()
+        except Exception as e:
+            logger.exception(e)
+            new, files, affect = None, [], None
+        if self.state == "cancel":
+            rolling.cleanup()
+            self.state = 1
+            return False
+        if affect is not None and affect.full:
+            return self._start_update()
+        if new is None:
+            if affect is not None and not files:
+                self.state = 0
+                return True
+            self.state = "failed"
+            return False
+
+        # Instances import modules lazily, tree can't change under them
+        self.state = "rolling"
+        instances = self._rolling_stop(affect.mods)
+        if instances is None:
+            rolling.cleanup()
+            self.state = 1
+            return False
+        try:
+            rolling.apply(new, files)
+            success = True
+        except Exception as e:
+            logger.exception(e)
+            logger.warning("Failed to apply update")
+            success = False
+        finally:
+            rolling.cleanup()
+            self._rolling_start(instances)
+        self.state = "finish" if success else "failed"
+        return success
+
+    def _rolling_stop(self, mods):
+        """
+        Stop instances affected by the update at their next task boundary, other instances keep running.
+
+        Args:
+            mods (set[str]): Mods that need restart.
+
+        Returns:
+            list[ProcessManager]: Stopped instances, or None if update cancelled.
+        """
+        list_mod_instance()
+        instances = []
+        for alas in ProcessManager.running_instances():
+            if get_config_mod(alas.config_name) in mods:
+                instances.append(alas)
+            else:
+                logger.info(f"Alas [{alas.config_name}] is not affected, keep running")
+        for alas in instances:
+            self.event.get(alas.config_name).set()
+
+        logger.info(f"Waiting affected alas finish: {[alas.config_name for alas in instances]}")
+        _instances = instances.copy()
+        start_time = time.time()
+        while _instances:
+            for alas in _instances.copy():
+                if not alas.alive:
+                    _instances.remove(alas)
+                    logger.info(f"Alas [{alas.config_name}] stopped")
+                    logger.info(f"Remains: {[alas.config_name for alas in _instances]}")
+            if self.state == "cancel":
+                self._rolling_start(instances)
+                return None
+            time.sleep(0.25)
+            if time.time() - start_time > 60 * 10:
+                logger.warning("Waiting alas shutdown timeout, force kill")
+                for alas in _instances:
+                    alas.stop()
+                break
+        return instances
+
+    def _rolling_start(self, instances):
+        """
+        Restart instances stopped by `_rolling_stop()`, instances that are still running just continue.
+
+        Args:
+            instances (list[ProcessManager]):
+        """
+        for alas in instances:
+            self.event.get(alas.config_name).clear()
+            if not alas.alive:
+                logger.info(f"Restarting alas [{alas.config_name}]")
+                alas.start(func=get_config_mod(alas.config_name), ev=self.event)
+
+    def _start_update(self) -> bool:
         self.state = "start"
         instances = ProcessManager.running_instances()
         names = []
@@ -214,9 +344,9 @@ class Updater(DeployConfig, GitManager, PipManager):
             names.append(alas.config_name + "\n")
 
         logger.info("Waiting all running alas finish.")
-        self._wait_update(instances, names)
+        return self._wait_update(instances, names)
 
-    def _wait_update(self, instances: List[ProcessManager], names):
+    def _wait_update(self, instances: List[ProcessManager], names) -> bool:
         if self.state == "cancel":
             self.state = 1
         self.state = "wait"
@@ -233,16 +363,16 @@ class Updater(DeployConfig, GitManager, PipManager):
                 self.state = 1
                 self.event.clear()
                 ProcessManager.restart_processes(instances, self.event)
-                return
+                return False
             time.sleep(0.25)
             if time.time() - start_time > 60 * 10:
                 logger.warning("Waiting alas shutdown timeout, force kill")
                 for alas in _instances:
                     alas.stop()
                 break
-        self._run_update(instances, names)
+        return self._run_update(instances, names)
 
-    def _run_update(self, instances, names):
+    def _run_update(self, instances, names) -> bool:
         self.state = "run update"
         logger.info("All alas stopped, start updating")
 
@@ -257,6 +387,7 @@ class Updater(DeployConfig, GitManager, PipManager):
                 clearup()
             else:
                 self.state = "finish"
+            return True
         else:
             self.state = "failed"
             logger.warning("Update failed")
@@ -289,11 +420,11 @@ class Updater(DeployConfig, GitManager, PipManager):
                 th._task.delay = get_next_time(self.schedule_time)
                 yield
                 continue
-            if State.restart_event is None:
+            if State.restart_event is None and self.UpdateMode != "rolling":
                 yield
                 continue
             if not self.run_update():
-                self.state = "failed"
+                logger.warning(f"Scheduled update not finished, state: {self.state}")
             th._task.delay = get_next_time(self.schedule_time)
             yield
 
@@ -204,21 +204,18 @@ class RichLog:
         yield
         try:
             while True:
-                last_idx = len(pm.renderables)
-                html = "".join(map(self.render, pm.renderables[:]))
+                renderables, last_idx = pm.renderables.snapshot()
+                html = "".join(map(self.render, renderables))
                 self.reset()
                 self.extend(html)
-                counter = last_idx
+                counter = len(renderables)
                 while counter < pm.renderables_max_length * 2:
                     yield
-                    idx = len(pm.renderables)
-                    if idx < last_idx:
-                        last_idx -= pm.renderables_reduce_length
-                    if idx != last_idx:
-                        html = "".join(map(self.render, pm.renderables[last_idx:idx]))
+                    renderables, last_idx = pm.renderables.since(last_idx)
+                    if renderables:
+                        html = "".join(map(self.render, renderables))
                         self.extend(html)
-                        counter += idx - last_idx
-                        last_idx = idx
+                        counter += len(renderables)
         except SessionException:
             pass
 